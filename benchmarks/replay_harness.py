@@ -0,0 +1,450 @@
+# benchmarks/replay_harness.py - 离线回放压测：本地替身服务 + 处理流程吞吐/延迟测量
+"""不访问外网，用本地替身服务回放完整的处理流程：
+
+- RSS源和线报网页：合成数据，或 --recordings 目录中录制的 feeds/*.xml 和 articles/*.html
+- 大淘客 / 京品库 / 拼多多转链接口：按配置的延迟和错误率返回转链结果
+- LLOneBot：/send_group_msg 和 /send_group_forward_msg
+
+替身服务在独立的子进程中运行（其CPU占用不计入被测进程），驱动程序在临时工作目录中
+生成配置（转链接口通过各平台的 api_url 指向替身服务），并发执行 N 个RSS源的
+process_single_rss_source，统计：
+- 吞吐：每秒处理的条目数
+- 延迟：每个条目从抓取网页到推送完成的耗时 p50/p90/p99（来自 logs/entry_trace.log），以及各阶段耗时
+- 资源：CPU时间、峰值内存、线程数
+
+用法：
+    python benchmarks/replay_harness.py --feeds 20 --entries 30 --concurrency 4
+    python benchmarks/replay_harness.py --affiliate-latency-ms 200 --affiliate-error-rate 0.05 --bot-latency-ms 30
+    python benchmarks/replay_harness.py --recordings path/to/recordings --json
+    python benchmarks/replay_harness.py --serve-only --port 8765   # 只启动替身服务，供手动调试
+"""
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READY_PREFIX = "__REPLAY_READY__"
+
+DATAOKE_PATH = "/api/tb-service/parse-content"
+JINGPINKU_PATH = "/get_wire_report_link/api"
+PDD_PATH = "/api/router"
+
+# ---------------------------------------------------------------------------
+# 替身服务
+# ---------------------------------------------------------------------------
+
+class ReplayState:
+    """替身服务的配置、录制数据和请求计数"""
+
+    def __init__(self, args):
+        self.args = args
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.errors = {}
+        self.feed_files = []
+        self.article_files = []
+        if args.recordings:
+            self.feed_files = _list_files(os.path.join(args.recordings, "feeds"), ".xml")
+            self.article_files = _list_files(os.path.join(args.recordings, "articles"), ".html")
+
+    def count(self, endpoint, failed=False):
+        with self.lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            if failed:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {"requests": dict(self.counts), "injected_errors": dict(self.errors)}
+
+def _list_files(directory, suffix):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(suffix))
+
+def _read_text(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+def synthetic_feed(base, feed_index, entries):
+    """合成RSS源：每个条目链接到本地线报网页，发布时间为当前时间（保证通过时间过滤）"""
+    now = time.time()
+    items = []
+    for i in range(entries):
+        items.append(
+            f"<item><title>回放线报 {feed_index}-{i} 限时好价</title>"
+            f"<link>{base}/article/{feed_index}/{i}</link>"
+            f"<guid isPermaLink='false'>replay-{feed_index}-{i}</guid>"
+            f"<pubDate>{formatdate(now - i, usegmt=True)}</pubDate>"
+            f"<description>回放线报 {feed_index}-{i}</description></item>"
+        )
+    return (f"<?xml version='1.0' encoding='utf-8'?><rss version='2.0'><channel>"
+            f"<title>replay-{feed_index}</title>{''.join(items)}</channel></rss>")
+
+def synthetic_article(feed_index, entry_index):
+    """合成线报网页：正文包含淘宝、京东、拼多多商品链接"""
+    sku = 100000 + feed_index * 1000 + entry_index
+    paragraphs = [
+        f"回放线报 {feed_index}-{entry_index}：某品牌家用好物限时直降，叠加店铺券后到手价 {19 + entry_index % 80}.9 元。",
+        f"淘宝领券：https://s.click.taobao.com/t?e=replay{sku}",
+        f"京东下单：https://item.jd.com/{sku}.html",
+        f"拼多多百亿补贴：https://p.pinduoduo.com/replay{sku}",
+        "活动时间有限，库存不多，先到先得。" * 3,
+    ]
+    body = "".join(f"<p>{text}</p>" for text in paragraphs)
+    return (f"<html><head><title>线报 {feed_index}-{entry_index}</title></head>"
+            f"<body><div class='article-content'>{body}</div></body></html>")
+
+def rewrite_feed_links(xml, base, feed_index):
+    """把录制的RSS中的条目链接改写为本地线报网页，避免访问外网"""
+    counter = iter(range(1 << 30))
+    return re.sub(r"<link>\s*[^<]+?\s*</link>",
+                  lambda m: f"<link>{base}/article/{feed_index}/{next(counter)}</link>", xml)
+
+def make_handler(state):
+    args = state.args
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status, body, content_type="application/json; charset=utf-8"):
+            data = body.encode("utf-8") if isinstance(body, str) else body
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _simulate(self, endpoint, latency_ms, error_rate):
+            """模拟接口延迟（±20%抖动）并按错误率注入500错误，返回是否注入了错误"""
+            if latency_ms > 0:
+                time.sleep(latency_ms * random.uniform(0.8, 1.2) / 1000)
+            failed = error_rate > 0 and random.random() < error_rate
+            state.count(endpoint, failed)
+            if failed:
+                self._reply(500, '{"error": "injected"}')
+            return failed
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            base = f"http://{self.headers.get('Host')}"
+            parts = url.path.strip("/").split("/")
+
+            if parts[0] == "feed" and len(parts) == 2:
+                if self._simulate("feed", args.feed_latency_ms, 0):
+                    return
+                index = int(parts[1])
+                if state.feed_files:
+                    xml = rewrite_feed_links(_read_text(state.feed_files[index % len(state.feed_files)]), base, index)
+                else:
+                    xml = synthetic_feed(base, index, args.entries)
+                self._reply(200, xml, "application/rss+xml; charset=utf-8")
+            elif parts[0] == "article" and len(parts) == 3:
+                if self._simulate("article", args.article_latency_ms, 0):
+                    return
+                feed_index, entry_index = int(parts[1]), int(parts[2])
+                if state.article_files:
+                    html = _read_text(state.article_files[(feed_index * 7919 + entry_index) % len(state.article_files)])
+                else:
+                    html = synthetic_article(feed_index, entry_index)
+                self._reply(200, html, "text/html; charset=utf-8")
+            elif url.path == DATAOKE_PATH:
+                if self._simulate("dataoke", args.affiliate_latency_ms, args.affiliate_error_rate):
+                    return
+                content = parse_qs(url.query).get("content", [""])[0]
+                short = f"https://s.click.taobao.com/r{abs(hash(content)) % 10**8}"
+                self._reply(200, json.dumps({"code": 0, "msg": "成功", "data": {"shortUrl": short}}))
+            elif url.path == JINGPINKU_PATH:
+                if self._simulate("jingpinku", args.affiliate_latency_ms, args.affiliate_error_rate):
+                    return
+                content = parse_qs(url.query).get("content", [""])[0]
+                short = f"https://u.jd.com/R{abs(hash(content)) % 10**8}"
+                self._reply(200, json.dumps({"code": 0, "content": content, "official": f"京东好价 {short}"},
+                                            ensure_ascii=False))
+            elif url.path == "/stats":
+                self._reply(200, json.dumps(state.snapshot()))
+            else:
+                self._reply(404, '{"error": "not found"}')
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if url.path == PDD_PATH:
+                if self._simulate("pdd", args.affiliate_latency_ms, args.affiliate_error_rate):
+                    return
+                short = f"https://p.pinduoduo.com/R{abs(hash(body)) % 10**8}"
+                self._reply(200, json.dumps({"goods_zs_unit_generate_response": {"mobile_short_url": short}}))
+            elif url.path in ("/send_group_msg", "/send_group_forward_msg"):
+                if self._simulate(url.path.strip("/"), args.bot_latency_ms, args.bot_error_rate):
+                    return
+                self._reply(200, '{"status": "ok", "retcode": 0, "data": {"message_id": 1}}')
+            else:
+                self._reply(404, '{"error": "not found"}')
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayHandler
+
+def serve(args):
+    """启动替身服务并阻塞，启动后在标准输出打印 READY 行和端口"""
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(ReplayState(args)))
+    server.daemon_threads = True
+    print(f"{READY_PREFIX} {server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def start_server_process(args):
+    """在子进程中启动替身服务，返回 (进程, 基础URL)"""
+    command = [sys.executable, os.path.abspath(__file__), "--serve-only", "--port", "0",
+               "--entries", str(args.entries),
+               "--feed-latency-ms", str(args.feed_latency_ms),
+               "--article-latency-ms", str(args.article_latency_ms),
+               "--affiliate-latency-ms", str(args.affiliate_latency_ms),
+               "--affiliate-error-rate", str(args.affiliate_error_rate),
+               "--bot-latency-ms", str(args.bot_latency_ms),
+               "--bot-error-rate", str(args.bot_error_rate)]
+    if args.recordings:
+        command += ["--recordings", os.path.abspath(args.recordings)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith(READY_PREFIX):
+        process.kill()
+        raise RuntimeError("替身服务启动失败")
+    return process, f"http://127.0.0.1:{int(line.split()[1])}"
+
+# ---------------------------------------------------------------------------
+# 驱动程序
+# ---------------------------------------------------------------------------
+
+def prepare_workdir(base_url, args):
+    """创建临时工作目录和配置：N个RSS源，三个转链平台指向替身服务，关闭推送队列和指标服务"""
+    workdir = tempfile.mkdtemp(prefix="xianbao_replay_")
+    config = {
+        "rss_sources": [{
+            "rss_url": f"{base_url}/feed/{i}",
+            "interval": 60,
+            "group_id": str(10000 + i % args.groups),
+            "llonebot_api_url": base_url
+        } for i in range(args.feeds)],
+        "affiliate_config": {
+            "dataoke": {"enabled": True, "app_key": "replay", "app_secret": "replay",
+                        "api_url": base_url + DATAOKE_PATH},
+            "jingpinku": {"enabled": True, "appid": "replay", "appkey": "replay", "union_id": "replay",
+                          "api_url": base_url + JINGPINKU_PATH},
+            "pdd": {"enabled": True, "client_id": "replay", "client_secret": "replay", "pid": "replay",
+                    "api_url": base_url + PDD_PATH},
+            "batch_settings": {"convert_enabled": not args.no_convert, "max_convert_per_batch": 1000000}
+        },
+        "push_settings": {"queue_enabled": False},
+        "metrics_settings": {"enabled": False},
+        # 每个RSS源的全部条目都作为新线报处理，不能被积压补发限流
+        "catch_up_settings": {"enabled": False},
+        # 每个条目都写入追踪日志，用于计算延迟分位数
+        "trace_settings": {"enabled": True, "slow_entry_seconds": 3600, "slow_tick_seconds": 3600}
+    }
+    with open(os.path.join(workdir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    return workdir
+
+def percentile(values, pct):
+    """最近秩法分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def read_entry_traces(path):
+    records = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("kind") == "entry":
+                    records.append(record)
+    except FileNotFoundError:
+        pass
+    return records
+
+def resource_snapshot():
+    """返回 (CPU秒数, 峰值内存MB)；没有 resource 模块（Windows）时尝试 psutil"""
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # Linux 下 ru_maxrss 单位为KB，macOS 下为字节
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return usage.ru_utime + usage.ru_stime, usage.ru_maxrss / divisor
+    except ImportError:
+        pass
+    try:
+        import psutil
+        process = psutil.Process()
+        cpu = process.cpu_times()
+        return cpu.user + cpu.system, process.memory_info().peak_wset / (1024 * 1024)
+    except Exception:
+        return time.process_time(), 0.0
+
+def run_replay(args, base_url):
+    workdir = prepare_workdir(base_url, args)
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_DIR)
+
+    import logging
+    # 压测时只在控制台显示警告和错误，完整日志仍写入工作目录的 logs/
+    logging.basicConfig(level=logging.WARNING)
+    import main as service
+    if not args.verbose:
+        from src.utils import log_setup
+        for listener in log_setup._listeners:
+            for handler in listener.handlers:
+                if not isinstance(handler, logging.FileHandler):
+                    handler.setLevel(logging.WARNING)
+
+    feed_urls = [source["rss_url"] for source in service.load_rss_configs()]
+    # 跳过首次启动保护（只处理最新10条），让每个RSS源的全部条目都进入处理流程
+    for url in feed_urls:
+        service.mark_first_run_completed(url)
+
+    if args.process_pool >= 0:
+        from src.core.cpu_pool import start_cpu_pool
+        start_cpu_pool(args.process_pool)
+
+    # 与服务运行时相同：所有RSS源共用一个处理流水线
+    service.start_feed_pipeline()
+    cpu_before, _ = resource_snapshot()
+    start = time.perf_counter()
+    peak_threads = threading.active_count()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(service.process_single_rss_source, url) for url in feed_urls]
+        while not all(future.done() for future in futures):
+            peak_threads = max(peak_threads, threading.active_count())
+            time.sleep(0.05)
+        new_entries = sum(future.result() or 0 for future in futures)
+    elapsed = time.perf_counter() - start
+    cpu_after, peak_rss_mb = resource_snapshot()
+    service.stop_feed_pipeline()
+    if args.process_pool >= 0:
+        from src.core.cpu_pool import stop_cpu_pool
+        stop_cpu_pool()
+
+    traces = read_entry_traces(os.path.join(workdir, "logs", "entry_trace.log"))
+    latencies = [record["total_ms"] for record in traces]
+    stages = {}
+    for record in traces:
+        for name, ms in record.get("spans_ms", {}).items():
+            stages.setdefault(name, []).append(ms)
+
+    return {
+        "workdir": workdir,
+        "feeds": len(feed_urls),
+        "concurrency": args.concurrency,
+        "entries": new_entries,
+        "delivered": sum(1 for record in traces if record.get("delivered")),
+        "errors": sum(1 for record in traces if record.get("error")),
+        "elapsed_seconds": round(elapsed, 3),
+        "entries_per_second": round(new_entries / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else 0.0,
+            "mean": round(statistics.fmean(latencies), 1) if latencies else 0.0
+        },
+        "stages_ms": {name: {"p50": percentile(values, 50), "p99": percentile(values, 99)}
+                      for name, values in sorted(stages.items())},
+        "resources": {
+            "cpu_seconds": round(cpu_after - cpu_before, 3),
+            "cpu_percent": round((cpu_after - cpu_before) / elapsed * 100, 1) if elapsed > 0 else 0.0,
+            "peak_rss_mb": round(peak_rss_mb, 1),
+            "peak_threads": peak_threads
+        }
+    }
+
+def print_report(result):
+    latency = result["latency_ms"]
+    resources = result["resources"]
+    print(f"RSS源 {result['feeds']} 个，并发 {result['concurrency']}，工作目录 {result['workdir']}")
+    print(f"处理条目   {result['entries']} 条（推送成功 {result['delivered']}，出错 {result['errors']}），"
+          f"耗时 {result['elapsed_seconds']:.2f}s，吞吐 {result['entries_per_second']:.1f} 条/秒")
+    print(f"条目延迟   p50 {latency['p50']:.1f}ms   p90 {latency['p90']:.1f}ms   p99 {latency['p99']:.1f}ms   "
+          f"最大 {latency['max']:.1f}ms")
+    for name, values in result["stages_ms"].items():
+        print(f"  {name:<16} p50 {values['p50']:8.1f}ms   p99 {values['p99']:8.1f}ms")
+    print(f"资源占用   CPU {resources['cpu_seconds']:.2f}s（{resources['cpu_percent']:.0f}%），"
+          f"峰值内存 {resources['peak_rss_mb']:.1f}MB，峰值线程数 {resources['peak_threads']}")
+    server = result.get("server", {})
+    if server:
+        requests_line = "，".join(f"{name} {count}" for name, count in sorted(server["requests"].items()))
+        print(f"替身服务   请求 {requests_line}")
+        if server["injected_errors"]:
+            errors_line = "，".join(f"{name} {count}" for name, count in sorted(server["injected_errors"].items()))
+            print(f"           注入错误 {errors_line}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="离线回放压测：本地替身服务 + 处理流程吞吐/延迟测量")
+    parser.add_argument("--feeds", type=int, default=10, help="RSS源数量")
+    parser.add_argument("--entries", type=int, default=20, help="每个合成RSS源的条目数")
+    parser.add_argument("--groups", type=int, default=3, help="推送目标QQ群数量（RSS源轮流分配）")
+    parser.add_argument("--concurrency", type=int, default=4, help="同时处理的RSS源数量")
+    parser.add_argument("--recordings", help="录制数据目录：feeds/*.xml 和 articles/*.html（不指定时使用合成数据）")
+    parser.add_argument("--feed-latency-ms", type=float, default=20, help="RSS源响应延迟")
+    parser.add_argument("--article-latency-ms", type=float, default=30, help="线报网页响应延迟")
+    parser.add_argument("--affiliate-latency-ms", type=float, default=80, help="转链接口响应延迟")
+    parser.add_argument("--affiliate-error-rate", type=float, default=0.0, help="转链接口错误率（0~1）")
+    parser.add_argument("--bot-latency-ms", type=float, default=20, help="LLOneBot接口响应延迟")
+    parser.add_argument("--bot-error-rate", type=float, default=0.0, help="LLOneBot接口错误率（0~1）")
+    parser.add_argument("--no-convert", action="store_true", help="关闭返利转链")
+    parser.add_argument("--process-pool", type=int, default=-1,
+                        help="网页解析进程池的进程数（0为CPU核心数），默认不使用进程池")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    parser.add_argument("--keep", action="store_true", help="保留临时工作目录（日志和推送记录）")
+    parser.add_argument("--verbose", action="store_true", help="在控制台显示处理日志")
+    parser.add_argument("--serve-only", action="store_true", help="只启动替身服务")
+    parser.add_argument("--port", type=int, default=0, help="替身服务端口（--serve-only 时使用，0为随机端口）")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.serve_only:
+        return serve(args)
+
+    server_process, base_url = start_server_process(args)
+    try:
+        result = run_replay(args, base_url)
+        import requests
+        result["server"] = requests.get(f"{base_url}/stats", timeout=5).json()
+    finally:
+        server_process.terminate()
+        server_process.wait(5)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print_report(result)
+    if not args.keep:
+        os.chdir(REPO_DIR)
+        shutil.rmtree(result["workdir"], ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+# benchmarks/startup_benchmark.py - 启动耗时基准：模块导入、界面显示、首次轮询
+"""测量三项启动耗时（每项在独立的子进程中运行，包含Python解释器启动时间）：
+
+- import main:        导入调度和处理模块（无界面模式的启动成本），并用 python -X importtime 列出最慢的导入
+- time-to-window:     从启动进程到主窗口显示
+- time-to-first-poll: 从启动进程到调度器启动并完成第一次RSS轮询（使用本地模拟的RSS源和QQ机器人接口）
+
+用法：
+    python benchmarks/startup_benchmark.py            # 每项运行5次，输出中位数
+    python benchmarks/startup_benchmark.py --runs 10 --top 20
+没有显示器时自动使用 QT_QPA_PLATFORM=offscreen。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READY_MARKER = "__BENCHMARK_READY__"
+
+IMPORT_SCRIPT = f"""
+import sys
+sys.path.insert(0, {REPO_DIR!r})
+import main
+print({READY_MARKER!r}, flush=True)
+"""
+
+WINDOW_SCRIPT = f"""
+import sys
+sys.path.insert(0, {REPO_DIR!r})
+import main
+from PyQt6.QtWidgets import QApplication
+from src.gui.main_window import MainWindow
+app = QApplication(sys.argv)
+window = MainWindow()
+window.show()
+app.processEvents()
+print({READY_MARKER!r}, flush=True)
+window.log_monitor.stop()
+window.log_monitor.wait(2000)
+"""
+
+FIRST_POLL_SCRIPT = f"""
+import sys
+sys.path.insert(0, {REPO_DIR!r})
+import main
+main.start_scheduler()
+# 定时任务的首次执行要等一个轮询间隔，这里直接执行第一个RSS源的任务
+rss_url = main.load_rss_configs()[0]["rss_url"]
+main.run_rss_job(rss_url)
+print({READY_MARKER!r}, flush=True)
+main.stop_scheduler()
+"""
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """本地模拟的RSS源、线报网页和LLOneBot接口"""
+
+    def do_GET(self):
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        if self.path.startswith("/feed"):
+            items = "".join(
+                f"<item><title>线报 {i}</title><link>{base}/article/{i}</link><guid>bench-{i}</guid>"
+                f"<description>测试线报 {i}</description></item>"
+                for i in range(5)
+            )
+            body = f"<?xml version='1.0'?><rss version='2.0'><channel><title>bench</title>{items}</channel></rss>"
+        else:
+            body = f"<html><body><article><p>基准测试线报正文 {self.path}，到手价 99 元。</p></article></body></html>"
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        data = b'{"status": "ok", "retcode": 0}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_mock_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MockHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def prepare_workdir(mock_url):
+    """创建临时工作目录和配置文件（关闭指标服务，避免端口冲突）"""
+    workdir = tempfile.mkdtemp(prefix="xianbao_bench_")
+    config = {
+        "rss_sources": [{
+            "rss_url": f"{mock_url}/feed",
+            "interval": 5,
+            "group_id": "10000",
+            "llonebot_api_url": mock_url
+        }],
+        "push_settings": {"queue_enabled": False},
+        "metrics_settings": {"enabled": False}
+    }
+    with open(os.path.join(workdir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    return workdir
+
+def clean_workdir(workdir):
+    """删除上一次运行留下的状态文件，保证每次都是冷启动"""
+    for name in os.listdir(workdir):
+        if name.endswith(".json") and name != "config.json":
+            os.remove(os.path.join(workdir, name))
+
+def time_to_ready(script, workdir, env, extra_args=()):
+    """启动子进程执行脚本，返回从启动到输出READY标记的秒数和子进程的stderr"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, *extra_args, "-c", script],
+        cwd=workdir, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace"
+    )
+    elapsed = None
+    for line in process.stdout:
+        if READY_MARKER in line:
+            elapsed = time.perf_counter() - start
+            break
+    _, stderr = process.communicate(timeout=60)
+    if elapsed is None:
+        raise RuntimeError(f"子进程未完成（返回码 {process.returncode}）:\n{stderr[-2000:]}")
+    return elapsed, stderr
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 [(累计微秒, 模块名, 缩进层级)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((int(cumulative_us), name.strip(), depth))
+    return rows
+
+def run_benchmark(name, script, workdir, env, runs):
+    samples = []
+    for _ in range(runs):
+        clean_workdir(workdir)
+        elapsed, _ = time_to_ready(script, workdir, env)
+        samples.append(elapsed * 1000)
+    print(f"{name:<20} 中位数 {statistics.median(samples):8.1f}ms   "
+          f"最小 {min(samples):8.1f}ms   最大 {max(samples):8.1f}ms   ({runs}次)")
+    return samples
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每项测量的次数")
+    parser.add_argument("--top", type=int, default=15, help="列出最慢的前N个导入")
+    parser.add_argument("--skip-gui", action="store_true", help="不测量界面启动（未安装PyQt6时使用）")
+    args = parser.parse_args(argv)
+
+    server = start_mock_server()
+    mock_url = f"http://127.0.0.1:{server.server_port}"
+    workdir = prepare_workdir(mock_url)
+
+    env = dict(os.environ)
+    if sys.platform.startswith("linux") and not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    print(f"Python {sys.version.split()[0]}，工作目录 {workdir}\n")
+
+    _, stderr = time_to_ready(IMPORT_SCRIPT, workdir, env, ("-X", "importtime"))
+    rows = parse_importtime(stderr)
+    # 子模块在父模块之前输出：main 之前连续的非顶层记录就是 main 导入的模块
+    index = next(i for i, (_, name, depth) in enumerate(rows) if name == "main" and depth == 0)
+    start = index
+    while start > 0 and rows[start - 1][2] >= 1:
+        start -= 1
+    print(f"import main 累计导入耗时（-X importtime）: {rows[index][0] / 1000:.1f}ms，最慢的导入：")
+    for cumulative, name, depth in sorted(rows[start:index], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f}ms  {'  ' * (depth - 1)}{name}")
+    print()
+
+    run_benchmark("import main", IMPORT_SCRIPT, workdir, env, args.runs)
+    if not args.skip_gui:
+        run_benchmark("time-to-window", WINDOW_SCRIPT, workdir, env, args.runs)
+    run_benchmark("time-to-first-poll", FIRST_POLL_SCRIPT, workdir, env, args.runs)
+
+    server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# daemon.py - 无界面后台服务入口（不导入PyQt6，适用于服务器和systemd）
+import argparse
+import os
+import signal
+import sys
+import threading
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="智能RSS线报推送系统 - 无界面后台服务")
+    parser.add_argument("-C", "--workdir",
+                        help="工作目录（config.json、推送记录和logs目录所在位置），默认当前目录")
+    parser.add_argument("-c", "--config", help="配置文件路径，默认 config.json")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="多进程分片模式：启动N个工作进程，RSS源按一致性哈希分配，默认1（单进程）")
+    parser.add_argument("--state-db", default="state.db", help="分片模式下共享的SQLite状态库，默认 state.db")
+    parser.add_argument("--shard", help=argparse.SUPPRESS)  # 工作进程参数 "编号/数量"，由协调进程传入
+    return parser.parse_args(argv)
+
+def install_signal_handlers(stop_event, reload_event):
+    def handle_stop(signum, frame):
+        stop_event.set()
+
+    def handle_reload(signum, frame):
+        reload_event.set()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, handle_reload)
+
+def run_coordinator(args, config_manager):
+    """分片模式的协调进程：导入已有状态，启动并监控各分片工作进程"""
+    import logging
+    from src.utils.log_setup import LOG_FORMAT
+    from src.core.sharding import assign_feeds
+    from src.core.state_store import SqliteStateStore
+    from src.core.shard_coordinator import ShardCoordinator
+
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    logger = logging.getLogger("daemon")
+
+    # 首次切换到分片模式时，把单进程模式的 sent_entries.json 导入共享状态库
+    SqliteStateStore(args.state_db).import_json("sent_entries.json")
+    assignment = assign_feeds(config_manager.load_rss_configs(), args.shards)
+    logger.info("RSS源分配：" + "，".join(f"分片{index} {len(configs)}个" for index, configs in assignment.items()))
+
+    stop_event = threading.Event()
+    reload_event = threading.Event()
+    install_signal_handlers(stop_event, reload_event)
+
+    coordinator = ShardCoordinator(args.shards, config_manager.CONFIG_FILE, args.state_db)
+    coordinator.start()
+    try:
+        while not stop_event.wait(1):
+            coordinator.check()
+            if reload_event.is_set():
+                reload_event.clear()
+                logger.info("收到 SIGHUP，通知工作进程重新加载配置")
+                coordinator.reload()
+        logger.info("收到停止信号，正在停止所有工作进程...")
+    finally:
+        coordinator.stop()
+        logger.info("所有工作进程已退出")
+    return 0
+
+def main(argv=None):
+    """启动调度器并阻塞运行，收到 SIGTERM / SIGINT 后停止调度器退出；SIGHUP 重新加载配置
+
+    --shards N（N>1）时作为协调进程运行，启动N个分片工作进程
+    """
+    args = parse_args(argv)
+    if args.workdir:
+        os.chdir(args.workdir)
+
+    from src.core import config_manager
+    if args.config:
+        config_manager.CONFIG_FILE = args.config
+
+    if args.shards > 1 and not args.shard:
+        return run_coordinator(args, config_manager)
+
+    # main.py 只在GUI模式下导入Qt，这里只使用调度和处理流程
+    import main as service
+
+    stop_event = threading.Event()
+    reload_event = threading.Event()
+    install_signal_handlers(stop_event, reload_event)
+
+    if args.shard:
+        index, count = args.shard.split("/")
+        service.configure_shard(int(index), int(count), args.state_db)
+
+    service.logger.info("以无界面模式启动RSS监控服务")
+    service.start_scheduler()
+    try:
+        # 定时醒来，保证Windows下也能及时响应Ctrl+C
+        while not stop_event.wait(1):
+            if reload_event.is_set():
+                reload_event.clear()
+                service.logger.info("收到 SIGHUP，重新加载配置")
+                config_manager.check_config_changes()
+        service.logger.info("收到停止信号，正在停止服务...")
+    finally:
+        service.stop_scheduler()
+        service.logger.info("RSS监控服务已退出")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
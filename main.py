@@ -1,52 +1,60 @@
 # main.py - Application entry point
 import sys
 import threading
-from PyQt6.QtWidgets import QApplication
-from src.gui.main_window import MainWindow
-from apscheduler.schedulers.background import BackgroundScheduler
-from src.core.config_manager import load_rss_configs, save_config, load_affiliate_config
-from src.core.rss_fetcher import parse_feed, generate_entry_id, fetch_webpage_content
-from src.core.qq_pusher import send_group_message
-from src.core.affiliate_converter import AffiliateConverter
+from src.core.config_manager import (load_rss_configs, save_config, load_affiliate_config, load_settings,
+                                     get_default_scheduler_settings, get_default_push_settings,
+                                     get_default_metrics_settings, get_default_trace_settings,
+                                     get_default_log_settings, get_default_pipeline_settings,
+                                     get_default_catch_up_settings, get_push_targets,
+                                     get_config, get_rss_config, subscribe, unsubscribe,
+                                     check_config_changes)
+from src.core.rss_fetcher import (parse_feed, generate_entry_id, generate_legacy_entry_id, download_webpage,
+                                  clean_article)
+from src.core.qq_pusher import send_group_message, send_group_forward_message
+from src.core.push_queue import PushQueue
+from src.core.digest import get_digest_settings, chunk_messages, format_digest
+from src.core.catch_up import get_catch_up_settings, get_backlog_start, plan_catch_up
+from src.core.entry_filter import get_entry_filter
+from src.utils.deal_extractor import extract_entry_deal
+from src.core.adaptive_scheduler import AdaptiveIntervalTracker
+from src.core.metrics import (FEED_NEW_ENTRIES, FEED_FILTERED_ENTRIES, FEED_TICK_SECONDS, CLEANUP_SECONDS,
+                              ARTICLE_PARSE_SECONDS, PUSH_QUEUE_DEPTH, start_metrics_server, stop_metrics_server)
+from src.core.tracing import start_trace, finish_trace, NULL_TRACE
+from src.core.pipeline import Stage, Pipeline
+from src.core.cpu_pool import start_cpu_pool, stop_cpu_pool, run_cpu_task
 from src.utils.text_cleaner import summarize_text, clean_html_tags
+from src.utils.log_setup import setup_async_logging, attach_logger
 import logging
 import os
 import json
-from logging.handlers import RotatingFileHandler
+import copy
+import datetime
+import hashlib
+import time
+import calendar
+import concurrent.futures
 
 # 创建全局停止标志
 _stop_flag = threading.Event()
 
 # 创建一个主日志记录器（避免重复日志）
 logger = logging.getLogger(__name__)
-if not logger.handlers:  # 避免重复添加处理器
+# 进程池（spawn）的工作进程会以 __mp_main__ 的名字重新导入本模块，工作进程不写日志文件
+if not logger.handlers and __name__ != "__mp_main__":  # 避免重复添加处理器
     logger.setLevel(logging.INFO)
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-
-    # 控制台处理器
-    stream_handler = logging.StreamHandler()
-    stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
-
-    # 确保logs目录存在
-    import os
-    if not os.path.exists("logs"):
-        os.makedirs("logs")
-
-    # 文件处理器（带轮换）- 增加日志容量和备份数
-    # maxBytes=10MB，backupCount=30（保留约300MB的日志历史）
-    file_handler = RotatingFileHandler(
+    # 不再传递给根日志记录器（模块中的 logging.info() 会自动给根记录器添加控制台输出，导致重复打印）
+    logger.propagate = False
+    # 异步写日志：定时任务线程只负责入队，控制台和文件（带轮换）由后台监听线程写入
+    log_settings = load_settings('log_settings', get_default_log_settings)
+    setup_async_logging(
+        logger,
         "logs/rss_qq_app.log",
-        maxBytes=10*1024*1024,  # 10MB per file
-        backupCount=30,  # Keep 30 backup files
-        encoding='utf-8'
+        json_enabled=log_settings.get("json_enabled", False),
+        json_file=log_settings.get("json_file", "logs/rss_qq_app.jsonl")
     )
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
-    # 强制刷新日志处理器
-    logger.handlers[0].flush()
-    logger.handlers[1].flush()
+    # 推送队列的工作线程和QQ推送的发送结果也写入主日志（GUI的日志页面显示主日志）
+    attach_logger(logging.getLogger('src.core.push_queue'), logger)
+    attach_logger(logging.getLogger('src.core.qq_pusher'), logger)
 
 # 为apscheduler单独设置日志级别
 logging.getLogger('apscheduler').setLevel(logging.WARNING)
@@ -55,16 +63,62 @@ logging.getLogger('apscheduler').setLevel(logging.WARNING)
 scheduler = None
 scheduler_lock = threading.Lock()
 SENT_ENTRIES_FILE = "sent_entries.json"
-sent_entries_lock = threading.Lock()
+sent_entries_lock = threading.RLock()
+
+# 自适应轮询间隔统计（跨调度器重启保留）
+adaptive_tracker = AdaptiveIntervalTracker()
+
+# 推送队列（随调度器启动/停止），未启用时直接同步推送
+push_queue = None
+# 推送队列确认的发送结果，轮询结束时或每5秒批量写入状态 [(rss_url, 条目ID, QQ群号, 记录键)]
+_delivery_acks = []
+_delivery_acks_lock = threading.Lock()
+
+# 处理流水线（随调度器启动/停止），所有定时任务共用各阶段的工作线程
+feed_pipeline = None
+
+# 当前调度中的RSS任务参数 {job_id: {rss_url, interval, adaptive, jitter, signature}}
+_job_specs = {}
+
+# 多进程分片模式（daemon.py --shards）：本进程的 (分片编号, 分片数量)，以及共享状态库
+_shard = None
+state_store = None
+
+# 高水位标记中保留的已处理条目ID数量（至少为RSS条目数）
+FEED_MARK_SIZE = 200
+
+def configure_shard(index, count, state_db):
+    """作为分片工作进程运行：只处理一致性哈希分配到本分片的RSS源，状态保存到共享的SQLite库"""
+    global _shard, state_store
+    from src.core.state_store import SqliteStateStore
+    _shard = (int(index), int(count))
+    state_store = SqliteStateStore(state_db)
+    logger.info(f"分片模式：本进程为分片 {index}/{count}，共享状态库 {state_db}")
+
+def owned_rss_configs(configs):
+    """返回本进程负责的RSS源（非分片模式下为全部）"""
+    if _shard is None:
+        return configs
+    from src.core.sharding import shard_of
+    index, count = _shard
+    return [config for config in configs if shard_of(config['rss_url'], count) == index]
 
 def load_system_state():
     """加载系统状态（包含已发送条目、每个RSS源的首次运行状态、时间分界点）"""
+    if state_store is not None:
+        try:
+            return state_store.load_state()
+        except Exception as e:
+            logger.error(f"加载共享状态失败: {e}")
+            return {"sent_entries": [], "first_run_completed": False, "first_run_status": {},
+                    "last_processed_time": {}, "feed_marks": {}}
     with sent_entries_lock:
         default_state = {
             "sent_entries": [],
             "first_run_completed": False,  # 保留用于兼容旧版本
             "first_run_status": {},  # 新增：每个RSS源独立的首次运行状态 {rss_url: True/False}
-            "last_processed_time": {}
+            "last_processed_time": {},
+            "feed_marks": {}  # 每个RSS源的高水位标记 {rss_url: {ids, pending, max_published, checked_at, catch_up_since}}
         }
         
         if not os.path.exists(SENT_ENTRIES_FILE):
@@ -80,7 +134,8 @@ def load_system_state():
                     "sent_entries": data,
                     "first_run_completed": True,
                     "first_run_status": {},
-                    "last_processed_time": {}
+                    "last_processed_time": {},
+                    "feed_marks": {}
                 }
             
             # 确保所有必要的字段存在
@@ -97,15 +152,24 @@ def load_system_state():
             logging.error(f"加载系统状态失败: {e}")
             return default_state
 
-def save_system_state(sent_entries, first_run_completed, last_processed_time, first_run_status=None):
+def save_system_state(sent_entries, first_run_completed, last_processed_time, first_run_status=None,
+                      feed_marks=None):
     """保存系统状态"""
+    if state_store is not None:
+        try:
+            # 高水位标记由 save_feed_mark 单独写入，这里不写回（避免用加载时的旧标记覆盖其他分片的新标记）
+            state_store.save_state(sent_entries, first_run_completed, last_processed_time, first_run_status)
+        except Exception as e:
+            logger.error(f"保存共享状态失败: {e}")
+        return
     with sent_entries_lock:
         try:
             state = {
                 "sent_entries": list(sent_entries),
                 "first_run_completed": first_run_completed,
                 "first_run_status": first_run_status if first_run_status is not None else {},
-                "last_processed_time": last_processed_time
+                "last_processed_time": last_processed_time,
+                "feed_marks": feed_marks if feed_marks is not None else {}
             }
             
             with open(SENT_ENTRIES_FILE, 'w', encoding='utf-8') as f:
@@ -113,6 +177,47 @@ def save_system_state(sent_entries, first_run_completed, last_processed_time, fi
         except Exception as e:
             logging.error(f"保存系统状态失败: {e}")
 
+def update_system_state(update):
+    """在锁内加载最新状态、调用 update(state) 修改后保存（JSON状态文件模式）
+
+    并发的定时任务各自只修改自己的部分（某个RSS源的标记、时间分界点，或本次新增的已发送记录），
+    不会用加载时的旧状态覆盖其他任务的修改。
+    """
+    with sent_entries_lock:
+        state = load_system_state()
+        update(state)
+        save_system_state(
+            set(state["sent_entries"]),
+            state["first_run_completed"],
+            state["last_processed_time"],
+            state["first_run_status"],
+            state["feed_marks"]
+        )
+
+def commit_sent_entries(loaded_entries, sent_entries, first_run_completed=False):
+    """保存本次处理对已发送记录的修改
+
+    Args:
+        loaded_entries: 处理开始时加载的已发送记录（副本）
+        sent_entries: 处理后的已发送记录；与 loaded_entries 的差异（新增和删除）合并到最新状态
+        first_run_completed: 同时标记全局首次运行完成
+    """
+    if state_store is not None:
+        save_system_state(sent_entries, first_run_completed, {})
+        flush_delivery_acks()
+        return
+    added = sent_entries - loaded_entries
+    removed = loaded_entries - sent_entries
+    acks = _take_delivery_acks()
+
+    def update(state):
+        state["sent_entries"] = (set(state["sent_entries"]) - removed) | added
+        # 推送队列确认的发送结果一并写入
+        apply_delivery_acks(state["sent_entries"], acks)
+        if first_run_completed:
+            state["first_run_completed"] = True
+    update_system_state(update)
+
 def load_sent_entries():
     """加载已发送条目记录（兼容接口）"""
     state = load_system_state()
@@ -141,16 +246,28 @@ def load_last_processed_time(rss_url):
 
 def save_last_processed_time(rss_url, timestamp):
     """保存RSS源的最后处理时间"""
+    if state_store is not None:
+        state_store.set_last_processed_time(rss_url, timestamp)
+        return
+
+    def update(state):
+        state["last_processed_time"][rss_url] = timestamp
+    update_system_state(update)
+
+def load_feed_mark(rss_url):
+    """加载RSS源的高水位标记（没有时返回None）"""
     state = load_system_state()
-    state["last_processed_time"][rss_url] = timestamp
-    
-    # 保存整个状态
-    save_system_state(
-        set(state["sent_entries"]),
-        state["first_run_completed"],
-        state["last_processed_time"],
-        state["first_run_status"]
-    )
+    return state["feed_marks"].get(rss_url)
+
+def save_feed_mark(rss_url, mark):
+    """保存RSS源的高水位标记"""
+    if state_store is not None:
+        state_store.set_feed_mark(rss_url, mark)
+        return
+
+    def update(state):
+        state["feed_marks"][rss_url] = mark
+    update_system_state(update)
 
 def mark_first_run_completed(rss_url=None):
     """标记首次运行完成
@@ -158,449 +275,944 @@ def mark_first_run_completed(rss_url=None):
     Args:
         rss_url: RSS源URL，如果提供则标记该源完成首次运行；否则标记全局完成
     """
-    state = load_system_state()
-    
+    if state_store is not None:
+        state_store.mark_first_run_completed(rss_url)
+        if rss_url:
+            logger.info(f"RSS源 '{rss_url}' 首次运行保护已完成")
+        return
+
+    def update(state):
+        if rss_url:
+            # 标记特定RSS源的首次运行已完成
+            state["first_run_status"][rss_url] = True
+        else:
+            # 兼容旧代码：标记全局首次运行完成
+            state["first_run_completed"] = True
+    update_system_state(update)
     if rss_url:
-        # 标记特定RSS源的首次运行已完成
-        state["first_run_status"][rss_url] = True
         logger.info(f"RSS源 '{rss_url}' 首次运行保护已完成")
-    else:
-        # 兼容旧代码：标记全局首次运行完成
-        state["first_run_completed"] = True
-    
-    # 保存整个状态
-    save_system_state(
-        set(state["sent_entries"]),
-        state["first_run_completed"],
-        state["last_processed_time"],
-        state["first_run_status"]
-    )
 
-def process_single_rss_source(rss_url):
-    """处理单个RSS源的函数 - 每个定时任务独立调用"""
-    # 检查停止标志
-    if _stop_flag.is_set():
-        logger.info("收到停止信号，跳过RSS处理")
-        return
-    
-    # 加载配置找到对应的RSS源
-    configs = load_rss_configs()
-    config = None
-    for c in configs:
-        if c["rss_url"] == rss_url:
-            config = c
-            break
-    
-    if not config:
-        logger.warning(f"未找到RSS源配置: {rss_url}")
-        return
+def deliver_message(api_url, group_id, message, forward=None):
+    """同步推送消息
     
-    # 加载完整配置
-    from src.core.config_manager import load_config
-    full_config = load_config()
-    affiliate_config = full_config.get('affiliate_config', {})
+    Args:
+        forward: 合并转发参数 {'name': ..., 'uin': ...}，此时message为消息列表
+    Returns:
+        推送成功返回True
+    """
+    if forward:
+        return send_group_forward_message(api_url, group_id, message, **forward)
+    return send_group_message(api_url, group_id, message)
+
+def delivery_key(entry_id, group_id):
+    """条目在单个QQ群的投递记录键"""
+    return f"{entry_id}@{group_id}"
+
+def dead_letter_key(entry_id, group_id):
+    """条目在单个QQ群转入死信（不再推送）的记录键"""
+    return f"{entry_id}@{group_id}#dead"
+
+def get_pending_targets(entry_id, targets, sent_entries):
+    """返回条目尚未投递的推送目标
     
-    affiliate_converter = None
-    if affiliate_config and any(affiliate_config.get(platform, {}).get('enabled', False)
-                              for platform in ['dataoke', 'jingpinku', 'pdd']):
-        affiliate_converter = AffiliateConverter(full_config)
-        logger.info("返利转链功能已启用")
+    sent_entries 中的条目ID本身表示已投递到所有目标（兼容单群旧记录），
+    "条目ID@群号" 表示只投递到了该群，"条目ID@群号#dead" 表示该群的消息已转入死信，不再推送。
+    """
+    if entry_id in sent_entries:
+        return []
+    return [t for t in targets if delivery_key(entry_id, t['group_id']) not in sent_entries
+            and dead_letter_key(entry_id, t['group_id']) not in sent_entries]
 
-    sent_entries = load_sent_entries()
-    first_run = is_first_run(rss_url)  # 检查该RSS源的首次运行状态
+def _is_legacy_key(key):
+    """旧版本的推送记录键：32位md5十六进制条目ID（或 "条目ID@群号"）"""
+    return isinstance(key, str) and len(key.split('@', 1)[0]) == 32
+
+def has_legacy_entries(sent_entries):
+    """已发送记录中是否还有旧版本（md5十六进制）条目ID"""
+    return any(_is_legacy_key(key) for key in sent_entries)
+
+def migrate_legacy_delivery(sent_entries, legacy_id, entry_id, targets):
+    """把条目旧ID下的推送记录改为新ID，返回是否找到旧记录"""
+    found = False
+    if legacy_id in sent_entries:
+        sent_entries.discard(legacy_id)
+        sent_entries.add(entry_id)
+        found = True
+    for target in targets:
+        legacy_key = delivery_key(legacy_id, target['group_id'])
+        if legacy_key in sent_entries:
+            sent_entries.discard(legacy_key)
+            sent_entries.add(delivery_key(entry_id, target['group_id']))
+            found = True
+    return found
+
+def deliver_to_targets(targets, message, entry_ids=None, forward=None, feed=None, title=None):
+    """将同一条消息投递到多个目标
     
-    if first_run:
-        logger.info(f"RSS源 '{config['rss_url']}' 首次启动，启用保护机制 - 只处理最新10条")
+    推送队列运行时入队后立即返回，由队列发送成功后记录已发送（见 on_queue_delivered）；
+    否则并行同步推送。
+    Returns:
+        (入队或推送成功的目标列表, 是否为入队)
+    """
+    queue = push_queue
+    if queue is not None:
+        for target in targets:
+            queue.enqueue(target['llonebot_api_url'], target['group_id'], message, entry_ids, forward, feed, title)
+        return list(targets), True
+
+    if len(targets) == 1:
+        target = targets[0]
+        return (targets if deliver_message(target['llonebot_api_url'], target['group_id'], message, forward) else []), False
     
-    # 只处理这一个RSS源
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        results = list(executor.map(
+            lambda t: deliver_message(t['llonebot_api_url'], t['group_id'], message, forward),
+            targets
+        ))
+    return [t for t, ok in zip(targets, results) if ok], False
+
+def _add_delivery_acks(item, make_key):
+    with _delivery_acks_lock:
+        _delivery_acks.extend((item.get('feed'), entry_id, item['group_id'], make_key(entry_id, item['group_id']))
+                              for entry_id in item['entry_ids'])
+
+def _take_delivery_acks():
+    global _delivery_acks
+    with _delivery_acks_lock:
+        acks, _delivery_acks = _delivery_acks, []
+    return acks
+
+def apply_delivery_acks(sent_entries, acks):
+    """把推送队列确认的结果加入已发送记录，条目的所有推送目标都完成后合并为条目ID"""
+    sent_entries.update(key for _, _, _, key in acks)
+    for rss_url, entry_id in {(rss_url, entry_id) for rss_url, entry_id, _, _ in acks}:
+        config = get_rss_config(rss_url) if rss_url else None
+        targets = get_push_targets(config) if config else []
+        if targets and entry_id not in sent_entries and not get_pending_targets(entry_id, targets, sent_entries):
+            record_delivery(sent_entries, entry_id, targets, [], [])
+
+def flush_delivery_acks():
+    """把推送队列确认的结果批量写入状态（每5秒、每次轮询结束和停止服务时执行）"""
+    acks = _take_delivery_acks()
+    if not acks:
+        return
+    if state_store is not None:
+        # 分片模式：只加载这些条目已有的按群记录，合并后写回（所有群都完成时 save_state 删除按群记录）
+        sent_entries = state_store.load_entry_keys({entry_id for _, entry_id, _, _ in acks})
+        apply_delivery_acks(sent_entries, acks)
+        save_system_state(sent_entries, False, {})
+        return
+
+    def update(state):
+        sent_entries = set(state["sent_entries"])
+        apply_delivery_acks(sent_entries, acks)
+        state["sent_entries"] = sent_entries
+    update_system_state(update)
+
+def delivery_ack_task():
+    """定时写入推送队列确认的发送结果"""
     try:
-        entries = parse_feed(config["rss_url"])
-        if not entries:
-            logger.warning(f"RSS源 '{config['rss_url']}' 未返回任何内容，跳过处理")
-            return
+        flush_delivery_acks()
+    except Exception as e:
+        logger.error(f"保存推送结果失败: {e}", exc_info=True)
 
-        # 获取最后处理时间
-        last_processed_time = load_last_processed_time(config["rss_url"])
-        
-        if first_run:
-            # 首次启动：只处理最新10条
-            entries = entries[:10]
-            logger.info(f"首次启动保护：RSS源 '{config['rss_url']}' 只处理最新 {len(entries)} 条")
+def on_queue_delivered(item):
+    """推送队列发送成功的回调（在队列工作线程中执行）：记录消息包含的条目已投递到该群（批量写入）"""
+    _add_delivery_acks(item, delivery_key)
+    logger.info(f"成功推送: {(item.get('title') or '')[:50]}... (QQ群 {item['group_id']})",
+                extra={'feed': item.get('feed'), 'stage': 'deliver'})
+
+def on_queue_dead_letter(item):
+    """推送队列转入死信的回调：记录消息包含的条目在该群不再推送，之后的轮询不会重新入队"""
+    _add_delivery_acks(item, dead_letter_key)
+
+def get_queued_targets():
+    """推送队列中尚未处理完、或结果尚未写入状态的 (条目ID, QQ群号)"""
+    queue = push_queue
+    targets = queue.queued_targets() if queue is not None else set()
+    with _delivery_acks_lock:
+        targets.update((entry_id, group_id) for _, entry_id, group_id, _ in _delivery_acks)
+    return targets
+
+def record_delivery(sent_entries, entry_id, targets, pending_targets, delivered_targets):
+    """记录投递结果：所有目标都完成后只保留条目ID，否则按群记录"""
+    for target in delivered_targets:
+        sent_entries.add(delivery_key(entry_id, target['group_id']))
+    
+    if len(delivered_targets) == len(pending_targets):
+        sent_entries.add(entry_id)
+        for target in targets:
+            sent_entries.discard(delivery_key(entry_id, target['group_id']))
+            sent_entries.discard(dead_letter_key(entry_id, target['group_id']))
+
+def deliver_digests(digest_items, targets, sent_entries, digest_settings, feed=None):
+    """合并推送本次收集的线报，返回成功投递（或入队）的条目数
+    
+    Args:
+        digest_items: [{'entry_id', 'title', 'message', 'pending_targets'}]，按RSS顺序排列
+        feed: RSS源URL，用于日志
+    """
+    delivered_count = 0
+    
+    # 新线报太少时逐条推送
+    if len(digest_items) < digest_settings['min_items']:
+        for item in digest_items:
+            delivered_targets, queued = deliver_to_targets(item['pending_targets'], item['message'], [item['entry_id']],
+                                                           feed=feed, title=item['title'])
+            if delivered_targets:
+                delivered_count += 1
+                if queued:
+                    logger.info(f"已入队: {item['title'][:50]}... ({len(delivered_targets)}个群)", extra={'feed': feed})
+                    continue
+                record_delivery(sent_entries, item['entry_id'], targets, item['pending_targets'], delivered_targets)
+                logger.info(f"成功推送: {item['title'][:50]}... ({len(delivered_targets)}/{len(item['pending_targets'])}个群)")
+            else:
+                logger.warning(f"推送失败: {item['title'][:50]}...")
+        return delivered_count
+    
+    # 按待投递的群分组，同一组的线报合并为一条消息
+    groups = {}
+    for item in digest_items:
+        key = tuple(t['group_id'] for t in item['pending_targets'])
+        groups.setdefault(key, []).append(item)
+    
+    forward = None
+    if digest_settings['forward']:
+        forward = {'name': digest_settings['forward_name'], 'uin': digest_settings['forward_uin']}
+    
+    for items in groups.values():
+        pending_targets = items[0]['pending_targets']
+        index = 0
+        for chunk in chunk_messages([item['message'] for item in items],
+                                    digest_settings['max_items'], digest_settings['max_length']):
+            chunk_items = items[index:index + len(chunk)]
+            index += len(chunk)
             
-            # 记录首次启动的当前时间作为分界点，这样下次只会获取新内容
-            if entries:
-                import time
-                import calendar
-                # 使用当前时间作为分界点
-                cutoff_time = int(time.time())
-                save_last_processed_time(config["rss_url"], cutoff_time)
-                beijing_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(cutoff_time))
-                logger.info(f"设置时间分界点：{beijing_time} (北京时间)")
-        else:
-            # 非首次启动：只处理时间晚于分界点的条目
-            if last_processed_time:
-                import time as time_module
-                import calendar
-                filtered_entries = []
-                for entry in entries:
-                    if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                        entry_time = calendar.timegm(entry.published_parsed)
-                        if entry_time > last_processed_time:
-                            filtered_entries.append(entry)
-                
-                entries = filtered_entries
-                if entries:
-                    logger.info(f"时间过滤：RSS源 '{config['rss_url']}' 发现 {len(entries)} 条新线报")
-                else:
-                    logger.info(f"时间过滤：RSS源 '{config['rss_url']}' 没有新线报")
-                    return
+            if forward:
+                message = chunk
+            else:
+                message = chunk[0] if len(chunk) == 1 else format_digest(chunk)
+            delivered_targets, queued = deliver_to_targets(
+                pending_targets, message, [item['entry_id'] for item in chunk_items], forward, feed,
+                f"合并推送 {len(chunk_items)} 条线报")
+            if delivered_targets:
+                delivered_count += len(chunk_items)
+                if queued:
+                    logger.info(f"已入队合并推送 {len(chunk_items)} 条线报 ({len(delivered_targets)}个群)",
+                                extra={'feed': feed})
+                    continue
+                for item in chunk_items:
+                    record_delivery(sent_entries, item['entry_id'], targets, pending_targets, delivered_targets)
+                logger.info(f"成功合并推送 {len(chunk_items)} 条线报 ({len(delivered_targets)}/{len(pending_targets)}个群)")
+            else:
+                logger.warning(f"合并推送失败: {len(chunk_items)} 条线报")
+    
+    return delivered_count
+
+class FeedJob:
+    """一个RSS源在本次处理中的状态（流水线 fetch_feed / filter 阶段的项目）"""
+
+    def __init__(self, run, config, targets, first_run, trace):
+        self.run = run
+        self.config = config
+        self.rss_url = config["rss_url"]
+        self.targets = targets
+        self.first_run = first_run
+        self.trace = trace
+        self.digest_settings = get_digest_settings(config)
+        self.entry_filter = get_entry_filter(config, targets)
+        self.entries = []
+        self.fetched = False
+        self.digest_items = []
+        self.mark = None  # 加载的高水位标记
+        self.scanned = None  # filter 阶段找出的新条目 [(entry, entry_id), ...]
+        self.skipped_ids = []  # 不处理的条目ID（首次启动保护、早于分界点）
+        self.max_published = None
+        self.catch_up_since = None  # 积压补发未完成时的积压起点（记入高水位标记）
+        self.feed_size = 0
+        self.new_count = 0
+        self.processed_count = 0
+        self.converted_count = 0
+        self.remaining = 0
+        self.lock = threading.Lock()
+
+class EntryJob:
+    """一条新线报在流水线中的状态（fetch_article 及之后各阶段的项目）"""
 
-        # 批量转链控制
+    def __init__(self, feed, index, entry, entry_id, pending_targets, trace, deal=None):
+        self.feed = feed
+        self.index = index  # 在RSS中的位置，合并推送时按原顺序排列
+        self.entry = entry
+        self.entry_id = entry_id
+        self.pending_targets = pending_targets
+        self.trace = trace
+        self.title = clean_html_tags(entry.title) if getattr(entry, 'title', None) else "无标题"
+        self.link = getattr(entry, 'link', '') or ''
+        # 结构化信息（价格、优惠券、平台、商品ID）：有价格规则时由 filter 阶段提取一次，之后各阶段直接使用，
+        # 同时写入追踪记录；没有价格规则时为None
+        self.deal = deal
+        self.raw_html = b""
+        self.message = ""
+        self.delivered_targets = []
+        self.queued = False  # 已交给推送队列（送达后由队列回调记录）
+
+class FeedRun:
+    """一次处理（一个或多个RSS源）共享的状态：已发送记录、转链设置、首次启动策略"""
+
+    def __init__(self, sent_entries, first_run_cutoff):
+        self.sent_entries = sent_entries
+        self.sent_lock = threading.Lock()  # 保护 sent_entries（record阶段和合并推送都会修改）
+        # 升级前的记录使用md5十六进制ID：只有存在旧记录时才计算旧ID并迁移
+        self.legacy_ids = has_legacy_entries(sent_entries)
+        self.first_run_cutoff = first_run_cutoff
+        self.trace_settings = load_settings('trace_settings', get_default_trace_settings)
+        self.catch_up_settings = load_settings('catch_up_settings', get_default_catch_up_settings)
+
+        full_config = get_config()
+        affiliate_config = full_config.get('affiliate_config', {})
+        self.affiliate_converter = None
+        if affiliate_config and any(affiliate_config.get(platform, {}).get('enabled', False)
+                                  for platform in ['dataoke', 'jingpinku', 'pdd']):
+            from src.core.affiliate_converter import get_affiliate_converter
+            self.affiliate_converter = get_affiliate_converter(full_config)  # 复用共享实例，返利配置变化时才重建
+            logger.info("返利转链功能已启用")
+
+        # 批量转链控制：每个RSS源每次处理最多转换 max_convert_per_batch 条线报
         batch_settings = affiliate_config.get('batch_settings', {}) if affiliate_config else {}
-        max_convert_per_batch = batch_settings.get('max_convert_per_batch', 5)
-        convert_enabled = batch_settings.get('convert_enabled', True)
-        
-        processed_count = 0
-        converted_count = 0
-        
+        self.max_convert_per_batch = batch_settings.get('max_convert_per_batch', 5)
+        self.convert_enabled = batch_settings.get('convert_enabled', True)
+
+def _stage_fetch_feed(job):
+    """fetch_feed 阶段：下载并解析RSS"""
+    with job.trace.span("parse_feed"):
+        job.entries = parse_feed(job.rss_url)
+    job.trace.set(entries=len(job.entries))
+    if not job.entries:
+        logger.warning(f"RSS源 '{job.rss_url}' 未返回任何内容，跳过处理", extra={'feed': job.rss_url})
+        return []
+    job.fetched = True
+    return [job]
+
+def _published_time(entry):
+    """条目的发布时间戳（RSS时间为UTC，统一用calendar.timegm转换），没有时返回None"""
+    published = getattr(entry, 'published_parsed', None)
+    return calendar.timegm(published) if published else None
+
+def scan_new_entries(entries, rss_url, mark, id_rules=None):
+    """按高水位标记找出新条目，返回 ([(entry, entry_id), ...], 跳过的条目ID列表)
+
+    RSS按时间降序排列：从第一条开始扫描，遇到第一条已处理过的条目（标记中的 ids）就停止，
+    每次只需计算新条目的ID。上次未处理完的条目（标记中的 pending）即使排在已处理条目之后也会继续找回。
+    标记中的条目一条都不在RSS中时（两次轮询之间新条目超过RSS长度，或RSS换了条目id），
+    改为按标记中的最大发布时间过滤，没有发布时间的条目交给去重记录判断。
+    """
+    seen = set(mark.get('ids', ()))
+    pending = set(mark.get('pending', ()))
+    remaining_pending = len(pending)
+    new_entries = []
+    reached_seen = False
+    for entry in entries:
+        entry_id = generate_entry_id(rss_url, entry, id_rules)
+        if entry_id in pending:
+            remaining_pending -= 1
+        elif entry_id in seen:
+            reached_seen = True
+            if remaining_pending <= 0:
+                break
+            continue
+        elif reached_seen:
+            # 已处理条目之后的未知条目：早于高水位的旧条目
+            continue
+        new_entries.append((entry, entry_id))
+
+    skipped_ids = []
+    max_published = mark.get('max_published')
+    if not reached_seen and seen and max_published:
+        kept = []
+        for entry, entry_id in new_entries:
+            published = _published_time(entry)
+            if published is not None and published <= max_published and entry_id not in pending:
+                skipped_ids.append(entry_id)
+            else:
+                kept.append((entry, entry_id))
+        new_entries = kept
+    return new_entries, skipped_ids
+
+def _stage_filter(job):
+    """filter 阶段：首次启动保护、高水位标记（或时间分界点）过滤、去重，拆分为每条新线报一个项目"""
+    rss_url = job.rss_url
+    entries = job.entries
+    id_rules = job.config.get("entry_id_rules")
+    mark = load_feed_mark(rss_url)
+    job.feed_size = len(entries)
+
+    if job.first_run:
+        # 首次启动：只处理最新10条，其余条目记入高水位标记，以后不再推送
+        candidates = [(entry, generate_entry_id(rss_url, entry, id_rules)) for entry in entries[:10]]
+        job.skipped_ids = [generate_entry_id(rss_url, entry, id_rules) for entry in entries[10:]]
+        logger.info(f"首次启动保护：RSS源 '{rss_url}' 只处理最新 {len(candidates)} 条")
+
+        # 记录时间分界点（高水位标记中的最大发布时间），RSS条目全部换新时只处理晚于分界点的线报
+        if job.run.first_run_cutoff == "newest_entry":
+            # RSS条目通常按时间降序排列，取第一条（最新的）的发布时间
+            job.max_published = _published_time(entries[0])
+        else:
+            # 使用当前时间作为分界点
+            job.max_published = int(time.time())
+        if job.max_published is not None:
+            beijing_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(job.max_published))
+            logger.info(f"设置时间分界点：{beijing_time} (北京时间)")
+    elif mark:
+        job.mark = mark
+        candidates, job.skipped_ids = scan_new_entries(entries, rss_url, mark, id_rules)
+        if candidates:
+            logger.info(f"高水位过滤：RSS源 '{rss_url}' 发现 {len(candidates)} 条新线报")
+        else:
+            logger.info(f"高水位过滤：RSS源 '{rss_url}' 没有新线报")
+    else:
+        # 升级前的状态没有高水位标记：只处理时间晚于分界点的条目，本次处理后建立标记
+        last_processed_time = load_last_processed_time(rss_url)
+        candidates = []
         for entry in entries:
-            if _stop_flag.is_set():
-                logger.info("收到停止信号，中断RSS条目处理")
-                return
-                
-            try:
-                entry_id = generate_entry_id(config["rss_url"], entry)
-                
-                if entry_id in sent_entries:
-                    continue
+            entry_id = generate_entry_id(rss_url, entry, id_rules)
+            published = _published_time(entry)
+            if last_processed_time and (published is None or published <= last_processed_time):
+                job.skipped_ids.append(entry_id)
+            else:
+                candidates.append((entry, entry_id))
+        job.max_published = last_processed_time
+        if last_processed_time:
+            if candidates:
+                logger.info(f"时间过滤：RSS源 '{rss_url}' 发现 {len(candidates)} 条新线报")
+            else:
+                logger.info(f"时间过滤：RSS源 '{rss_url}' 没有新线报")
+    job.entries = [entry for entry, _ in candidates]
+    job.scanned = candidates
 
-                clean_title = clean_html_tags(entry.title) if entry.title else "无标题"
-                link = getattr(entry, 'link', '') or ''
-                
-                webpage_content = ""
-                if link:
-                    webpage_content = fetch_webpage_content(link)
-                
-                message_content = ""
-                raw_content = ""
-                
-                if webpage_content:
-                    raw_content = webpage_content
-                else:
-                    raw_content = getattr(entry, 'summary', '') or getattr(entry, 'description', '')
-                
-                if raw_content:
-                    from src.utils.text_cleaner import advanced_text_cleanup
-                    message_content = advanced_text_cleanup(raw_content, clean_title, max_length=1200)
-                
-                if not message_content:
-                    message_content = clean_title
+    unsent = []
+    queued_targets = get_queued_targets()
+    # 结构化信息只在价格规则需要时提取
+    needs_deal = bool(job.entry_filter and job.entry_filter.needs_price)
+    for entry, entry_id in candidates:
+        # 去重机制：跳过已投递到所有QQ群的条目
+        with job.run.sent_lock:
+            pending_targets = get_pending_targets(entry_id, job.targets, job.run.sent_entries)
+            if pending_targets and job.run.legacy_ids and migrate_legacy_delivery(
+                    job.run.sent_entries, generate_legacy_entry_id(rss_url, entry), entry_id, job.targets):
+                pending_targets = get_pending_targets(entry_id, job.targets, job.run.sent_entries)
+        if queued_targets:
+            # 已在推送队列中等待发送的群不再重复入队
+            pending_targets = [t for t in pending_targets if (entry_id, t['group_id']) not in queued_targets]
+        if not pending_targets:
+            continue
+        deal = extract_entry_deal(entry) if needs_deal else None
+        if job.entry_filter:
+            # 关键词/价格规则：不符合RSS源规则的线报和不符合群规则的群在下载网页之前排除
+            pending_targets = job.entry_filter.allowed_targets(entry, pending_targets, deal)
+            if not pending_targets:
+                FEED_FILTERED_ENTRIES.inc(feed=rss_url)
+                job.skipped_ids.append(entry_id)
+                continue
+        unsent.append((_published_time(entry), (entry, entry_id, pending_targets, deal)))
 
-                should_convert = (convert_enabled and
-                                affiliate_converter and
-                                message_content and
-                                converted_count < max_convert_per_batch)
-                
-                if should_convert:
-                    try:
-                        urls = affiliate_converter._extract_urls(message_content)
-                        if urls:
-                            converted_content = affiliate_converter.convert_links(message_content)
-                            if converted_content != message_content:
-                                logger.info(f"成功转换返利链接 ({converted_count + 1}/{max_convert_per_batch}): {entry_id}")
-                                message_content = converted_content
-                                converted_count += 1
-                    except Exception as e:
-                        logger.error(f"返利转链处理失败: {e}")
-
-                if len(message_content) > 1500:
-                    message_content = message_content[:1500] + "..."
-                    logger.info(f"内容过长，已截断: {entry_id}")
-
-                if link:
-                    if message_content:
-                        message_content += f"\n\n📰 完整线报：{link}"
-                    else:
-                        message_content = f"📰 完整线报：{link}"
-
-                if message_content and send_group_message(config['llonebot_api_url'], config["group_id"], message_content):
-                    sent_entries.add(entry_id)
-                    processed_count += 1
-                    logger.info(f"成功推送: {clean_title[:50]}...")
-                else:
-                    logger.warning(f"推送失败: {clean_title[:50]}...")
-            
+    catch_up_settings = None if job.first_run else get_catch_up_settings(job.config, job.run.catch_up_settings)
+    if catch_up_settings:
+        # 积压补发：停机恢复后新线报过多时丢弃停机期间过期的，最新的优先，其余留到之后的轮询（记入高水位标记的 pending）
+        backlog_start = get_backlog_start(job.mark, get_poll_interval(job.config))
+        ready, deferred, dropped = plan_catch_up(unsent, catch_up_settings, backlog_start)
+        job.skipped_ids.extend(entry_id for _, entry_id, _, _ in dropped)
+        job.catch_up_since = backlog_start if deferred else None
+        if deferred or dropped:
+            logger.info(f"积压补发：RSS源 '{rss_url}' 积压 {len(unsent)} 条新线报，丢弃 {len(dropped)} 条过期线报，"
+                        f"本次推送 {len(ready)} 条，{len(deferred)} 条留到之后的轮询", extra={'feed': rss_url})
+    else:
+        ready = [item for _, item in unsent]
+    if job.skipped_ids:
+        # 被过滤或丢弃的条目按已处理记入高水位标记，不再作为未处理完的条目重试
+        skipped = set(job.skipped_ids)
+        job.scanned = [pair for pair in candidates if pair[1] not in skipped]
+
+    entry_jobs = []
+    for index, (entry, entry_id, pending_targets, deal) in enumerate(ready):
+        try:
+            FEED_NEW_ENTRIES.inc(feed=rss_url)
+            entry_trace = start_trace("entry", job.run.trace_settings, feed=rss_url, entry_id=entry_id)
+            entry_job = EntryJob(job, index, entry, entry_id, pending_targets, entry_trace, deal)
+            entry_trace.set(title=entry_job.title[:50], link=entry_job.link)
+            entry_jobs.append(entry_job)
+        except Exception as e:
+            logger.error(f"处理RSS条目 '{getattr(entry, 'title', 'N/A')}' 时出错: {e}", exc_info=True,
+                         extra={'feed': rss_url})
+
+    job.new_count = len(entry_jobs)
+    # 在交给下一阶段之前设置，保证最后一条线报结束时能识别出RSS源处理完成
+    job.remaining = len(entry_jobs)
+    return entry_jobs
+
+def _stage_fetch_article(item):
+    """fetch_article 阶段：下载线报网页（只下载原始字节，解析在 clean 阶段）"""
+    if item.link:
+        with item.trace.span("fetch_article"):
+            item.raw_html = download_webpage(item.link)
+    return [item]
+
+def _stage_clean(item):
+    """clean 阶段：提取网页正文并清理（没有网页内容时使用RSS摘要），清理后为空时使用标题
+
+    启用进程池（pipeline_settings.process_pool）时在工作进程中执行，只传递网页字节和清理后的文本
+    """
+    entry = item.entry
+    fallback = getattr(entry, 'summary', '') or getattr(entry, 'description', '')
+    raw_html, item.raw_html = item.raw_html, b""  # 网页原文不再需要，尽早释放
+    if raw_html or fallback:
+        with item.trace.span("cleanup"), CLEANUP_SECONDS.time():
+            item.message, parse_seconds = run_cpu_task(clean_article, raw_html, fallback, item.title, 1200)
+        if raw_html:
+            ARTICLE_PARSE_SECONDS.observe(parse_seconds)
+    if not item.message:
+        item.message = item.title
+    if item.deal is not None:
+        item.trace.set(deal={key: value for key, value in item.deal.items() if value is not None})
+    return [item]
+
+def _stage_convert(item):
+    """convert 阶段：返利转链、长度控制、追加原链接；合并推送模式下收集到RSS源的合并列表"""
+    job = item.feed
+    run = job.run
+    converter = run.affiliate_converter
+
+    if run.convert_enabled and converter and item.message:
+        # 先占用本次的转链名额，转链没有变化时归还，并发转链也不会超过上限
+        with job.lock:
+            reserved = job.converted_count < run.max_convert_per_batch
+            if reserved:
+                job.converted_count += 1
+        if reserved:
+            converted = False
+            try:
+                # 只有包含商品链接才进行转换
+                if converter._extract_urls(item.message):
+                    with item.trace.span("convert_links"):
+                        converted_content = converter.convert_links(item.message)
+                    if converted_content != item.message:
+                        item.message = converted_content
+                        converted = True
+                        logger.info(f"成功转换返利链接 ({job.converted_count}/{run.max_convert_per_batch}): {item.entry_id}",
+                                    extra={'feed': job.rss_url, 'entry_id': item.entry_id, 'stage': 'convert_links'})
             except Exception as e:
-                logger.error(f"处理RSS条目 '{getattr(entry, 'title', 'N/A')}' 时出错: {e}", exc_info=True)
-        
-        if processed_count > 0:
-            logger.info(f"RSS源 '{config['rss_url']}' 成功处理 {processed_count} 条新内容")
-            
-            if entries:
-                latest_entry = entries[0]
-                if hasattr(latest_entry, 'published_parsed') and latest_entry.published_parsed:
-                    import time
-                    import calendar
-                    new_cutoff_time = calendar.timegm(latest_entry.published_parsed)
-                    save_last_processed_time(config["rss_url"], new_cutoff_time)
-                    beijing_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(new_cutoff_time))
-                    logger.info(f"更新时间分界点：{beijing_time} (北京时间)")
-    
+                # 转链失败时保留原内容，不影响推送
+                logger.error(f"返利转链处理失败: {e}")
+            if not converted:
+                with job.lock:
+                    job.converted_count -= 1
+
+    # 长度控制：自动截断过长内容
+    if len(item.message) > 1500:
+        item.message = item.message[:1500] + "..."
+        logger.info(f"内容过长，已截断: {item.entry_id}")
+
+    # 推送策略：在消息末尾添加原链接
+    if item.link:
+        if item.message:
+            item.message += f"\n\n📰 完整线报：{item.link}"
+        else:
+            item.message = f"📰 完整线报：{item.link}"
+
+    if job.digest_settings and item.message:
+        # 合并推送：RSS源的所有线报处理完后统一推送，耗时记录在本次轮询的 deliver_digest 阶段
+        item.trace.set(digest=True)
+        with job.lock:
+            job.digest_items.append({
+                'index': item.index,
+                'entry_id': item.entry_id,
+                'title': item.title,
+                'message': item.message,
+                'pending_targets': item.pending_targets
+            })
+        return []
+    return [item]
+
+def _stage_push(item):
+    """push 阶段：内容只处理一次，并行投递到所有未投递的QQ群"""
+    if item.message:
+        with item.trace.span("deliver"):
+            item.delivered_targets, item.queued = deliver_to_targets(
+                item.pending_targets, item.message, [item.entry_id], feed=item.feed.rss_url, title=item.title)
+    item.trace.set(delivered=len(item.delivered_targets), targets=len(item.pending_targets))
+    return [item]
+
+def _stage_record(item):
+    """record 阶段：记录投递结果（单线程执行）"""
+    job = item.feed
+    log_extra = {'feed': job.rss_url, 'entry_id': item.entry_id, 'stage': 'deliver'}
+    if item.delivered_targets and item.queued:
+        # 入队不代表已送达：由推送队列发送成功后记录，未送达的条目保留在高水位标记的 pending 中
+        with job.lock:
+            job.processed_count += 1
+        logger.info(f"已入队: {item.title[:50]}... ({len(item.delivered_targets)}个群)", extra=log_extra)
+    elif item.delivered_targets:
+        with job.run.sent_lock:
+            record_delivery(job.run.sent_entries, item.entry_id, job.targets,
+                            item.pending_targets, item.delivered_targets)
+        with job.lock:
+            job.processed_count += 1
+        logger.info(f"成功推送: {item.title[:50]}... ({len(item.delivered_targets)}/{len(item.pending_targets)}个群)",
+                    extra=log_extra)
+    else:
+        logger.warning(f"推送失败: {item.title[:50]}...", extra=log_extra)
+    return []
+
+def _on_pipeline_error(stage_name, item, error):
+    if isinstance(item, EntryJob):
+        logger.error(f"处理RSS条目 '{item.title}' 时出错（{stage_name}）: {error}", exc_info=True,
+                     extra={'feed': item.feed.rss_url, 'entry_id': item.entry_id, 'stage': stage_name})
+        item.trace.set(error=str(error))
+    else:
+        logger.error(f"处理RSS源 '{item.rss_url}' 时发生严重错误（{stage_name}）: {error}", exc_info=True,
+                     extra={'feed': item.rss_url, 'stage': stage_name})
+
+def _on_pipeline_finish(item):
+    """项目离开流水线：线报结束时写入追踪记录，RSS源的所有线报都结束后完成该RSS源"""
+    if isinstance(item, EntryJob):
+        finish_trace(item.trace)
+        job = item.feed
+        with job.lock:
+            job.remaining -= 1
+            done = job.remaining == 0
+        if done:
+            _finish_feed(job)
+    else:
+        _finish_feed(item)
+
+def update_feed_mark(job):
+    """根据本次处理结果更新RSS源的高水位标记
+
+    已投递到所有群（或被跳过）的条目记入 ids，未处理完的条目记入 pending，下次轮询继续处理。
+    checked_at 为本次成功轮询的时间，下次轮询据此判断是否停机（见 src/core/catch_up.py）。
+    """
+    with job.run.sent_lock:
+        settled, pending = [], []
+        for _, entry_id in job.scanned:
+            if get_pending_targets(entry_id, job.targets, job.run.sent_entries):
+                pending.append(entry_id)
+            else:
+                settled.append(entry_id)
+    old_mark = job.mark or {}
+    ids = list(dict.fromkeys(settled + job.skipped_ids + old_mark.get('ids', [])))
+    # 保留的ID数量不少于RSS条目数，否则RSS中较旧的条目会被当成新条目
+    ids = ids[:max(FEED_MARK_SIZE, job.feed_size)]
+
+    published_times = [t for t in (_published_time(entry) for entry, _ in job.scanned) if t is not None]
+    max_published = max([t for t in [old_mark.get('max_published'), job.max_published] + published_times
+                         if t is not None], default=None)
+    save_feed_mark(job.rss_url, {'ids': ids, 'pending': pending, 'max_published': max_published,
+                                 'checked_at': int(time.time()), 'catch_up_since': job.catch_up_since})
+
+def _finish_feed(job):
+    """RSS源处理完成：合并推送，更新时间分界点"""
+    try:
+        if job.digest_items and not _stop_flag.is_set():
+            digest_items = sorted(job.digest_items, key=lambda item: item['index'])
+            with job.trace.span("deliver_digest"), job.run.sent_lock:
+                job.processed_count += deliver_digests(digest_items, job.targets, job.run.sent_entries,
+                                                       job.digest_settings, job.rss_url)
+
+        if job.processed_count > 0:
+            logger.info(f"RSS源 '{job.rss_url}' 成功处理 {job.processed_count} 条新内容")
+        if job.scanned is not None:
+            update_feed_mark(job)
     except Exception as e:
-        logger.error(f"处理RSS源 '{config.get('rss_url', 'N/A')}' 时发生严重错误: {e}", exc_info=True)
-    finally:
-        # 强制刷新日志，确保所有日志都写入磁盘
-        for handler in logger.handlers:
-            handler.flush()
-    
+        logger.error(f"处理RSS源 '{job.rss_url}' 时发生严重错误: {e}", exc_info=True, extra={'feed': job.rss_url})
+
+def build_feed_pipeline():
+    """按 pipeline_settings 创建处理流水线
+
+    fetch_feed → filter → fetch_article → clean → convert → push → record，
+    各阶段的工作线程数见 pipeline_settings.workers，record 阶段固定为单线程
+    """
+    settings = load_settings('pipeline_settings', get_default_pipeline_settings)
+    workers = settings.get('workers', {})
+    stages = [
+        Stage("fetch_feed", _stage_fetch_feed, workers.get("fetch_feed", 1)),
+        Stage("filter", _stage_filter, workers.get("filter", 1)),
+        Stage("fetch_article", _stage_fetch_article, workers.get("fetch_article", 1)),
+        Stage("clean", _stage_clean, workers.get("clean", 1)),
+        Stage("convert", _stage_convert, workers.get("convert", 1)),
+        Stage("push", _stage_push, workers.get("push", 1)),
+        Stage("record", _stage_record, 1),
+    ]
+    return Pipeline(stages, queue_size=settings.get('queue_size', 50), on_finish=_on_pipeline_finish,
+                    on_error=_on_pipeline_error, stop_event=_stop_flag, name="feed")
+
+def start_feed_pipeline():
+    """启动共用的处理流水线：各阶段的并发数在所有定时任务之间共享，不随同时执行的任务数增加"""
+    global feed_pipeline
+    if feed_pipeline is None:
+        feed_pipeline = build_feed_pipeline()
+        feed_pipeline.start()
+
+def stop_feed_pipeline():
+    """停止共用的处理流水线（调用方需保证没有正在执行的轮询）"""
+    global feed_pipeline
+    if feed_pipeline is not None:
+        feed_pipeline.stop()
+        feed_pipeline = None
+
+def run_feed_pipeline(configs, sent_entries, first_run=None, first_run_cutoff="now", traces=None):
+    """用处理流水线处理一组RSS源
+
+    Args:
+        configs: RSS源配置列表
+        sent_entries: 已发送记录（处理过程中更新，由调用方保存）
+        first_run: 首次启动保护。None表示按每个RSS源各自的首次运行状态判断，True/False表示所有RSS源统一使用
+        first_run_cutoff: 首次启动时的时间分界点，"now"为当前时间，"newest_entry"为最新一条线报的发布时间
+        traces: {rss_url: Trace}，记录各RSS源本次轮询的阶段耗时
+    Returns:
+        每个有推送目标的RSS源的 FeedJob（含 new_count、processed_count 等统计）
+    """
+    run = FeedRun(sent_entries, first_run_cutoff)
+    traces = traces or {}
+    jobs = []
+    for config in configs:
+        targets = get_push_targets(config)
+        if not targets:
+            logger.warning(f"RSS源 '{config['rss_url']}' 未配置推送目标QQ群，跳过处理")
+            continue
+        feed_first_run = is_first_run(config["rss_url"]) if first_run is None else first_run
+        if feed_first_run and first_run is None:
+            logger.info(f"RSS源 '{config['rss_url']}' 首次启动，启用保护机制 - 只处理最新10条")
+        jobs.append(FeedJob(run, config, targets, feed_first_run, traces.get(config["rss_url"], NULL_TRACE)))
+
+    if jobs:
+        # 调度器未运行时（单次处理）临时创建流水线
+        (feed_pipeline or build_feed_pipeline()).run(jobs)
+    return jobs
+
+def process_single_rss_source(rss_url, trace=NULL_TRACE):
+    """处理单个RSS源的函数 - 每个定时任务独立调用
+
+    Args:
+        rss_url: RSS源URL
+        trace: 本次轮询的追踪记录（见 src/core/tracing.py），记录各阶段耗时
+    Returns:
+        本次发现的新条目数量（供自适应调度使用）
+    """
+    # 检查停止标志
+    if _stop_flag.is_set():
+        logger.info("收到停止信号，跳过RSS处理")
+        return 0
+
+    # 从配置缓存中查找对应的RSS源（配置文件未修改时不会重新解析）
+    config = get_rss_config(rss_url)
+
+    if not config:
+        logger.warning(f"未找到RSS源配置: {rss_url}")
+        return 0
+
+    with trace.span("load_state"):
+        sent_entries = load_sent_entries()
+        loaded_entries = set(sent_entries)
+
+    jobs = run_feed_pipeline([config], sent_entries, traces={rss_url: trace})
+    # 没有推送目标或RSS源未返回内容时不保存状态，首次启动保护留到下一次
+    if not jobs or not jobs[0].fetched:
+        return 0
+    job = jobs[0]
+
     # 保存系统状态并标记该RSS源首次运行完成
     try:
-        if first_run:
-            mark_first_run_completed(rss_url)
-        
-        state = load_system_state()
-        save_system_state(
-            sent_entries,
-            state["first_run_completed"],
-            state["last_processed_time"],
-            state["first_run_status"]
-        )
+        with trace.span("save_state"):
+            if job.first_run:
+                mark_first_run_completed(rss_url)
+
+            # 只合并本次对已发送记录的修改，高水位标记已由 record 阶段单独保存
+            commit_sent_entries(loaded_entries, sent_entries)
     except Exception as e:
         logger.error(f"保存系统状态失败: {e}", exc_info=True)
 
+    return job.new_count
+
 def process_and_send():
-    """处理RSS并发送消息的主函数"""
+    """一次性处理所有RSS源（首次启动保护按全局状态判断，分界点取最新线报的发布时间）"""
     # 检查停止标志
     if _stop_flag.is_set():
         logger.info("收到停止信号，跳过RSS处理")
         return
-        
-    configs = load_rss_configs()
+
+    configs = owned_rss_configs(load_rss_configs())
     if not configs:
         logger.info("没有配置的RSS源，跳过处理")
         return
 
-    # 加载完整配置（AffiliateConverter需要完整配置）
-    from src.core.config_manager import load_config
-    full_config = load_config()
-    affiliate_config = full_config.get('affiliate_config', {})
-    
-    affiliate_converter = None
-    if affiliate_config and any(affiliate_config.get(platform, {}).get('enabled', False)
-                              for platform in ['dataoke', 'jingpinku', 'pdd']):
-        affiliate_converter = AffiliateConverter(full_config)  # 传递完整配置
-        logger.info("返利转链功能已启用")
-    else:
-        logger.info("返利转链功能未配置，将使用原始链接")
-
     sent_entries = load_sent_entries()
+    loaded_entries = set(sent_entries)
     first_run = is_first_run()
-    
+
     if first_run:
         logger.info("首次启动，启用保护机制 - 只处理最新10条")
-    
-    for config in configs:
-        try:
-            entries = parse_feed(config["rss_url"])
-            if not entries:
-                logger.warning(f"RSS源 '{config['rss_url']}' 未返回任何内容，跳过处理")
-                continue
 
-            # 获取最后处理时间
-            last_processed_time = load_last_processed_time(config["rss_url"])
-            
-            if first_run:
-                # 首次启动：只处理最新10条
-                entries = entries[:10]
-                logger.info(f"首次启动保护：RSS源 '{config['rss_url']}' 只处理最新 {len(entries)} 条")
-                
-                # 记录首次启动处理的第一条线报时间作为分界点
-                if entries:
-                    # RSS条目通常按时间降序排列，取第一条（最新的）作为时间分界点
-                    # 后续运行只处理时间晚于这个分界点的新线报
-                    first_entry = entries[0]
-                    if hasattr(first_entry, 'published_parsed') and first_entry.published_parsed:
-                        import time
-                        import calendar
-                        # 正确处理时区：RSS时间通常是UTC，需要转换为本地时间戳
-                        cutoff_time = calendar.timegm(first_entry.published_parsed)
-                        save_last_processed_time(config["rss_url"], cutoff_time)
-                        # 显示北京时间
-                        beijing_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(cutoff_time))
-                        logger.info(f"设置时间分界点：{beijing_time} (北京时间)")
-            else:
-                # 非首次启动：只处理时间晚于分界点的条目
-                if last_processed_time:
-                    import time as time_module
-                    import calendar
-                    filtered_entries = []
-                    for entry in entries:
-                        if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                            # 统一使用calendar.timegm处理RSS时间（UTC转时间戳）
-                            entry_time = calendar.timegm(entry.published_parsed)
-                            if entry_time > last_processed_time:
-                                filtered_entries.append(entry)
-                    
-                    entries = filtered_entries
-                    if entries:
-                        logger.info(f"时间过滤：RSS源 '{config['rss_url']}' 发现 {len(entries)} 条新线报")
-                    else:
-                        logger.info(f"时间过滤：RSS源 '{config['rss_url']}' 没有新线报")
-                        continue
-
-            # 批量转链控制
-            batch_settings = affiliate_config.get('batch_settings', {}) if affiliate_config else {}
-            max_convert_per_batch = batch_settings.get('max_convert_per_batch', 5)
-            convert_enabled = batch_settings.get('convert_enabled', True)
-            
-            processed_count = 0
-            converted_count = 0  # 当前批次已转链数量
-            
-            for entry in entries:
-                # 在循环中检查停止标志
-                if _stop_flag.is_set():
-                    logger.info("收到停止信号，中断RSS条目处理")
-                    return
-                    
-                try:
-                    entry_id = generate_entry_id(config["rss_url"], entry)
-                    
-                    # 去重机制：跳过已发送的条目
-                    if entry_id in sent_entries:
-                        continue
-
-                    clean_title = clean_html_tags(entry.title) if entry.title else "无标题"
-                    link = getattr(entry, 'link', '') or ''
-                    
-                    # 获取网页内容
-                    webpage_content = ""
-                    if link:
-                        webpage_content = fetch_webpage_content(link)
-                    
-                    # 内容处理策略：使用高级清理功能
-                    message_content = ""
-                    raw_content = ""
-                    
-                    if webpage_content:
-                        raw_content = webpage_content
-                    else:
-                        # 如果没有网页内容，使用RSS摘要
-                        raw_content = getattr(entry, 'summary', '') or getattr(entry, 'description', '')
-                    
-                    if raw_content:
-                        # 使用高级文本清理功能
-                        from src.utils.text_cleaner import advanced_text_cleanup
-                        message_content = advanced_text_cleanup(raw_content, clean_title, max_length=1200)
-                    
-                    # 如果清理后内容为空，使用标题
-                    if not message_content:
-                        message_content = clean_title
-
-                    # 批量返利转链处理：控制每批转链数量
-                    should_convert = (convert_enabled and
-                                    affiliate_converter and
-                                    message_content and
-                                    converted_count < max_convert_per_batch)
-                    
-                    if should_convert:
-                        try:
-                            # 检查是否包含可转换的商品链接
-                            urls = affiliate_converter._extract_urls(message_content)
-                            if urls:  # 只有包含商品链接才进行转换
-                                converted_content = affiliate_converter.convert_links(message_content)
-                                if converted_content != message_content:
-                                    logger.info(f"成功转换返利链接 ({converted_count + 1}/{max_convert_per_batch}): {entry_id}")
-                                    message_content = converted_content
-                                    converted_count += 1
-                        except Exception as e:
-                            logger.error(f"返利转链处理失败: {e}")
-                            # 转链失败时保留原内容，不影响推送
-
-                    # 长度控制：自动截断过长内容
-                    if len(message_content) > 1500:
-                        message_content = message_content[:1500] + "..."
-                        logger.info(f"内容过长，已截断: {entry_id}")
-
-                    # 推送策略：在消息末尾添加原链接
-                    if link:
-                        if message_content:
-                            message_content += f"\n\n📰 完整线报：{link}"
-                        else:
-                            message_content = f"📰 完整线报：{link}"
-
-                    # 发送消息
-                    if message_content and send_group_message(config['llonebot_api_url'], config["group_id"], message_content):
-                        sent_entries.add(entry_id)
-                        processed_count += 1
-                        logger.info(f"成功推送: {clean_title[:50]}...")
-                    else:
-                        logger.warning(f"推送失败: {clean_title[:50]}...")
-                
-                except Exception as e:
-                    logger.error(f"处理RSS条目 '{getattr(entry, 'title', 'N/A')}' 时出错: {e}", exc_info=True)
-            
-            # 更新时间分界点：处理完成后，将最新条目的时间设为新的分界点
-            if processed_count > 0:
-                logger.info(f"RSS源 '{config['rss_url']}' 成功处理 {processed_count} 条新内容")
-                
-                # 更新时间分界点到最新处理的条目
-                if entries:
-                    # 取第一条条目（最新的）作为新的时间分界点
-                    latest_entry = entries[0]
-                    if hasattr(latest_entry, 'published_parsed') and latest_entry.published_parsed:
-                        import time
-                        import calendar
-                        # 正确处理时区：RSS时间通常是UTC，需要转换为本地时间戳
-                        new_cutoff_time = calendar.timegm(latest_entry.published_parsed)
-                        save_last_processed_time(config["rss_url"], new_cutoff_time)
-                        # 显示北京时间
-                        beijing_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(new_cutoff_time))
-                        logger.info(f"更新时间分界点：{beijing_time} (北京时间)")
-        
-        except Exception as e:
-            logger.error(f"处理RSS源 '{config.get('rss_url', 'N/A')}' 时发生严重错误: {e}", exc_info=True)
-    
-    # 保存系统状态（包括已发送记录、首次运行标记等）
-    state = load_system_state()
-    save_system_state(
-        sent_entries,
-        True if first_run else state["first_run_completed"],
-        state["last_processed_time"]
-    )
-    
+    run_feed_pipeline(configs, sent_entries, first_run=first_run, first_run_cutoff="newest_entry")
+
+    # 保存系统状态（已发送记录的修改、首次运行标记）
+    commit_sent_entries(loaded_entries, sent_entries, first_run_completed=first_run)
+
     # 标记首次运行完成
     if first_run:
         logger.info("首次启动保护机制已完成")
 
+def get_poll_interval(config):
+    """RSS源的轮询间隔（秒），自适应调度时取间隔上限"""
+    interval = config.get("interval", 60)
+    adaptive_settings = get_adaptive_settings(config, load_settings('scheduler_settings', get_default_scheduler_settings))
+    if adaptive_settings:
+        interval = max(interval, adaptive_settings.get("max_interval", interval))
+    return interval * 60
+
+def get_adaptive_settings(config, scheduler_settings):
+    """获取RSS源的自适应调度参数，固定间隔模式返回None
+    
+    RSS源配置中的 schedule_mode / min_interval / max_interval 优先于全局 scheduler_settings
+    """
+    mode = config.get("schedule_mode", scheduler_settings.get("mode", "fixed"))
+    if mode != "adaptive":
+        return None
+    
+    settings = dict(scheduler_settings.get("adaptive", {}))
+    for key in ("min_interval", "max_interval"):
+        if key in config:
+            settings[key] = config[key]
+    return settings
+
+def compute_stagger_offsets(intervals):
+    """计算错峰启动偏移（秒）
+    
+    相同间隔的任务在一个间隔内均匀分布：第i个（共n个）任务在 (i+1)/n 个间隔后首次执行，
+    最晚的任务与原来一样在一个完整间隔后执行。
+    
+    Args:
+        intervals: 每个任务的间隔（秒）列表
+    Returns:
+        与intervals顺序一致的首次执行偏移（秒）列表
+    """
+    groups = {}
+    for index, interval in enumerate(intervals):
+        groups.setdefault(interval, []).append(index)
+    
+    offsets = [0.0] * len(intervals)
+    for interval, indexes in groups.items():
+        count = len(indexes)
+        for position, index in enumerate(indexes):
+            offsets[index] = interval * (position + 1) / count
+    return offsets
+
+def get_job_id(rss_url):
+    """RSS源定时任务的稳定ID（不依赖每个进程随机加盐的hash()）"""
+    return "rss_" + hashlib.sha1(rss_url.encode('utf-8')).hexdigest()[:16]
+
+def run_rss_job(rss_url):
+    """RSS源定时任务入口：处理RSS源，自适应模式下根据结果调整下一次执行时间"""
+    new_count = 0
+    trace = start_trace("tick", load_settings('trace_settings', get_default_trace_settings), feed=rss_url)
+    start = time.perf_counter()
+    try:
+        with FEED_TICK_SECONDS.time(feed=rss_url):
+            new_count = process_single_rss_source(rss_url, trace)
+    except Exception as e:
+        logger.error(f"定时任务执行失败 [{rss_url}]: {e}", exc_info=True, extra={'feed': rss_url, 'stage': 'tick'})
+        trace.set(error=str(e))
+    finally:
+        trace.set(new_count=new_count)
+        finish_trace(trace)
+    duration = time.perf_counter() - start
+    logger.info(f"RSS源 '{rss_url}' 本次轮询完成：新线报 {new_count} 条，耗时 {duration:.2f}秒",
+                extra={'feed': rss_url, 'stage': 'tick', 'duration_ms': round(duration * 1000, 1)})
+    
+    job_id = get_job_id(rss_url)
+    spec = _job_specs.get(job_id)
+    if spec and spec["adaptive"] and not _stop_flag.is_set():
+        next_interval = adaptive_tracker.record_poll(rss_url, new_count, spec["interval"], spec["adaptive"])
+        try:
+            scheduler.reschedule_job(job_id, trigger='interval', seconds=int(next_interval * 60),
+                                     jitter=spec["jitter"])
+            logger.info(f"自适应调度：RSS源 '{rss_url}' 新线报 {new_count} 条，下次间隔 {next_interval:.1f}分钟")
+        except Exception as e:
+            logger.warning(f"自适应调度更新失败 [{rss_url}]: {e}")
+
 def update_scheduler(scheduler_instance, configs):
-    """更新调度器 - 每个RSS源独立任务"""
-    if scheduler_instance:
-        scheduler_instance.remove_all_jobs()
-        for config in configs:
-            interval = config.get("interval", 60)
-            rss_url = config['rss_url']
-            job_id = f"rss_{hash(rss_url)}"
-            
-            # 包装处理函数，添加异常保护和日志刷新
-            def wrapped_process(url=rss_url):
-                try:
-                    process_single_rss_source(url)
-                except Exception as e:
-                    logger.error(f"定时任务执行失败 [{url}]: {e}", exc_info=True)
-                finally:
-                    # 确保日志写入磁盘
-                    for handler in logger.handlers:
-                        handler.flush()
-            
-            # 为每个RSS源创建独立的处理函数
+    """更新调度器 - 每个RSS源独立任务
+    
+    增量同步：只添加新增的RSS源、移除已删除的RSS源、重新调度间隔设置有变化的RSS源，
+    未变化的任务保持原有的执行时间和自适应统计。
+    """
+    if not scheduler_instance:
+        return
+    
+    scheduler_settings = load_settings('scheduler_settings', get_default_scheduler_settings)
+    jitter_seconds = int(scheduler_settings.get("jitter_seconds", 0)) or None
+    
+    desired = {}
+    for config in configs:
+        adaptive_settings = get_adaptive_settings(config, scheduler_settings)
+        signature = (config.get("interval", 60), adaptive_settings, jitter_seconds)
+        desired[get_job_id(config['rss_url'])] = (config, adaptive_settings, signature)
+    
+    existing = {job.id: job for job in scheduler_instance.get_jobs() if job.id.startswith("rss_")}
+    
+    # 移除已删除的RSS源（只处理RSS任务，保留日志维护、配置监控等系统任务）
+    for job_id, job in existing.items():
+        if job_id not in desired:
+            job.remove()
+            spec = _job_specs.pop(job_id, None)
+            logger.info(f"已移除定时任务: {spec['rss_url'] if spec else job_id}")
+    
+    # 错峰偏移按全部RSS源计算，只用于新增的任务
+    base_seconds = [int(config.get("interval", 60) * 60) for config, _, _ in desired.values()]
+    if scheduler_settings.get("stagger", True):
+        offsets = compute_stagger_offsets(base_seconds)
+    else:
+        offsets = base_seconds
+    now = datetime.datetime.now().astimezone()
+    
+    for (job_id, (config, adaptive_settings, signature)), offset in zip(desired.items(), offsets):
+        rss_url = config['rss_url']
+        old_spec = _job_specs.get(job_id)
+        if job_id in existing and old_spec and old_spec["signature"] == signature:
+            continue
+        
+        interval = config.get("interval", 60)
+        if adaptive_settings:
+            interval = adaptive_tracker.initial_interval(rss_url, interval, adaptive_settings)
+        seconds = int(interval * 60)
+        _job_specs[job_id] = {
+            "rss_url": rss_url,
+            "interval": interval,
+            "adaptive": adaptive_settings,
+            "jitter": jitter_seconds,
+            "signature": signature
+        }
+        mode_text = "自适应" if adaptive_settings else "固定"
+        
+        if job_id in existing:
+            # 间隔变化：保持原来的执行节奏，下一次执行不晚于新的间隔
+            start_date = now + datetime.timedelta(seconds=seconds)
+            next_run_time = getattr(existing[job_id], "next_run_time", None)
+            if next_run_time and next_run_time < start_date:
+                start_date = next_run_time
+            existing[job_id].reschedule('interval', seconds=seconds, start_date=start_date, jitter=jitter_seconds)
+            logger.info(f"已更新定时任务: {rss_url} (间隔: {interval}分钟, {mode_text})")
+        else:
+            # 为每个RSS源创建独立的定时任务
             scheduler_instance.add_job(
-                wrapped_process,
+                run_rss_job,
                 'interval',
-                minutes=interval,
+                args=[rss_url],
+                seconds=seconds,
+                start_date=now + datetime.timedelta(seconds=offset),
+                jitter=jitter_seconds,
                 id=job_id,
                 replace_existing=True
             )
-            logger.info(f"已添加独立定时任务: {rss_url} (间隔: {interval}分钟)")
+            logger.info(f"已添加独立定时任务: {rss_url} (间隔: {interval}分钟, {mode_text}, 首次执行: {offset / 60:.1f}分钟后)")
 
 def cleanup_old_logs(log_dir="logs", max_total_size_mb=300):
     """清理旧的日志文件，保持总大小在限制范围内
@@ -616,7 +1228,7 @@ def cleanup_old_logs(log_dir="logs", max_total_size_mb=300):
         # 获取所有日志文件（包括轮转的备份文件）
         log_files = []
         for file in os.listdir(log_dir):
-            if file.startswith('rss_qq_app.log'):
+            if file.startswith(('rss_qq_app.log', 'rss_qq_app.jsonl')):
                 file_path = os.path.join(log_dir, file)
                 if os.path.isfile(file_path):
                     # 获取文件大小和修改时间
@@ -672,31 +1284,49 @@ def cleanup_old_logs(log_dir="logs", max_total_size_mb=300):
     except Exception as e:
         logger.error(f"日志清理失败: {e}", exc_info=True)
 
-def log_flush_task():
-    """定期刷新日志的任务"""
-    try:
-        for handler in logger.handlers:
-            handler.flush()
-        logger.debug("日志已刷新到磁盘")
-    except Exception as e:
-        logger.error(f"日志刷新失败: {e}")
-
 def log_maintenance_task():
-    """日志维护任务：刷新日志并清理旧文件"""
+    """日志维护任务：清理旧日志文件"""
     try:
-        # 刷新日志
-        for handler in logger.handlers:
-            handler.flush()
-        
         # 清理旧日志（保持总大小在300MB以内）
         cleanup_old_logs(log_dir="logs", max_total_size_mb=300)
         
     except Exception as e:
         logger.error(f"日志维护任务失败: {e}", exc_info=True)
 
+def config_watch_task():
+    """配置监控任务：配置文件被外部修改时重新加载并通知订阅者"""
+    try:
+        check_config_changes()
+    except Exception as e:
+        logger.error(f"配置监控任务失败: {e}", exc_info=True)
+
+# 上一次应用到调度器的配置快照，用于判断配置变更是否影响定时任务
+_applied_schedule = None
+
+def on_config_changed(config):
+    """配置变更回调：RSS源或调度设置变化时更新定时任务"""
+    global _applied_schedule
+    
+    if _stop_flag.is_set():
+        return
+    
+    schedule_snapshot = (config.get("rss_sources", []), config.get("scheduler_settings", {}))
+    # 停止调度器时会持有锁并等待任务结束，这里限时等待避免互相阻塞
+    if not scheduler_lock.acquire(timeout=5):
+        logger.warning("调度器正在启动或停止，跳过本次定时任务更新")
+        return
+    try:
+        if not (scheduler and scheduler.running) or schedule_snapshot == _applied_schedule:
+            return
+        update_scheduler(scheduler, owned_rss_configs(config.get("rss_sources", [])))
+        _applied_schedule = copy.deepcopy(schedule_snapshot)
+    finally:
+        scheduler_lock.release()
+    logger.info("检测到配置变更，已更新定时任务")
+
 def start_scheduler():
     """启动调度器"""
-    global scheduler
+    global scheduler, push_queue, _applied_schedule
     
     with scheduler_lock:
         # 检查是否已有调度器在运行
@@ -707,42 +1337,100 @@ def start_scheduler():
         # 清除停止标志
         _stop_flag.clear()
         
-        configs = load_rss_configs()
-        if configs:
-            # 创建新的调度器实例
-            scheduler = BackgroundScheduler()
-            
-            # 添加RSS处理任务
-            update_scheduler(scheduler, configs)
-            
-            # 添加日志维护任务（每30分钟执行一次：刷新+清理）
-            scheduler.add_job(
-                log_maintenance_task,
-                'interval',
-                minutes=30,
-                id='log_maintenance',
-                replace_existing=True
+        configs = owned_rss_configs(load_rss_configs())
+        # 创建新的调度器实例，线程池大小即同时执行的定时任务上限
+        scheduler_settings = load_settings('scheduler_settings', get_default_scheduler_settings)
+        max_concurrent_ticks = max(int(scheduler_settings.get("max_concurrent_ticks", 4)), 1)
+        from apscheduler.schedulers.background import BackgroundScheduler
+        from apscheduler.executors.pool import ThreadPoolExecutor
+        scheduler = BackgroundScheduler(executors={'default': ThreadPoolExecutor(max_concurrent_ticks)})
+        
+        # 启动推送队列，处理流程只负责入队
+        push_settings = load_settings('push_settings', get_default_push_settings)
+        if push_settings.get("queue_enabled", True):
+            push_queue = PushQueue(push_settings, on_delivered=on_queue_delivered,
+                                   on_dead_letter=on_queue_dead_letter)
+            push_queue.start()
+            queue = push_queue
+            PUSH_QUEUE_DEPTH.set_callback(
+                lambda: [({'group': group_id}, count) for group_id, count in queue.depth().items()]
             )
-            
-            scheduler.start()
-            logger.info("RSS监控调度器已启动，将按配置的间隔时间执行定时推送")
-            logger.info("日志维护任务已启动，每30分钟执行一次（刷新+清理）")
-        else:
-            logger.info("没有配置RSS源，调度器未启动")
+            logger.info(f"推送队列已启用（每个QQ群每秒最多 {push_settings.get('messages_per_second')} 条）")
+        
+        # 网页解析进程池（可选）：正文提取和文本清理不占用调度线程的GIL
+        process_pool = load_settings('pipeline_settings', get_default_pipeline_settings).get("process_pool", {})
+        if process_pool.get("enabled", False):
+            start_cpu_pool(process_pool.get("workers", 0))
+        # 处理流水线：各阶段的工作线程由所有定时任务共用
+        start_feed_pipeline()
+        
+        # 启动指标服务（Prometheus文本格式）
+        metrics_settings = load_settings('metrics_settings', get_default_metrics_settings)
+        if metrics_settings.get("enabled", True):
+            port = int(metrics_settings.get("port", 9108))
+            if _shard is not None:
+                port += _shard[0] + 1  # 每个分片进程使用 port+1+分片编号
+            try:
+                start_metrics_server(metrics_settings.get("host", "127.0.0.1"), port)
+            except Exception as e:
+                logger.error(f"指标服务启动失败: {e}")
+        
+        # 添加RSS处理任务
+        update_scheduler(scheduler, configs)
+        full_config = get_config()
+        _applied_schedule = copy.deepcopy(
+            (full_config.get("rss_sources", []), full_config.get("scheduler_settings", {}))
+        )
+        
+        # 配置变更时自动更新定时任务（界面保存立即生效，手动修改文件由监控任务发现）
+        subscribe(on_config_changed)
+        scheduler.add_job(
+            config_watch_task,
+            'interval',
+            seconds=5,
+            id='config_watch',
+            replace_existing=True
+        )
+        
+        # 推送队列确认的发送结果每5秒批量写入状态
+        scheduler.add_job(
+            delivery_ack_task,
+            'interval',
+            seconds=5,
+            id='delivery_ack',
+            replace_existing=True
+        )
+        
+        # 添加日志维护任务（每30分钟清理一次旧日志）
+        scheduler.add_job(
+            log_maintenance_task,
+            'interval',
+            minutes=30,
+            id='log_maintenance',
+            replace_existing=True
+        )
+        
+        scheduler.start()
+        logger.info("RSS监控调度器已启动，将按配置的间隔时间执行定时推送")
+        logger.info("日志维护任务已启动，每30分钟清理一次旧日志")
+        if not configs:
+            logger.info("当前没有配置RSS源，添加订阅后将自动开始监控")
 
 def stop_scheduler():
     """停止调度器"""
-    global scheduler
+    global scheduler, push_queue
     
     # 设置停止标志
     _stop_flag.set()
     logger.info("已设置停止标志")
+    unsubscribe(on_config_changed)
     
     with scheduler_lock:
         if scheduler and scheduler.running:
             try:
                 # 强制停止所有任务
                 scheduler.remove_all_jobs()
+                _job_specs.clear()
                 logger.info("已移除所有调度任务")
                 
                 # 等待调度器完全停止
@@ -755,15 +1443,28 @@ def stop_scheduler():
                 logger.error(f"停止调度器时出错: {e}", exc_info=True)
                 # 强制设置为None
                 scheduler = None
-            finally:
-                # 确保日志写入
-                for handler in logger.handlers:
-                    handler.flush()
         else:
             logger.info("调度器未在运行")
+        
+        # 停止推送队列，未发送的消息保留到下次启动
+        if push_queue is not None:
+            push_queue.stop()
+            flush_delivery_acks()
+            pending = push_queue.pending_count()
+            push_queue = None
+            PUSH_QUEUE_DEPTH.set_callback(None)
+            logger.info(f"推送队列已停止，剩余待发送 {pending} 条")
+        
+        stop_feed_pipeline()
+        stop_cpu_pool()
+        stop_metrics_server()
 
 def main():
     """主函数 - 启动GUI应用"""
+    # 只在GUI模式下导入Qt，无界面模式（daemon.py）导入本模块时不加载PyQt6
+    from PyQt6.QtWidgets import QApplication
+    from src.gui.main_window import MainWindow
+    
     app = QApplication(sys.argv)
     
     # 设置应用信息
@@ -779,4 +1480,7 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # 打包为EXE时，网页解析进程池的工作进程需要由这里接管启动
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
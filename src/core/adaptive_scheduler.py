@@ -0,0 +1,100 @@
+# src/core/adaptive_scheduler.py - 自适应轮询间隔计算
+import random
+import threading
+import logging
+
+# EWMA平滑系数：越大越偏向最近几次轮询的结果
+EWMA_ALPHA = 0.3
+
+class AdaptiveIntervalTracker:
+    """根据每个RSS源的新线报到达率和空轮询比例，自动计算下一次轮询间隔
+
+    - 发现新线报：间隔按speedup_factor缩短，并且不超过按到达率估算的"每条线报一次轮询"的间隔
+    - 没有新线报：间隔按空轮询比例逐步放大，最多乘以slowdown_factor
+    - 结果限制在[min_interval, max_interval]内，并加入随机抖动，避免多个源同时触发
+    所有间隔单位均为分钟。
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def initial_interval(self, rss_url, base_interval, settings):
+        """计算RSS源的初始间隔（配置的interval限制在上下限之内）"""
+        min_interval, max_interval = self._bounds(settings)
+        interval = min(max(float(base_interval), min_interval), max_interval)
+        with self._lock:
+            stats = self._stats.setdefault(rss_url, self._new_stats(interval))
+            stats['interval'] = interval
+        return interval
+
+    def record_poll(self, rss_url, new_count, base_interval, settings):
+        """记录一次轮询结果并返回下一次的轮询间隔（分钟）
+
+        Args:
+            rss_url: RSS源URL
+            new_count: 本次轮询发现的新条目数（获取失败或无内容按0处理）
+            base_interval: RSS源配置的interval，作为首次统计的起点
+            settings: 合并后的自适应参数（见get_default_scheduler_settings）
+        """
+        min_interval, max_interval = self._bounds(settings)
+        speedup = float(settings.get('speedup_factor', 0.5))
+        slowdown = float(settings.get('slowdown_factor', 1.5))
+        jitter = float(settings.get('jitter', 0.1))
+        new_count = new_count or 0
+
+        with self._lock:
+            stats = self._stats.setdefault(rss_url, self._new_stats(float(base_interval)))
+            used_interval = stats['interval']
+
+            # 更新到达率（条/分钟）和空轮询比例
+            rate_sample = new_count / used_interval if used_interval > 0 else 0.0
+            stats['rate'] = EWMA_ALPHA * rate_sample + (1 - EWMA_ALPHA) * stats['rate']
+            empty_sample = 0.0 if new_count > 0 else 1.0
+            stats['empty_ratio'] = EWMA_ALPHA * empty_sample + (1 - EWMA_ALPHA) * stats['empty_ratio']
+            stats['polls'] += 1
+
+            if new_count > 0:
+                interval = used_interval * speedup
+                if stats['rate'] > 0:
+                    interval = min(interval, 1.0 / stats['rate'])
+            else:
+                interval = used_interval * (1 + (slowdown - 1) * stats['empty_ratio'])
+
+            interval = min(max(interval, min_interval), max_interval)
+            stats['interval'] = interval
+
+        # 抖动只作用于本次调度，不写回统计，避免间隔随机游走
+        if jitter > 0:
+            interval *= 1 + random.uniform(-jitter, jitter)
+            interval = min(max(interval, min_interval), max_interval)
+
+        return interval
+
+    def get_stats(self, rss_url):
+        """获取RSS源的统计信息副本"""
+        with self._lock:
+            stats = self._stats.get(rss_url)
+            return dict(stats) if stats else None
+
+    def reset(self, rss_url=None):
+        """清除统计信息"""
+        with self._lock:
+            if rss_url:
+                self._stats.pop(rss_url, None)
+            else:
+                self._stats.clear()
+
+    def _bounds(self, settings):
+        min_interval = max(float(settings.get('min_interval', 1)), 0.1)
+        max_interval = max(float(settings.get('max_interval', 60)), min_interval)
+        return min_interval, max_interval
+
+    def _new_stats(self, interval):
+        return {
+            'interval': interval,
+            'rate': 0.0,
+            'empty_ratio': 0.0,
+            'polls': 0
+        }
@@ -7,13 +7,19 @@
 """
 
 import re
-import requests
 import logging
 import json
 import hashlib
 import time
+import threading
 from urllib.parse import urlparse, quote
 from typing import Optional, Dict, Any
+from .metrics import AFFILIATE_SECONDS, AFFILIATE_REQUESTS
+
+# 各平台接口地址（可在对应平台配置中用 api_url 覆盖，例如指向本地回放测试服务）
+DATAOKE_API_URL = "https://openapi.dataoke.com/api/tb-service/parse-content"
+JINGPINKU_API_URL = "https://api.jingpinku.com/get_wire_report_link/api"
+PDD_API_URL = "https://gw-api.pinduoduo.com/api/router"
 
 class AffiliateConverter:
     """返利转链处理器"""
@@ -29,11 +35,16 @@ class AffiliateConverter:
         self.pdd_config = affiliate_config.get('pdd', {})
         
         # 设置请求会话
+        import requests  # 只在创建转链实例时加载
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         
+    def close(self):
+        """关闭请求会话（释放连接池）"""
+        self.session.close()
+        
     def convert_url(self, url: str) -> str:
         """转换单个URL - 公共接口"""
         return self._convert_single_link(url)
@@ -90,21 +101,29 @@ class AffiliateConverter:
     
     def _convert_single_link(self, url: str) -> str:
         """转换单个链接"""
+        platform = 'unknown'
+        start = time.perf_counter()
+        converted_url = url
         try:
             platform = self._detect_platform(url)
             
             if platform == 'taobao':
-                return self._convert_taobao_link(url)
+                converted_url = self._convert_taobao_link(url)
             elif platform == 'jd':
-                return self._convert_jd_link(url)
+                converted_url = self._convert_jd_link(url)
             elif platform == 'pdd':
-                return self._convert_pdd_link(url)
+                converted_url = self._convert_pdd_link(url)
                 
-            return url
+            return converted_url
             
         except Exception as e:
             self.logger.error(f"转链异常: {url} - {e}")
             return url
+        finally:
+            if platform != 'unknown':
+                AFFILIATE_SECONDS.observe(time.perf_counter() - start, platform=platform)
+                result = 'success' if converted_url and converted_url != url else 'failure'
+                AFFILIATE_REQUESTS.inc(platform=platform, result=result)
     
     def _detect_platform(self, url: str) -> str:
         """检测链接平台"""
@@ -126,7 +145,7 @@ class AffiliateConverter:
             return url
             
         try:
-            api_url = "https://openapi.dataoke.com/api/tb-service/parse-content"
+            api_url = self.dataoke_config.get('api_url') or DATAOKE_API_URL
             
             # 生成nonce和timer
             import random
@@ -188,7 +207,7 @@ class AffiliateConverter:
             return url
             
         try:
-            api_url = "https://api.jingpinku.com/get_wire_report_link/api"
+            api_url = self.jingpinku_config.get('api_url') or JINGPINKU_API_URL
             
             # 按官方文档构建参数 - 万能转链接口
             params = {
@@ -262,7 +281,7 @@ class AffiliateConverter:
             return url
             
         try:
-            api_url = "https://gw-api.pinduoduo.com/api/router"
+            api_url = self.pdd_config.get('api_url') or PDD_API_URL
             timestamp = str(int(time.time()))
             
             # 使用最简参数，按照调试成功的版本
@@ -365,4 +384,26 @@ class AffiliateConverter:
         sign_string = f"{self.pdd_config['client_secret']}{param_string}{self.pdd_config['client_secret']}"
         
         # MD5加密并转大写
-        return hashlib.md5(sign_string.encode('utf-8')).hexdigest().upper()
\ No newline at end of file
+        return hashlib.md5(sign_string.encode('utf-8')).hexdigest().upper()
+
+
+# 进程内共享的转链处理器：affiliate_config不变时复用同一个实例（及其HTTP连接池）
+_converter_lock = threading.Lock()
+_converter_cache: Dict[str, Any] = {'key': None, 'converter': None}
+
+def get_affiliate_converter(config: Dict[str, Any]) -> AffiliateConverter:
+    """获取共享的转链处理器，只有affiliate_config变化时才重新创建"""
+    affiliate_config = config.get('affiliate_config', {})
+    key = json.dumps(affiliate_config, sort_keys=True, ensure_ascii=False)
+    
+    with _converter_lock:
+        if _converter_cache['key'] != key or _converter_cache['converter'] is None:
+            old_converter = _converter_cache['converter']
+            # 只保留返利配置的副本，避免引用外部可变的完整配置
+            _converter_cache['converter'] = AffiliateConverter({'affiliate_config': json.loads(key)})
+            if old_converter is not None:
+                # 释放旧实例的连接池（仍在使用旧实例的请求关闭后会重新建立连接）
+                old_converter.close()
+            _converter_cache['key'] = key
+            logging.getLogger(__name__).info("已创建转链处理器（返利配置变化时自动重建）")
+        return _converter_cache['converter']
@@ -0,0 +1,73 @@
+# src/core/catch_up.py - 积压补发：停机恢复后RSS源积压大量新线报时，优先推送最新的线报
+import time
+
+# 距上次成功轮询超过该倍数的轮询间隔时视为停机恢复
+GAP_INTERVALS = 2
+
+def get_catch_up_settings(rss_config, global_settings):
+    """获取RSS源的积压补发设置，未启用时返回None
+
+    RSS源配置中的 "catch_up" 字段覆盖全局 catch_up_settings，例如 "catch_up": {"max_per_poll": 5}
+    - backlog_threshold: 停机恢复后单次轮询的新线报达到该数量时视为积压，进入补发模式
+    - freshness_minutes: 补发模式下丢弃发布时间早于该分钟数的线报（0表示不丢弃）
+    - max_per_poll: 补发模式下每次轮询最多推送的条数，其余留到之后的轮询
+    """
+    settings = dict(global_settings or {})
+    settings.update(rss_config.get('catch_up') or {})
+    if not settings.get('enabled', True):
+        return None
+    return {
+        'backlog_threshold': max(int(settings.get('backlog_threshold', 10)), 1),
+        'freshness_minutes': max(float(settings.get('freshness_minutes', 180)), 0),
+        'max_per_poll': max(int(settings.get('max_per_poll', 5)), 1)
+    }
+
+def get_backlog_start(mark, poll_interval, now=None):
+    """判断RSS源是否处于停机恢复后的积压状态
+
+    Args:
+        mark: RSS源的高水位标记（checked_at 为上次成功轮询的时间，catch_up_since 为未补发完的积压起点）
+        poll_interval: 轮询间隔（秒）
+    Returns:
+        积压开始前最后一次成功轮询的时间；上次补发还有剩余时沿用上次的起点；不在积压状态时返回None
+    """
+    if not mark:
+        return None
+    if mark.get('catch_up_since') is not None:
+        return mark['catch_up_since']
+    checked_at = mark.get('checked_at')
+    now = time.time() if now is None else now
+    if checked_at is not None and now - checked_at > GAP_INTERVALS * poll_interval:
+        return checked_at
+    return None
+
+def plan_catch_up(items, settings, backlog_start, now=None):
+    """规划积压线报的推送顺序
+
+    Args:
+        items: [(发布时间戳或None, 线报), ...]，按RSS中的顺序
+        settings: get_catch_up_settings() 的返回值
+        backlog_start: get_backlog_start() 的返回值，None表示没有停机，正常推送
+    Returns:
+        (本次推送的线报, 留到之后轮询的线报, 超过新鲜期丢弃的线报)，
+        不在积压状态或未达到积压阈值时全部本次推送
+    """
+    if not settings or backlog_start is None or len(items) < settings['backlog_threshold']:
+        return [item for _, item in items], [], []
+
+    now = time.time() if now is None else now
+    dropped = []
+    kept = []
+    max_age = settings['freshness_minutes'] * 60
+    for published, item in items:
+        # 只丢弃停机期间发布的过期线报；发布时间早于积压起点的是时间戳偏差的线报（上次轮询时还没有出现），保留
+        if max_age and published is not None and published > backlog_start and now - published > max_age:
+            dropped.append(item)
+        else:
+            kept.append((published, item))
+
+    # 最新的线报优先（没有发布时间的视为最新，RSS中的相对顺序不变）
+    kept.sort(key=lambda pair: -(now if pair[0] is None else pair[0]))
+    ready = [item for _, item in kept]
+    limit = settings['max_per_poll']
+    return ready[:limit], ready[limit:], dropped
@@ -1,52 +1,166 @@
 # src/core/config_manager.py - 统一配置管理器
+import copy
 import json
 import os
+import threading
+import logging
 
 CONFIG_FILE = 'config.json'
 
-def load_config():
-    """加载完整配置"""
-    if not os.path.exists(CONFIG_FILE):
-        # 创建默认配置
-        default_config = {
-            "rss_sources": [],
-            "affiliate_config": get_default_affiliate_config()
-        }
-        save_config(default_config)
-        return default_config
-        
+logger = logging.getLogger(__name__)
+
+# 配置缓存：只在文件修改时间/大小变化时重新解析，并按rss_url建立索引
+_cache_lock = threading.RLock()
+_cache = {
+    'path': None,
+    'signature': None,
+    'config': None,
+    'rss_index': {}
+}
+_subscribers = []
+
+def _file_signature(path):
+    """配置文件的变化标识 (mtime_ns, size)，文件不存在时返回None"""
     try:
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-            
-        # 确保配置结构完整
-        if 'rss_sources' not in config:
-            config['rss_sources'] = []
-        if 'affiliate_config' not in config:
-            config['affiliate_config'] = get_default_affiliate_config()
-            
-        return config
-    except (FileNotFoundError, json.JSONDecodeError):
-        # 如果文件损坏，返回默认配置
-        default_config = {
-            "rss_sources": [],
-            "affiliate_config": get_default_affiliate_config()
-        }
-        save_config(default_config)
-        return default_config
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def _read_config_file():
+    """解析配置文件并补齐缺失的配置段"""
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+        
+    # 确保配置结构完整
+    for key, value in get_default_config().items():
+        if key not in config:
+            config[key] = value
+    return config
+
+def _update_cache(config, signature):
+    """替换缓存内容（调用方需持有锁）"""
+    _cache['path'] = CONFIG_FILE
+    _cache['signature'] = signature
+    _cache['config'] = config
+    _cache['rss_index'] = {c.get('rss_url'): c for c in config.get('rss_sources', [])}
+
+def _refresh_cache():
+    """检查配置文件是否变化，变化时重新加载
+
+    Returns:
+        配置内容发生变化返回True
+    """
+    with _cache_lock:
+        signature = _file_signature(CONFIG_FILE)
+        if (_cache['config'] is not None and _cache['path'] == CONFIG_FILE
+                and signature == _cache['signature']):
+            return False
+        
+        if signature is None:
+            # 创建默认配置
+            default_config = get_default_config()
+            _write_config_file(default_config)
+            _update_cache(default_config, _file_signature(CONFIG_FILE))
+            return True
+        
+        try:
+            config = _read_config_file()
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            # 文件损坏（例如正在手动编辑）时保留上一次的有效配置，不覆盖用户文件
+            logger.error(f"配置文件解析失败，继续使用上一次的配置: {e}")
+            if _cache['config'] is None or _cache['path'] != CONFIG_FILE:
+                _update_cache(get_default_config(), signature)
+                return True
+            _cache['signature'] = signature
+            return False
+        
+        changed = config != _cache['config']
+        _update_cache(config, signature)
+        return changed
+
+def get_config():
+    """获取缓存的完整配置（共享对象，调用方不要修改；需要修改请使用load_config）"""
+    _refresh_cache()
+    return _cache['config']
+
+def get_rss_config(rss_url):
+    """按rss_url获取RSS源配置（共享对象，调用方不要修改），不存在时返回None"""
+    _refresh_cache()
+    return _cache['rss_index'].get(rss_url)
+
+def subscribe(callback):
+    """订阅配置变化，配置文件变化或save_config后调用 callback(config)"""
+    with _cache_lock:
+        if callback not in _subscribers:
+            _subscribers.append(callback)
+
+def unsubscribe(callback):
+    """取消订阅配置变化"""
+    with _cache_lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+def check_config_changes():
+    """检查配置文件是否被修改，修改时通知订阅者（由定时任务调用）
+
+    Returns:
+        配置发生变化返回True
+    """
+    if _refresh_cache():
+        _notify_subscribers()
+        return True
+    return False
+
+def _notify_subscribers():
+    with _cache_lock:
+        subscribers = list(_subscribers)
+        config = _cache['config']
+    for callback in subscribers:
+        try:
+            callback(config)
+        except Exception as e:
+            logger.error(f"配置变更通知失败: {e}", exc_info=True)
+
+def load_config():
+    """加载完整配置（返回可修改的副本）"""
+    return copy.deepcopy(get_config())
+
+def get_default_config():
+    """获取默认的完整配置"""
+    return {
+        "rss_sources": [],
+        "affiliate_config": get_default_affiliate_config(),
+        "scheduler_settings": get_default_scheduler_settings(),
+        "push_settings": get_default_push_settings(),
+        "metrics_settings": get_default_metrics_settings(),
+        "trace_settings": get_default_trace_settings(),
+        "log_settings": get_default_log_settings(),
+        "pipeline_settings": get_default_pipeline_settings(),
+        "catch_up_settings": get_default_catch_up_settings()
+    }
 
 def save_config(config):
-    """保存完整配置"""
+    """保存完整配置，并立即更新缓存、通知订阅者"""
+    with _cache_lock:
+        if not _write_config_file(config):
+            return
+        _update_cache(copy.deepcopy(config), _file_signature(CONFIG_FILE))
+    _notify_subscribers()
+
+def _write_config_file(config):
     try:
         with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
             json.dump(config, f, ensure_ascii=False, indent=2)
+        return True
     except Exception as e:
         print(f"保存配置失败: {e}")
+        return False
 
 def load_rss_configs():
     """加载RSS配置列表（兼容旧接口）"""
-    config = load_config()
-    return config.get('rss_sources', [])
+    config = get_config()
+    return copy.deepcopy(config.get('rss_sources', []))
 
 def save_rss_configs(rss_configs):
     """保存RSS配置列表（兼容旧接口）"""
@@ -54,10 +168,45 @@ def save_rss_configs(rss_configs):
     config['rss_sources'] = rss_configs
     save_config(config)
 
+def get_push_targets(rss_config):
+    """获取RSS源的推送目标列表 [{'group_id': ..., 'llonebot_api_url': ...}]
+
+    支持三种写法（可混用，按QQ群号去重）：
+    - group_id: 单个QQ群（旧格式）
+    - group_ids: 多个QQ群，使用RSS源的 llonebot_api_url
+    - targets: [{group_id, llonebot_api_url}]，可为每个群指定不同的机器人地址
+    QQ群的过滤规则（targets 中的 filters 字段或 group_filters）保存在目标的 'filters' 中。
+    """
+    default_api_url = rss_config.get('llonebot_api_url', '')
+    candidates = []
+    if rss_config.get('group_id'):
+        candidates.append({'group_id': rss_config['group_id']})
+    for group_id in rss_config.get('group_ids', []) or []:
+        candidates.append({'group_id': group_id})
+    candidates.extend(rss_config.get('targets', []) or [])
+
+    group_filters = {str(group_id).strip(): rule for group_id, rule in (rss_config.get('group_filters') or {}).items()}
+    targets = []
+    seen_groups = set()
+    for candidate in candidates:
+        group_id = str(candidate.get('group_id', '')).strip()
+        if not group_id or group_id in seen_groups:
+            continue
+        seen_groups.add(group_id)
+        target = {
+            'group_id': group_id,
+            'llonebot_api_url': candidate.get('llonebot_api_url') or default_api_url
+        }
+        filters = candidate.get('filters') or group_filters.get(group_id)
+        if filters:
+            target['filters'] = filters
+        targets.append(target)
+    return targets
+
 def load_affiliate_config():
     """加载返利配置（兼容旧接口）"""
-    config = load_config()
-    return config.get('affiliate_config', get_default_affiliate_config())
+    config = get_config()
+    return copy.deepcopy(config.get('affiliate_config', get_default_affiliate_config()))
 
 def save_affiliate_config(affiliate_config):
     """保存返利配置（兼容旧接口）"""
@@ -65,6 +214,24 @@ def save_affiliate_config(affiliate_config):
     config['affiliate_config'] = affiliate_config
     save_config(config)
 
+def load_settings(section, defaults):
+    """加载配置中的一组设置（缺失的字段使用默认值补齐）
+
+    Args:
+        section: 配置键，如 'push_settings'
+        defaults: 返回默认设置的函数，如 get_default_push_settings
+    """
+    return _merge_settings(defaults(), get_config().get(section, {}))
+
+def _merge_settings(settings, user_settings):
+    """用用户配置覆盖默认设置，嵌套字典逐项合并"""
+    for key, value in user_settings.items():
+        if isinstance(value, dict) and isinstance(settings.get(key), dict):
+            settings[key].update(value)
+        else:
+            settings[key] = copy.deepcopy(value)
+    return settings
+
 def get_default_affiliate_config():
     """获取默认返利配置"""
     return {
@@ -90,3 +257,114 @@ def get_default_affiliate_config():
             'max_convert_per_batch': 5
         }
     }
+
+def get_default_scheduler_settings():
+    """获取默认调度设置
+
+    mode: fixed - 按每个RSS源配置的interval固定轮询
+          adaptive - 根据RSS源的更新频率在[min_interval, max_interval]之间自动调整（单位：分钟）
+    stagger: 相同间隔的RSS源在一个间隔内均匀错开首次执行时间
+    jitter_seconds: 每次触发的随机抖动（秒），0表示不抖动
+    max_concurrent_ticks: 同时执行的定时任务上限
+    """
+    return {
+        'mode': 'fixed',
+        'stagger': True,
+        'jitter_seconds': 0,
+        'max_concurrent_ticks': 4,
+        'adaptive': {
+            'min_interval': 1,
+            'max_interval': 60,
+            'speedup_factor': 0.5,   # 发现新线报时间隔乘以该系数
+            'slowdown_factor': 1.5,  # 连续无新线报时间隔最多乘以该系数
+            'jitter': 0.1            # 随机抖动比例（±10%）
+        }
+    }
+
+def get_default_push_settings():
+    """获取默认推送设置
+
+    queue_enabled: 启用持久化推送队列，处理流程只负责入队，由每个QQ群独立的工作线程按速率发送
+    messages_per_second: 每个QQ群每秒最多发送的消息数
+    max_retries: 发送失败的最大重试次数，超过后转入死信记录（无法连接到LLOneBot时不计入重试次数）
+    retry_backoff_seconds / max_backoff_seconds: 指数退避的初始等待和上限（秒）
+    """
+    return {
+        'queue_enabled': True,
+        'messages_per_second': 1.0,
+        'max_retries': 5,
+        'retry_backoff_seconds': 5,
+        'max_backoff_seconds': 300
+    }
+
+def get_default_metrics_settings():
+    """获取默认指标设置
+
+    enabled: 服务运行时在 http://host:port/metrics 提供Prometheus文本格式的运行指标
+    """
+    return {
+        'enabled': True,
+        'host': '127.0.0.1',
+        'port': 9108
+    }
+
+def get_default_trace_settings():
+    """获取默认阶段耗时追踪设置
+
+    enabled: 为每条线报和每次轮询写入阶段耗时记录（logs/entry_trace.log）
+    slow_entry_seconds / slow_tick_seconds: 超过阈值的记录同时写入 logs/slow_entries.log，0表示不记录
+    """
+    return {
+        'enabled': True,
+        'slow_entry_seconds': 10,
+        'slow_tick_seconds': 60
+    }
+
+def get_default_log_settings():
+    """获取默认日志设置
+
+    json_enabled: 同时输出JSON行格式日志（含feed、entry_id、stage、duration_ms字段），修改后重启程序生效
+    """
+    return {
+        'json_enabled': False,
+        'json_file': 'logs/rss_qq_app.jsonl'
+    }
+
+def get_default_pipeline_settings():
+    """获取默认处理流水线设置
+
+    queue_size: 相邻阶段之间队列的最大长度，下游处理不过来时上游等待
+    workers: 各阶段的工作线程数（fetch_feed → filter → fetch_article → clean → convert → push → record），
+             record 阶段固定为单线程；所有定时任务共用，即整个服务各阶段的并发上限，修改后重新启动监控生效
+    process_pool: 网页正文提取和文本清理在独立的进程池中执行（workers为进程数，0表示CPU核心数），
+                  修改后重启服务生效
+    """
+    return {
+        'queue_size': 50,
+        'workers': {
+            'fetch_feed': 2,
+            'filter': 1,
+            'fetch_article': 4,
+            'clean': 2,
+            'convert': 2,
+            'push': 2
+        },
+        'process_pool': {
+            'enabled': False,
+            'workers': 0
+        }
+    }
+
+def get_default_catch_up_settings():
+    """获取默认积压补发设置（RSS源的 catch_up 字段可覆盖）
+
+    enabled: 停机恢复（距上次成功轮询超过2个轮询间隔）后单次轮询的新线报达到 backlog_threshold 条时进入补发模式：
+             丢弃停机期间发布、发布时间早于 freshness_minutes 分钟的线报，其余按发布时间从新到旧推送，
+             每次轮询最多推送 max_per_poll 条，剩余的留到之后的轮询
+    """
+    return {
+        'enabled': True,
+        'backlog_threshold': 10,
+        'freshness_minutes': 180,
+        'max_per_poll': 5
+    }
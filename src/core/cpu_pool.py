@@ -0,0 +1,98 @@
+# src/core/cpu_pool.py - 可选的进程池：网页正文提取和文本清理在独立进程中执行，不占用调度线程的GIL
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_pool_lock = threading.Lock()
+_pool = None
+_pool_workers = 0
+
+def _warm_up():
+    """工作进程初始化：提前导入 bs4 和文本清理模块，第一条线报不用等待导入"""
+    from bs4 import BeautifulSoup
+    from . import rss_fetcher
+    rss_fetcher.clean_article(b"<html><body><p>warm up warm up warm up</p></body></html>", "", "")
+    BeautifulSoup("", "html.parser")
+
+def _ping(_=None):
+    return os.getpid()
+
+def _create_pool(workers):
+    # 进程池默认关闭：multiprocessing 和 concurrent.futures 只在启动进程池时导入，不拖慢程序启动
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    # 使用 spawn：父进程中有调度、日志等后台线程，fork 可能复制到被其他线程持有的锁
+    context = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_warm_up)
+    # 进程池按需创建进程：提交与进程数相同的任务，等所有进程完成启动和预热
+    try:
+        list(pool.map(_ping, range(workers), timeout=60))
+    except Exception:
+        pool.shutdown(wait=False)
+        raise
+    return pool
+
+def start_cpu_pool(workers=0):
+    """启动进程池并预热所有工作进程，已启动时直接返回
+
+    Args:
+        workers: 进程数，0表示CPU核心数
+    Returns:
+        启动成功返回True（失败时记录错误，之后在当前进程中处理）
+    """
+    global _pool, _pool_workers
+    workers = int(workers) or os.cpu_count() or 1
+    with _pool_lock:
+        if _pool is not None:
+            return True
+        try:
+            _pool = _create_pool(workers)
+            _pool_workers = workers
+            logger.info(f"网页解析进程池已启动（{workers}个进程）")
+            return True
+        except Exception as e:
+            logger.error(f"网页解析进程池启动失败，改为在当前进程中处理: {e}")
+            _pool = None
+            return False
+
+def stop_cpu_pool():
+    """停止进程池（等待正在执行的任务完成）"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+        logger.info("网页解析进程池已停止")
+
+def is_cpu_pool_running():
+    return _pool is not None
+
+def run_cpu_task(func, *args):
+    """在进程池中执行 func(*args) 并等待结果；进程池未启动时在当前线程执行
+
+    func 和参数需要可以pickle（模块级函数、字节串、字符串等）。
+    工作进程异常退出时重建进程池，本次任务改为在当前线程执行。
+    """
+    global _pool
+    pool = _pool
+    if pool is None:
+        return func(*args)
+    from concurrent.futures.process import BrokenProcessPool
+    try:
+        return pool.submit(func, *args).result()
+    except BrokenProcessPool as e:
+        logger.error(f"网页解析进程池异常，正在重建: {e}")
+        with _pool_lock:
+            if _pool is pool:
+                try:
+                    _pool = _create_pool(_pool_workers)
+                except Exception as error:
+                    logger.error(f"网页解析进程池重建失败，改为在当前进程中处理: {error}")
+                    _pool = None
+        pool.shutdown(wait=False)
+        return func(*args)
+    except RuntimeError:
+        # 进程池正在关闭（停止服务时）
+        return func(*args)
@@ -0,0 +1,46 @@
+# src/core/digest.py - 线报合并推送（摘要模式）
+DIGEST_SEPARATOR = "\n\n━━━━━━━━━━\n\n"
+
+def get_digest_settings(rss_config):
+    """获取RSS源的合并推送设置，未启用时返回None
+
+    RSS源配置示例: "digest": {"enabled": true, "min_items": 3, "max_items": 10,
+                              "max_length": 3000, "forward": false}
+    - min_items: 单次发现的新线报达到该数量才合并，否则逐条推送
+    - max_items / max_length: 每条合并消息的条数和字数上限
+    - forward: 使用QQ合并转发消息（OneBot send_group_forward_msg）代替拼接文本
+    """
+    digest = rss_config.get('digest')
+    if not digest or not digest.get('enabled', False):
+        return None
+    return {
+        'min_items': max(int(digest.get('min_items', 3)), 1),
+        'max_items': max(int(digest.get('max_items', 10)), 1),
+        'max_length': max(int(digest.get('max_length', 3000)), 1),
+        'forward': bool(digest.get('forward', False)),
+        'forward_name': digest.get('forward_name', '线报推送'),
+        'forward_uin': str(digest.get('forward_uin', '10000'))
+    }
+
+def chunk_messages(messages, max_items, max_length):
+    """按条数和总长度上限把消息分组，单条超长的消息独占一组"""
+    chunks = []
+    current = []
+    current_length = 0
+    for message in messages:
+        added_length = len(message) + (len(DIGEST_SEPARATOR) if current else 0)
+        if current and (len(current) >= max_items or current_length + added_length > max_length):
+            chunks.append(current)
+            current = []
+            current_length = 0
+            added_length = len(message)
+        current.append(message)
+        current_length += added_length
+    if current:
+        chunks.append(current)
+    return chunks
+
+def format_digest(messages):
+    """把多条线报拼接为一条合并消息"""
+    header = f"📦 线报合集（{len(messages)}条）"
+    return header + DIGEST_SEPARATOR + DIGEST_SEPARATOR.join(messages)
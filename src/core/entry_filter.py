@@ -0,0 +1,177 @@
+# src/core/entry_filter.py - 关键词和价格规则过滤：在下载网页和转链之前按RSS源/QQ群的规则筛选线报
+import json
+import logging
+import re
+import threading
+from collections import deque
+from ..utils.deal_extractor import extract_entry_deal
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+logger = logging.getLogger(__name__)
+
+def _as_list(value):
+    """规则中的关键词/分类列表，单个字符串视为只有一项"""
+    if not value:
+        return []
+    if isinstance(value, (str, int, float)):
+        return [value]
+    return list(value)
+
+def _as_price(rule, key):
+    """规则中的价格上下限，无效的值记录日志后忽略"""
+    value = rule.get(key)
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        logger.error(f"过滤规则的 {key} 不是有效的数字，已忽略: {value!r}")
+        return None
+
+class KeywordAutomaton:
+    """Aho-Corasick 多模式匹配自动机（不区分大小写）
+
+    所有关键词编译成一个自动机，对文本扫描一遍即可找出其中出现的全部关键词，
+    耗时与文本长度成正比，与关键词数量无关。
+    """
+
+    def __init__(self, keywords):
+        self.keywords = []
+        self.index = {}  # {关键词: 序号}
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [frozenset()]
+        outputs = [set()]
+        for keyword in keywords:
+            keyword = str(keyword).lower()
+            if not keyword or keyword in self.index:
+                continue
+            index = self.index[keyword] = len(self.keywords)
+            self.keywords.append(keyword)
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(index)
+
+        # 按层构建失败指针，并把失败链上的输出合并到当前状态，匹配时不用再沿失败链查找
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                outputs[next_state] |= outputs[self._fail[next_state]]
+        self._output = [frozenset(output) for output in outputs]
+
+    def search(self, text):
+        """返回文本中出现的关键词序号集合"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+class _Rule:
+    """一组过滤规则（RSS源或单个QQ群），关键词已换成自动机中的序号"""
+
+    def __init__(self, rule, keyword_index):
+        self.include = {keyword_index[str(k).lower()] for k in _as_list(rule.get('include')) if k}
+        self.exclude = {keyword_index[str(k).lower()] for k in _as_list(rule.get('exclude')) if k}
+        self.categories = {str(c).lower() for c in _as_list(rule.get('categories')) if c}
+        self.min_price = _as_price(rule, 'min_price')
+        self.max_price = _as_price(rule, 'max_price')
+
+    def matches(self, found, categories, price):
+        if self.include and not (self.include & found):
+            return False
+        if self.exclude & found:
+            return False
+        if self.categories and not (self.categories & categories):
+            return False
+        # 没有识别出价格的线报不按价格过滤
+        if price is not None:
+            if self.min_price is not None and price < self.min_price:
+                return False
+            if self.max_price is not None and price > self.max_price:
+                return False
+        return True
+
+class EntryFilter:
+    """一个RSS源的过滤规则：RSS源的 filters 和各QQ群的 filters 共用一个关键词自动机"""
+
+    def __init__(self, feed_rule, group_rules):
+        rules = [feed_rule] + list(group_rules.values()) if feed_rule else list(group_rules.values())
+        self.automaton = KeywordAutomaton(k for rule in rules
+                                          for k in _as_list(rule.get('include')) + _as_list(rule.get('exclude')) if k)
+        self.feed_rule = _Rule(feed_rule, self.automaton.index) if feed_rule else None
+        self.group_rules = {group_id: _Rule(rule, self.automaton.index) for group_id, rule in group_rules.items()}
+        self.needs_price = any(rule.min_price is not None or rule.max_price is not None
+                               for rule in self._rules())
+
+    def _rules(self):
+        return ([self.feed_rule] if self.feed_rule else []) + list(self.group_rules.values())
+
+    def allowed_targets(self, entry, targets, deal=None):
+        """返回规则允许推送该线报的推送目标（RSS源规则不通过时返回空列表）
+
+        Args:
+            deal: 已提取的线报结构化信息（见 src/utils/deal_extractor.py），价格规则使用其中的到手价
+        """
+        found = self.automaton.search(entry_text(entry)) if self.automaton.keywords else set()
+        categories = {tag.get('term', '').lower() for tag in entry.get('tags', []) or []}
+        price = None
+        if self.needs_price:
+            price = (deal if deal is not None else extract_entry_deal(entry))['price']
+        if self.feed_rule and not self.feed_rule.matches(found, categories, price):
+            return []
+        return [target for target in targets
+                if target['group_id'] not in self.group_rules
+                or self.group_rules[target['group_id']].matches(found, categories, price)]
+
+def entry_text(entry):
+    """用于规则匹配的文本：标题 + 摘要（去掉HTML标签）"""
+    return f"{entry.get('title', '')}\n{TAG_PATTERN.sub(' ', entry.get('summary', '') or '')}"
+
+_cache_lock = threading.Lock()
+_filter_cache = {}  # {rss_url: (规则签名, EntryFilter)}
+
+def get_entry_filter(rss_config, targets):
+    """获取RSS源编译好的过滤规则，RSS源和各QQ群都没有配置规则时返回None
+
+    RSS源配置示例: "filters": {"include": ["京东", "茅台"], "exclude": ["预售"], "max_price": 100}
+    QQ群的规则写在 targets 的 filters 字段，或 "group_filters": {"群号": {...}}。
+    - include: 包含任一关键词才推送；exclude: 包含任一关键词则不推送（不区分大小写）
+    - categories: RSS条目分类（<category>）包含其中之一才推送
+    - min_price / max_price: 线报到手价范围（没有识别出价格时不过滤）
+    规则未变化时复用已编译的自动机。
+    """
+    feed_rule = rss_config.get('filters') or None
+    group_rules = {target['group_id']: target['filters'] for target in targets if target.get('filters')}
+    if not feed_rule and not group_rules:
+        return None
+    signature = json.dumps([feed_rule, group_rules], sort_keys=True, ensure_ascii=False)
+    rss_url = rss_config.get('rss_url')
+    with _cache_lock:
+        cached = _filter_cache.get(rss_url)
+        if cached and cached[0] == signature:
+            return cached[1]
+    entry_filter = EntryFilter(feed_rule, group_rules)
+    with _cache_lock:
+        _filter_cache[rss_url] = (signature, entry_filter)
+    return entry_filter
@@ -0,0 +1,246 @@
+# src/core/metrics.py - 运行指标（计数器/直方图/仪表），支持Prometheus文本格式导出
+import bisect
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+logger = logging.getLogger(__name__)
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = []
+    for key, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+class Counter:
+    """只增不减的计数器"""
+    type_name = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+class Gauge:
+    """可增可减的当前值；也可以注册回调在导出时实时取值"""
+    type_name = "gauge"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._callback = None
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def set_callback(self, callback):
+        """callback() 返回 [(labels_dict, value), ...]，为None时取消回调"""
+        self._callback = callback
+
+    def samples(self):
+        callback = self._callback
+        if callback is not None:
+            try:
+                return [(self.name, _label_key(labels), value) for labels, value in callback()]
+            except Exception as e:
+                logger.error(f"指标回调失败: {self.name} - {e}")
+                return []
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+class Histogram:
+    """分布统计（累积桶 + 总和 + 次数）"""
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # {label_key: [bucket_counts, sum, count]}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[key] = data
+            data[0][index] += 1
+            data[1] += value
+            data[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """计时上下文：with histogram.time(feed=url): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """{label_key: (sum, count)}"""
+        with self._lock:
+            return {key: (data[1], data[2]) for key, data in self._values.items()}
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            items = [(key, list(data[0]), data[1], data[2]) for key, data in self._values.items()]
+        for key, bucket_counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", key + (("le", _format_bound(bound)),), cumulative))
+            samples.append((f"{self.name}_bucket", key + (("le", "+Inf"),), count))
+            samples.append((f"{self.name}_sum", key, total))
+            samples.append((f"{self.name}_count", key, count))
+        return samples
+
+def _format_bound(bound):
+    return repr(float(bound))
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name, help_text):
+        return self._register(Counter, name, help_text)
+
+    def gauge(self, name, help_text):
+        return self._register(Gauge, name, help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help_text, buckets=buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self):
+        """导出为Prometheus文本格式"""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, label_key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(label_key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def render_summary(self):
+        """导出为便于阅读的摘要（用于GUI显示）"""
+        lines = []
+        for metric in self.metrics():
+            if isinstance(metric, Histogram):
+                for label_key, (total, count) in sorted(metric.snapshot().items()):
+                    avg_ms = total / count * 1000 if count else 0
+                    lines.append(f"{metric.name}{_format_labels(label_key)}  次数={count}  平均={avg_ms:.1f}ms  合计={total:.2f}s")
+            else:
+                for name, label_key, value in sorted(metric.samples(), key=lambda s: s[1]):
+                    lines.append(f"{name}{_format_labels(label_key)}  {value}")
+        return "\n".join(lines)
+
+REGISTRY = MetricsRegistry()
+
+# --- 流水线指标 ---
+FEED_FETCH_SECONDS = REGISTRY.histogram("xianbao_feed_fetch_seconds", "RSS源抓取和解析耗时（秒）")
+FEED_FETCH_BYTES = REGISTRY.counter("xianbao_feed_fetch_bytes_total", "RSS源下载字节数")
+FEED_FETCH_ERRORS = REGISTRY.counter("xianbao_feed_fetch_errors_total", "RSS源抓取或解析失败次数")
+FEED_ENTRIES_PARSED = REGISTRY.counter("xianbao_feed_entries_parsed_total", "RSS源解析出的条目数")
+FEED_NEW_ENTRIES = REGISTRY.counter("xianbao_feed_new_entries_total", "RSS源发现的新条目数")
+FEED_FILTERED_ENTRIES = REGISTRY.counter("xianbao_feed_filtered_entries_total", "被关键词/价格规则过滤掉的新条目数")
+FEED_TICK_SECONDS = REGISTRY.histogram("xianbao_feed_tick_seconds", "单个RSS源一次定时任务的总耗时（秒）")
+ARTICLE_FETCH_SECONDS = REGISTRY.histogram("xianbao_article_fetch_seconds", "线报网页下载耗时（秒）")
+ARTICLE_PARSE_SECONDS = REGISTRY.histogram("xianbao_article_parse_seconds", "线报网页正文提取耗时（秒）")
+CLEANUP_SECONDS = REGISTRY.histogram("xianbao_cleanup_seconds", "线报文本清理耗时（秒）")
+AFFILIATE_SECONDS = REGISTRY.histogram("xianbao_affiliate_request_seconds", "单个链接转链耗时（秒）")
+AFFILIATE_REQUESTS = REGISTRY.counter("xianbao_affiliate_requests_total", "转链请求次数（按平台和结果）")
+PUSH_SECONDS = REGISTRY.histogram("xianbao_push_seconds", "QQ消息推送耗时（秒）")
+PUSH_REQUESTS = REGISTRY.counter("xianbao_push_requests_total", "QQ消息推送次数（按结果）")
+PUSH_QUEUE_DEPTH = REGISTRY.gauge("xianbao_push_queue_depth", "推送队列中待发送的消息数（按QQ群）")
+
+# --- HTTP导出 ---
+_server_lock = threading.Lock()
+_server = None
+
+def _make_handler():
+    # http.server 导入较慢，只在启动指标服务时加载
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = REGISTRY.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+def start_metrics_server(host='127.0.0.1', port=9108):
+    """在后台线程启动指标HTTP服务（GET /metrics），已启动时直接返回"""
+    global _server
+    from http.server import ThreadingHTTPServer
+    with _server_lock:
+        if _server is not None:
+            return _server
+        _server = ThreadingHTTPServer((host, port), _make_handler())
+        _server.daemon_threads = True
+        thread = threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True)
+        thread.start()
+        logger.info(f"指标服务已启动: http://{host}:{_server.server_port}/metrics")
+        return _server
+
+def stop_metrics_server():
+    """停止指标HTTP服务"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            return
+        _server.shutdown()
+        _server.server_close()
+        _server = None
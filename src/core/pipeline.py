@@ -0,0 +1,151 @@
+# src/core/pipeline.py - 分阶段处理流水线：每个阶段独立的工作线程，阶段之间用有界队列连接
+import queue
+import threading
+import logging
+
+_STOP = object()
+
+class Stage:
+    """流水线的一个阶段
+
+    handler(item) 返回交给下一阶段的项目列表：
+    - 返回 [item] 表示原样传给下一阶段，返回多个项目表示拆分（例如一个RSS源拆分为多条线报）
+    - 返回空列表表示项目在这个阶段结束（被过滤，或已经处理完）
+    """
+
+    def __init__(self, name, handler, workers=1):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+
+class _Batch:
+    """一次 run() 提交的项目，记录尚未结束的项目数"""
+    __slots__ = ('pending',)
+
+    def __init__(self):
+        self.pending = 0
+
+class Pipeline:
+    """分阶段处理流水线
+
+    - 每个阶段有 workers 个工作线程，阶段之间的队列最多容纳 queue_size 个项目，
+      下游处理不过来时上游阻塞等待（背压），内存占用有上限
+    - start() 后工作线程常驻，多个线程可以同时调用 run() 提交项目，共用各阶段的工作线程，
+      各阶段的并发数始终不超过 workers；未调用 start() 时 run() 为本次处理临时启动工作线程
+    - 项目在某个阶段结束（返回空列表、处理出错、或完成最后一个阶段）时调用 on_finish(item)，
+      处理出错时先调用 on_error(stage_name, item, exception)
+    - stop_event 置位后剩余的项目不再处理，直接结束
+    """
+
+    def __init__(self, stages, queue_size=50, on_finish=None, on_error=None, stop_event=None, name="pipeline"):
+        self.stages = list(stages)
+        self.queue_size = max(1, int(queue_size))
+        self.on_finish = on_finish
+        self.on_error = on_error
+        self.stop_event = stop_event
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+        self._cond = threading.Condition()
+        self._lifecycle_lock = threading.Lock()
+        self._queues = None
+        self._threads = []
+
+    def start(self):
+        """启动各阶段的工作线程（已启动时直接返回）"""
+        with self._lifecycle_lock:
+            if self._queues is not None:
+                return
+            self._queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+            for index, stage in enumerate(self.stages):
+                for number in range(stage.workers):
+                    thread = threading.Thread(target=self._worker, args=(index, self._queues),
+                                              name=f"{self.name}-{stage.name}-{number}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+
+    def stop(self):
+        """停止工作线程（调用方需保证没有正在执行的 run()）"""
+        with self._lifecycle_lock:
+            if self._queues is None:
+                return
+            for index, stage in enumerate(self.stages):
+                for _ in range(stage.workers):
+                    self._queues[index].put(_STOP)
+            for thread in self._threads:
+                thread.join()
+            self._queues = None
+            self._threads = []
+
+    @property
+    def running(self):
+        return self._queues is not None
+
+    def run(self, items):
+        """处理一批项目，这批项目全部结束后返回"""
+        if not self.running:
+            self.start()
+            try:
+                self._run_batch(items)
+            finally:
+                self.stop()
+            return
+        self._run_batch(items)
+
+    def _run_batch(self, items):
+        queues = self._queues
+        batch = _Batch()
+        for item in items:
+            self._add_pending(batch, 1)
+            queues[0].put((batch, item))
+        with self._cond:
+            while batch.pending > 0:
+                self._cond.wait()
+
+    def _add_pending(self, batch, count):
+        with self._cond:
+            batch.pending += count
+            if batch.pending <= 0:
+                self._cond.notify_all()
+
+    def _worker(self, index, queues):
+        stage = self.stages[index]
+        is_last = index == len(self.stages) - 1
+        while True:
+            task = queues[index].get()
+            if task is _STOP:
+                return
+            batch, item = task
+
+            outputs = []
+            if self.stop_event is None or not self.stop_event.is_set():
+                try:
+                    outputs = stage.handler(item) or []
+                except Exception as e:
+                    outputs = []
+                    self._report_error(stage.name, item, e)
+
+            if is_last or not outputs:
+                self._finish(item)
+            else:
+                self._add_pending(batch, len(outputs))
+                for output in outputs:
+                    queues[index + 1].put((batch, output))
+            self._add_pending(batch, -1)
+
+    def _report_error(self, stage_name, item, error):
+        if self.on_error is None:
+            self.logger.error(f"流水线阶段 {stage_name} 处理失败: {error}", exc_info=True)
+            return
+        try:
+            self.on_error(stage_name, item, error)
+        except Exception as e:
+            self.logger.error(f"流水线错误处理失败: {e}", exc_info=True)
+
+    def _finish(self, item):
+        if self.on_finish is None:
+            return
+        try:
+            self.on_finish(item)
+        except Exception as e:
+            self.logger.error(f"流水线项目结束处理失败: {e}", exc_info=True)
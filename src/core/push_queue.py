@@ -0,0 +1,261 @@
+# src/core/push_queue.py - 持久化推送队列，按QQ群限速发送
+import json
+import os
+import threading
+import time
+import uuid
+import logging
+from collections import deque
+from .qq_pusher import send_group_message, send_group_forward_message, PushConnectionError
+
+PUSH_QUEUE_FILE = "push_queue.json"
+DEAD_LETTER_FILE = "dead_letters.jsonl"
+
+class PushQueue:
+    """处理流程与QQ推送之间的持久化队列
+
+    - 每个目标（LLOneBot地址 + QQ群号）一个工作线程，按 messages_per_second 限速发送
+    - 发送失败按指数退避重试，超过 max_retries 后写入死信文件；
+      无法连接到LLOneBot（机器人离线）时一直按退避间隔重试，不计入重试次数
+    - 发送成功后调用 on_delivered(item)，由调用方记录已发送（入队不代表已送达）；
+      转入死信后调用 on_dead_letter(item)，由调用方记录为不再推送
+    - 死信文件为JSON行格式，每条死信追加一行
+    - 待发送消息保存在 PUSH_QUEUE_FILE 中，程序重启后继续发送
+    """
+
+    def __init__(self, settings, queue_file=PUSH_QUEUE_FILE, dead_letter_file=DEAD_LETTER_FILE,
+                 on_delivered=None, on_dead_letter=None):
+        self.logger = logging.getLogger(__name__)
+        self.on_delivered = on_delivered
+        self.on_dead_letter = on_dead_letter
+        self.queue_file = queue_file
+        self.dead_letter_file = dead_letter_file
+        self.min_send_interval = 1.0 / max(float(settings.get('messages_per_second', 1.0)), 0.01)
+        self.max_retries = int(settings.get('max_retries', 5))
+        self.retry_backoff = float(settings.get('retry_backoff_seconds', 5))
+        self.max_backoff = float(settings.get('max_backoff_seconds', 300))
+
+        self._cond = threading.Condition()
+        self._queues = {}   # {(api_url, group_id): [item, ...]}
+        self._workers = {}  # {(api_url, group_id): Thread}
+        # 最近发送成功或转入死信的 (条目ID, QQ群号)：轮询在此之前加载的已发送记录中没有它们
+        self._recent = deque(maxlen=1000)
+        self._stop_event = threading.Event()
+        self._closed = False  # stop() 之后本实例不再写队列文件（新实例会重新加载同一文件）
+        self._load()
+
+    def start(self):
+        """启动所有已有目标的工作线程"""
+        self._stop_event.clear()
+        with self._cond:
+            for target in list(self._queues):
+                self._ensure_worker(target)
+            pending = sum(len(items) for items in self._queues.values())
+        if pending:
+            self.logger.info(f"推送队列已启动，恢复 {pending} 条待发送消息")
+
+    def stop(self, timeout=5):
+        """停止工作线程，未发送的消息保留在队列文件中
+
+        join 超时后仍在发送的工作线程不再修改队列和文件，发送成功时仍会调用 on_delivered
+        """
+        self._stop_event.set()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.join(timeout)
+        with self._cond:
+            self._workers.clear()
+
+    def enqueue(self, api_url, group_id, message, entry_ids=None, forward=None, feed=None, title=None):
+        """消息入队，立即返回
+
+        Args:
+            entry_ids: 消息包含的条目ID列表（合并推送时有多条）
+            forward: 合并转发参数 {'name': ..., 'uin': ...}，此时message为消息列表
+            feed / title: RSS源和标题，用于发送结果的日志
+        Returns:
+            入队消息的ID
+        """
+        item = {
+            'id': uuid.uuid4().hex,
+            'api_url': api_url,
+            'group_id': str(group_id),
+            'message': message,
+            'entry_ids': list(entry_ids or []),
+            'forward': forward,
+            'feed': feed,
+            'title': title,
+            'attempts': 0,
+            'connection_failures': 0,
+            'next_attempt': 0,
+            'created_at': time.time()
+        }
+        target = (item['api_url'], item['group_id'])
+        with self._cond:
+            self._queues.setdefault(target, []).append(item)
+            self._save()
+            if not self._stop_event.is_set():
+                self._ensure_worker(target)
+            self._cond.notify_all()
+        return item['id']
+
+    def depth(self):
+        """每个QQ群的待发送消息数量 {group_id: count}"""
+        with self._cond:
+            depth = {}
+            for (_, group_id), items in self._queues.items():
+                depth[group_id] = depth.get(group_id, 0) + len(items)
+            return depth
+
+    def pending_count(self):
+        """待发送消息总数"""
+        return sum(self.depth().values())
+
+    def queued_targets(self):
+        """队列中等待发送和最近处理完（发送成功或转入死信）的 (条目ID, QQ群号) 集合，处理流程据此避免重复入队"""
+        with self._cond:
+            targets = set(self._recent)
+            targets.update((entry_id, group_id) for (_, group_id), items in self._queues.items()
+                           for item in items for entry_id in item['entry_ids'])
+            return targets
+
+    def _ensure_worker(self, target):
+        """确保目标的工作线程在运行（调用方需持有锁）"""
+        worker = self._workers.get(target)
+        if worker and worker.is_alive():
+            return
+        worker = threading.Thread(target=self._worker_loop, args=(target,),
+                                  name=f"push-{target[1]}", daemon=True)
+        self._workers[target] = worker
+        worker.start()
+
+    def _worker_loop(self, target):
+        api_url, group_id = target
+        last_sent = 0.0
+        while not self._stop_event.is_set():
+            with self._cond:
+                if self._stop_event.is_set():
+                    # 在锁内再检查一次：stop() 在上面的检查之后才通知时，不会一直等待
+                    break
+                item, wait_time = self._next_ready_item(target)
+                if item is None:
+                    self._cond.wait(wait_time)
+                    continue
+
+            # 限速：同一QQ群两次发送之间至少间隔 min_send_interval
+            delay = last_sent + self.min_send_interval - time.time()
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+
+            connection_error = False
+            try:
+                if item.get('forward'):
+                    success = send_group_forward_message(api_url, group_id, item['message'], **item['forward'],
+                                                         raise_connection_error=True)
+                else:
+                    success = send_group_message(api_url, group_id, item['message'], raise_connection_error=True)
+            except PushConnectionError:
+                success, connection_error = False, True
+            last_sent = time.time()
+
+            if success and self.on_delivered is not None:
+                try:
+                    self.on_delivered(item)
+                except Exception as e:
+                    self.logger.error(f"记录推送结果失败: {e}", exc_info=True)
+
+            log_extra = {'feed': item.get('feed'), 'stage': 'deliver'}
+            dead = False
+            with self._cond:
+                if self._closed:
+                    # 已被新实例取代：队列文件由新实例负责
+                    break
+                queue = self._queues.get(target, [])
+                if success:
+                    if item in queue:
+                        queue.remove(item)
+                    self._recent.extend((entry_id, group_id) for entry_id in item['entry_ids'])
+                elif connection_error:
+                    # 机器人离线：不计入重试次数，一直重试直到恢复
+                    item['connection_failures'] = item.get('connection_failures', 0) + 1
+                    backoff = self._backoff(item['connection_failures'])
+                    item['next_attempt'] = time.time() + backoff
+                    self.logger.warning(f"无法连接到LLOneBot，{backoff:.1f}秒后重试: {group_id}", extra=log_extra)
+                else:
+                    item['attempts'] += 1
+                    if item['attempts'] > self.max_retries:
+                        if item in queue:
+                            queue.remove(item)
+                        self._dead_letter(item)
+                        self._recent.extend((entry_id, group_id) for entry_id in item['entry_ids'])
+                        dead = True
+                        self.logger.error(f"推送重试 {self.max_retries} 次仍失败，已转入死信记录，不再推送: "
+                                          f"{group_id} - {item.get('title') or item['id']}", extra=log_extra)
+                    else:
+                        backoff = self._backoff(item['attempts'])
+                        item['next_attempt'] = time.time() + backoff
+                        self.logger.warning(f"推送失败，{backoff:.1f}秒后第{item['attempts']}次重试: {group_id}",
+                                            extra=log_extra)
+                self._save()
+
+            if dead and self.on_dead_letter is not None:
+                try:
+                    self.on_dead_letter(item)
+                except Exception as e:
+                    self.logger.error(f"记录死信结果失败: {e}", exc_info=True)
+
+    def _backoff(self, failures):
+        return min(self.retry_backoff * (2 ** (failures - 1)), self.max_backoff)
+
+    def _next_ready_item(self, target):
+        """按入队顺序取出第一条可发送的消息；没有时返回需要等待的秒数（None表示等待新消息）"""
+        now = time.time()
+        earliest = None
+        for item in self._queues.get(target, []):
+            if item['next_attempt'] <= now:
+                return item, 0
+            if earliest is None or item['next_attempt'] < earliest:
+                earliest = item['next_attempt']
+        return None, (earliest - now if earliest is not None else None)
+
+    def _load(self):
+        if not os.path.exists(self.queue_file):
+            return
+        try:
+            with open(self.queue_file, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+            for item in items:
+                if 'entry_ids' not in item:
+                    # 旧版本队列文件只有单个 entry_id
+                    item['entry_ids'] = [item['entry_id']] if item.get('entry_id') is not None else []
+                target = (item['api_url'], str(item['group_id']))
+                self._queues.setdefault(target, []).append(item)
+        except Exception as e:
+            self.logger.error(f"加载推送队列失败: {e}")
+
+    def _save(self):
+        """保存待发送消息（调用方需持有锁）"""
+        if self._closed:
+            return
+        items = [item for queue in self._queues.values() for item in queue]
+        self._write_json(self.queue_file, items)
+
+    def _dead_letter(self, item):
+        """追加一行死信记录（调用方需持有锁）"""
+        try:
+            with open(self.dead_letter_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(dict(item, failed_at=time.time()), ensure_ascii=False) + "\n")
+        except Exception as e:
+            self.logger.error(f"保存死信记录失败: {self.dead_letter_file} - {e}")
+
+    def _write_json(self, path, data):
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.error(f"保存推送队列文件失败: {path} - {e}")
@@ -1,10 +1,26 @@
 # src/core/qq_pusher.py - Handles sending messages to QQ groups.
-import requests
 import logging
+import time
+from .metrics import PUSH_SECONDS, PUSH_REQUESTS
 
-def send_group_message(api_url, group_id, message):
-    """发送QQ群消息"""
+logger = logging.getLogger(__name__)
+
+class PushConnectionError(Exception):
+    """无法连接到LLOneBot（机器人未运行、网络中断或请求超时）"""
+
+def _is_connection_error(error):
+    import requests
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+def send_group_message(api_url, group_id, message, raise_connection_error=False):
+    """发送QQ群消息
+
+    Args:
+        raise_connection_error: 无法连接到LLOneBot时抛出 PushConnectionError（推送队列据此区分机器人离线和发送失败）
+    """
+    start = time.perf_counter()
     try:
+        import requests  # 只在实际推送时加载
         qq_message = {
             "group_id": int(group_id),
             "message": message
@@ -13,8 +29,51 @@ def send_group_message(api_url, group_id, message):
         full_api_url = f"{api_url}/send_group_msg"
         response = requests.post(full_api_url, json=qq_message, timeout=10)
         response.raise_for_status()
-        logging.info(f"成功推送到QQ群: {group_id}")
+        logger.info(f"成功推送到QQ群: {group_id}")
+        PUSH_REQUESTS.inc(api="send_group_msg", result="success")
+        return True
+    except Exception as e:
+        logger.error(f"推送到QQ群失败: {group_id} - {e}")
+        PUSH_REQUESTS.inc(api="send_group_msg", result="failure")
+        if raise_connection_error and _is_connection_error(e):
+            raise PushConnectionError(str(e)) from e
+        return False
+    finally:
+        PUSH_SECONDS.observe(time.perf_counter() - start, api="send_group_msg")
+
+def send_group_forward_message(api_url, group_id, messages, name="线报推送", uin="10000",
+                               raise_connection_error=False):
+    """发送QQ群合并转发消息（OneBot send_group_forward_msg），多条内容合并为一条聊天记录"""
+    start = time.perf_counter()
+    try:
+        import requests  # 只在实际推送时加载
+        nodes = [
+            {
+                "type": "node",
+                "data": {
+                    "name": name,
+                    "uin": str(uin),
+                    "content": message
+                }
+            }
+            for message in messages
+        ]
+        qq_message = {
+            "group_id": int(group_id),
+            "messages": nodes
+        }
+        
+        full_api_url = f"{api_url}/send_group_forward_msg"
+        response = requests.post(full_api_url, json=qq_message, timeout=10)
+        response.raise_for_status()
+        logger.info(f"成功推送合并转发消息到QQ群: {group_id} ({len(messages)}条)")
+        PUSH_REQUESTS.inc(api="send_group_forward_msg", result="success")
         return True
     except Exception as e:
-        logging.error(f"推送到QQ群失败: {group_id} - {e}")
+        logger.error(f"推送合并转发消息到QQ群失败: {group_id} - {e}")
+        PUSH_REQUESTS.inc(api="send_group_forward_msg", result="failure")
+        if raise_connection_error and _is_connection_error(e):
+            raise PushConnectionError(str(e)) from e
         return False
+    finally:
+        PUSH_SECONDS.observe(time.perf_counter() - start, api="send_group_forward_msg")
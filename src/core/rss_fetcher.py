@@ -1,14 +1,73 @@
 # src/core/rss_fetcher.py - Handles fetching and parsing of RSS feeds.
-import feedparser
-import requests
 import logging
 import hashlib
-from urllib.parse import urlparse
-from bs4 import BeautifulSoup
+import functools
+import time
+from urllib.parse import urlparse, urlsplit, urlunsplit
 from ..utils.text_cleaner import clean_html_tags, summarize_text, advanced_text_cleanup
+from .metrics import (FEED_FETCH_SECONDS, FEED_FETCH_BYTES, FEED_FETCH_ERRORS, FEED_ENTRIES_PARSED,
+                      ARTICLE_FETCH_SECONDS, ARTICLE_PARSE_SECONDS)
 
-def generate_entry_id(rss_url, entry):
-    """生成更稳定的条目ID"""
+# 生成条目ID前从链接中去掉的跟踪参数（以 * 结尾表示前缀匹配），RSS源可通过 entry_id_rules 修改
+DEFAULT_TRACKING_PARAMS = ('utm_*', 'spm', 'scm', 'fbclid', 'gclid', 'yclid', 'mc_cid', 'mc_eid',
+                           'share_from', 'share_source')
+
+@functools.lru_cache(maxsize=64)
+def _compile_param_rules(strip_params):
+    exact = frozenset(p for p in strip_params if not p.endswith('*'))
+    prefixes = tuple(p[:-1] for p in strip_params if p.endswith('*'))
+    return exact, prefixes
+
+def normalize_entry_url(url, strip_params=DEFAULT_TRACKING_PARAMS, strip_fragment=False):
+    """规范化条目链接：协议和域名转小写，去掉跟踪参数（可选去掉#片段）
+
+    同一条线报带不同的跟踪参数时得到相同的条目ID。
+    """
+    if '?' not in url and not (strip_fragment and '#' in url):
+        return url
+    parts = urlsplit(url)
+    query = parts.query
+    if query and strip_params:
+        exact, prefixes = _compile_param_rules(tuple(strip_params))
+        kept = []
+        for pair in query.split('&'):
+            name = pair.split('=', 1)[0]
+            if name not in exact and not name.startswith(prefixes):
+                kept.append(pair)
+        query = '&'.join(kept)
+    fragment = '' if strip_fragment else parts.fragment
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, fragment))
+
+@functools.lru_cache(maxsize=1024)
+def _feed_hasher(rss_url):
+    # 预先写入 "RSS源URL:" 前缀，每条线报只需复制哈希状态再写入条目id
+    return hashlib.blake2b(f"{rss_url}:".encode('utf-8'), digest_size=8)
+
+def generate_entry_id(rss_url, entry, rules=None):
+    """生成条目ID：RSS源URL + 条目id（或链接）的64位blake2b哈希，返回63位非负整数
+
+    整数ID比32位十六进制字符串占用的内存和存储空间小得多，可以直接保存在JSON和SQLite中。
+
+    Args:
+        rules: 链接规范化规则 {'strip_params': [...], 'strip_fragment': bool}，默认去掉常见跟踪参数
+    """
+    unique_id = entry.get('id') or entry.get('link')
+    if not unique_id:
+        title = entry.get('title', '')
+        published = entry.get('published', '')
+        unique_id = f"{title}_{published}"
+    elif unique_id.startswith(('http://', 'https://')):
+        if rules:
+            unique_id = normalize_entry_url(unique_id, rules.get('strip_params', DEFAULT_TRACKING_PARAMS),
+                                            rules.get('strip_fragment', False))
+        else:
+            unique_id = normalize_entry_url(unique_id)
+    hasher = _feed_hasher(rss_url).copy()
+    hasher.update(unique_id.encode('utf-8'))
+    return int.from_bytes(hasher.digest(), 'big') >> 1
+
+def generate_legacy_entry_id(rss_url, entry):
+    """旧版本的条目ID（32位md5十六进制），用于识别升级前的推送记录"""
     unique_id = entry.get('id') or entry.get('link')
     if not unique_id:
         title = entry.get('title', '')
@@ -17,17 +76,35 @@ def generate_entry_id(rss_url, entry):
     content = f"{rss_url}:{unique_id}"
     return hashlib.md5(content.encode('utf-8')).hexdigest()
 
-def fetch_webpage_content(url: str) -> str:
-    """抓取网页内容并提取主要文本，增加智能去重和格式清理"""
+ARTICLE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+def download_webpage(url: str) -> bytes:
+    """下载线报网页，返回原始字节（失败时返回空字节串）"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, timeout=15, headers=headers)
+        # requests 导入较慢，只在实际抓取时加载
+        import requests
+        with ARTICLE_FETCH_SECONDS.time():
+            response = requests.get(url, timeout=15, headers=ARTICLE_HEADERS)
         response.raise_for_status()
-        response.encoding = 'utf-8'
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.content
+    except Exception as e:
+        logging.error(f"抓取和处理网页内容失败: {url} - {str(e)}")
+        return b""
+
+def extract_article_text(raw_html) -> str:
+    """从网页HTML（字节按UTF-8解码）中提取主要文本，增加智能去重和格式清理
+
+    纯CPU计算，不访问网络，可以在进程池中执行（见 src/core/cpu_pool.py）。
+    """
+    try:
+        # bs4 导入较慢，只在实际解析时加载
+        from bs4 import BeautifulSoup
+
+        if isinstance(raw_html, bytes):
+            raw_html = raw_html.decode('utf-8', errors='replace')
+        soup = BeautifulSoup(raw_html, 'html.parser')
         
         # 移除脚本、样式和导航等无关内容
         for element in soup(["script", "style", "nav", "footer", "header", "aside"]):
@@ -76,22 +153,62 @@ def fetch_webpage_content(url: str) -> str:
         return cleaned_text[:2000] if len(cleaned_text) > 2000 else cleaned_text
         
     except Exception as e:
-        logging.error(f"抓取和处理网页内容失败: {url} - {str(e)}")
+        logging.error(f"解析网页内容失败: {str(e)}")
+        return ""
+
+def fetch_webpage_content(url: str) -> str:
+    """抓取网页内容并提取主要文本"""
+    raw_html = download_webpage(url)
+    if not raw_html:
         return ""
+    with ARTICLE_PARSE_SECONDS.time():
+        return extract_article_text(raw_html)
+
+def clean_article(raw_html, fallback_text, title, max_length=1200):
+    """网页正文提取 + 文本清理：原始网页字节进，清理后的推送文本出
+
+    网页没有提取到内容时使用 fallback_text（RSS摘要）。
+    纯CPU计算，可以在进程池中执行。
+
+    Returns:
+        (清理后的文本, 网页正文提取耗时秒数)
+    """
+    parse_seconds = 0.0
+    text = ""
+    if raw_html:
+        start = time.perf_counter()
+        text = extract_article_text(raw_html)
+        parse_seconds = time.perf_counter() - start
+    if not text:
+        text = fallback_text
+    if not text:
+        return "", parse_seconds
+    return advanced_text_cleanup(text, title, max_length=max_length), parse_seconds
 
 def parse_feed(rss_url):
     """解析RSS源并返回条目列表"""
+    start = time.perf_counter()
     try:
+        # requests / feedparser 导入较慢，只在实际抓取时加载
+        import requests
+        import feedparser
+        
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         response = requests.get(rss_url, timeout=15, headers=headers)
         response.raise_for_status()
+        FEED_FETCH_BYTES.inc(len(response.content), feed=rss_url)
         feed = feedparser.parse(response.content)
         if feed.bozo:
             logging.error(f"RSS解析错误: {rss_url} - {feed.bozo_exception}")
+            FEED_FETCH_ERRORS.inc(feed=rss_url)
             return []
+        FEED_ENTRIES_PARSED.inc(len(feed.entries), feed=rss_url)
         return feed.entries
     except Exception as e:
         logging.error(f"获取RSS源失败: {rss_url} - {e}")
+        FEED_FETCH_ERRORS.inc(feed=rss_url)
         return []
+    finally:
+        FEED_FETCH_SECONDS.observe(time.perf_counter() - start, feed=rss_url)
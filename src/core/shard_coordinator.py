@@ -0,0 +1,107 @@
+# src/core/shard_coordinator.py - 多进程分片模式的协调进程：启动、监控、重启分片工作进程
+import os
+import signal
+import subprocess
+import sys
+import time
+import logging
+
+DAEMON_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "daemon.py")
+
+class ShardCoordinator:
+    """启动N个分片工作进程并监控它们
+
+    - 每个工作进程运行 daemon.py --shard i/N，只调度一致性哈希分配给自己的RSS源
+    - 工作进程的工作目录为 shards/shard-i（各自的日志、推送队列文件），配置文件和SQLite状态库共用
+    - 工作进程异常退出时只重启该进程，其他分片不受影响；连续崩溃时重启间隔按指数退避
+    """
+
+    def __init__(self, shard_count, config_path, state_db, base_dir=".", restart_backoff=1.0,
+                 max_backoff=60.0, stable_seconds=60.0):
+        self.shard_count = max(1, int(shard_count))
+        self.config_path = os.path.abspath(config_path)
+        self.state_db = os.path.abspath(state_db)
+        self.base_dir = os.path.abspath(base_dir)
+        self.restart_backoff = restart_backoff
+        self.max_backoff = max_backoff
+        self.stable_seconds = stable_seconds
+        self.logger = logging.getLogger(__name__)
+
+        # {分片编号: {'process', 'started', 'backoff', 'restart_at', 'restarts'}}
+        self._workers = {}
+
+    def shard_dir(self, index):
+        return os.path.join(self.base_dir, "shards", f"shard-{index}")
+
+    def start(self):
+        """启动所有分片工作进程"""
+        for index in range(self.shard_count):
+            self._workers[index] = {'process': None, 'started': 0.0, 'backoff': self.restart_backoff,
+                                    'restart_at': 0.0, 'restarts': 0}
+            self._spawn(index)
+
+    def _spawn(self, index):
+        directory = self.shard_dir(index)
+        os.makedirs(directory, exist_ok=True)
+        command = [sys.executable, DAEMON_SCRIPT,
+                   "--workdir", directory,
+                   "--config", self.config_path,
+                   "--shard", f"{index}/{self.shard_count}",
+                   "--state-db", self.state_db]
+        worker = self._workers[index]
+        worker['process'] = subprocess.Popen(command)
+        worker['started'] = time.monotonic()
+        self.logger.info(f"分片 {index} 工作进程已启动 (PID {worker['process'].pid})")
+
+    def check(self):
+        """检查工作进程，重启已退出的进程（由监控循环定期调用）"""
+        now = time.monotonic()
+        for index, worker in self._workers.items():
+            process = worker['process']
+            if process is not None:
+                returncode = process.poll()
+                if returncode is None:
+                    continue
+                # 运行足够久后退出视为偶发故障，重新从最短的退避时间开始
+                if now - worker['started'] >= self.stable_seconds:
+                    worker['backoff'] = self.restart_backoff
+                worker['restart_at'] = now + worker['backoff']
+                self.logger.warning(f"分片 {index} 工作进程已退出（返回码 {returncode}），"
+                                    f"{worker['backoff']:.0f}秒后重启")
+                worker['backoff'] = min(worker['backoff'] * 2, self.max_backoff)
+                worker['process'] = None
+            elif now >= worker['restart_at']:
+                worker['restarts'] += 1
+                self._spawn(index)
+
+    def reload(self):
+        """通知所有工作进程重新加载配置（SIGHUP）"""
+        if not hasattr(signal, "SIGHUP"):
+            return
+        for worker in self._workers.values():
+            process = worker['process']
+            if process is not None and process.poll() is None:
+                process.send_signal(signal.SIGHUP)
+
+    def stop(self, timeout=30):
+        """停止所有工作进程：先发送 SIGTERM 等待其停止调度器，超时后强制结束"""
+        processes = [worker['process'] for worker in self._workers.values()
+                     if worker['process'] is not None and worker['process'].poll() is None]
+        for process in processes:
+            process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            try:
+                process.wait(max(deadline - time.monotonic(), 0.1))
+            except subprocess.TimeoutExpired:
+                self.logger.warning(f"工作进程 {process.pid} 未能及时退出，强制结束")
+                process.kill()
+                process.wait()
+        self._workers.clear()
+
+    def status(self):
+        """返回各分片的状态 {分片编号: {'pid', 'running', 'restarts'}}"""
+        return {index: {'pid': worker['process'].pid if worker['process'] else None,
+                        'running': worker['process'] is not None and worker['process'].poll() is None,
+                        'restarts': worker['restarts']}
+                for index, worker in self._workers.items()}
@@ -0,0 +1,49 @@
+# src/core/sharding.py - 一致性哈希：把RSS源分配到多个工作进程
+import bisect
+import hashlib
+
+# 每个分片在哈希环上的虚拟节点数，越多分配越均匀
+VIRTUAL_NODES = 160
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+class ConsistentHashRing:
+    """一致性哈希环
+
+    分片数量变化时只有约 1/N 的RSS源会换到其他分片（取模分配会让大部分RSS源换分片），
+    换分片的RSS源的去重记录在共享状态库中，不会重复推送。
+    """
+
+    def __init__(self, shard_count, virtual_nodes=VIRTUAL_NODES):
+        self.shard_count = max(1, int(shard_count))
+        points = []
+        for shard in range(self.shard_count):
+            for replica in range(virtual_nodes):
+                points.append((_hash(f"shard-{shard}#{replica}"), shard))
+        points.sort()
+        self._keys = [key for key, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_of(self, key):
+        """返回key所属的分片编号（0 ~ shard_count-1）"""
+        if self.shard_count == 1:
+            return 0
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._shards[index]
+
+_rings = {}
+
+def shard_of(rss_url, shard_count):
+    """RSS源所属的分片编号"""
+    ring = _rings.get(shard_count)
+    if ring is None:
+        ring = _rings[shard_count] = ConsistentHashRing(shard_count)
+    return ring.shard_of(rss_url)
+
+def assign_feeds(configs, shard_count):
+    """按分片分组RSS源配置，返回 {分片编号: [config, ...]}"""
+    assignment = {shard: [] for shard in range(max(1, int(shard_count)))}
+    for config in configs:
+        assignment[shard_of(config['rss_url'], shard_count)].append(config)
+    return assignment
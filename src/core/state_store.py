@@ -0,0 +1,168 @@
+# src/core/state_store.py - SQLite共享状态库：多进程分片模式下共用的去重记录和RSS源状态
+import json
+import os
+import sqlite3
+import logging
+
+STATE_DB_FILE = "state.db"
+
+class SqliteStateStore:
+    """多个进程共用的系统状态（已发送记录、首次运行状态、时间分界点）
+
+    与 sent_entries.json 的状态格式相同，但保存时与库中已有的内容合并，而不是整体覆盖：
+    - 已发送记录取并集（条目ID已投递到所有群后，删除该条目按群的记录）
+    - 首次运行完成标记只会从未完成变为完成
+    - 时间分界点取较大值（set_last_processed_time 直接写入指定值）
+    - 高水位标记按RSS源整体替换（每个RSS源只由一个分片处理）
+    这样各进程只保存自己加载后的状态，也不会覆盖其他进程的记录。
+    数据库使用WAL模式，读写可以并发进行。
+    """
+
+    def __init__(self, path=STATE_DB_FILE, timeout=30):
+        self.path = path
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS sent_entries (key TEXT PRIMARY KEY)")
+            conn.execute("CREATE TABLE IF NOT EXISTS feed_state ("
+                         "rss_url TEXT PRIMARY KEY, "
+                         "first_run_completed INTEGER NOT NULL DEFAULT 0, "
+                         "last_processed_time INTEGER)")
+            conn.execute("CREATE TABLE IF NOT EXISTS feed_marks (rss_url TEXT PRIMARY KEY, mark TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self, write=False):
+        # 每次操作使用独立的连接，不同线程和进程之间互不影响
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return _ClosingConnection(conn, write)
+
+    def load_state(self):
+        """加载完整状态，格式与 main.load_system_state() 相同"""
+        with self._connect() as conn:
+            # 条目ID为整数，列为TEXT类型，读取时转换回整数（"条目ID@群号"和旧版本的十六进制ID保持字符串）
+            sent_entries = [int(key) if key.isdigit() else key
+                            for (key,) in conn.execute("SELECT key FROM sent_entries")]
+            first_run_status = {}
+            last_processed_time = {}
+            for rss_url, completed, cutoff in conn.execute(
+                    "SELECT rss_url, first_run_completed, last_processed_time FROM feed_state"):
+                if completed:
+                    first_run_status[rss_url] = True
+                if cutoff is not None:
+                    last_processed_time[rss_url] = cutoff
+            feed_marks = {rss_url: json.loads(mark)
+                          for rss_url, mark in conn.execute("SELECT rss_url, mark FROM feed_marks")}
+            row = conn.execute("SELECT value FROM meta WHERE key = 'first_run_completed'").fetchone()
+        return {
+            "sent_entries": sent_entries,
+            "first_run_completed": bool(row and row[0] == '1'),
+            "first_run_status": first_run_status,
+            "last_processed_time": last_processed_time,
+            "feed_marks": feed_marks
+        }
+
+    def load_entry_keys(self, entry_ids):
+        """加载指定条目已有的已发送记录（条目ID和 "条目ID@群号" 的按群记录）"""
+        keys = set()
+        with self._connect() as conn:
+            for entry_id in entry_ids:
+                for (key,) in conn.execute("SELECT key FROM sent_entries WHERE key = ? OR key LIKE ?",
+                                           (str(entry_id), f"{entry_id}@%")):
+                    keys.add(int(key) if key.isdigit() else key)
+        return keys
+
+    def save_state(self, sent_entries, first_run_completed, last_processed_time, first_run_status=None,
+                   feed_marks=None):
+        """把状态合并写入数据库（参数与 main.save_system_state() 相同）"""
+        sent_entries = set(sent_entries)
+        sent_keys = {str(key) for key in sent_entries}
+        with self._connect(write=True) as conn:
+            conn.executemany("INSERT OR IGNORE INTO sent_entries (key) VALUES (?)",
+                             ((key,) for key in sent_entries))
+            # 条目已投递到所有群：删除按群的记录（键为 "条目ID@群号"）
+            stale = [(key,) for (key,) in conn.execute("SELECT key FROM sent_entries WHERE key LIKE '%@%'")
+                     if key.rsplit('@', 1)[0] in sent_keys]
+            conn.executemany("DELETE FROM sent_entries WHERE key = ?", stale)
+
+            for rss_url, completed in (first_run_status or {}).items():
+                if completed:
+                    conn.execute("INSERT INTO feed_state (rss_url, first_run_completed) VALUES (?, 1) "
+                                 "ON CONFLICT(rss_url) DO UPDATE SET first_run_completed = 1", (rss_url,))
+            for rss_url, cutoff in (last_processed_time or {}).items():
+                if cutoff is None:
+                    continue
+                conn.execute("INSERT INTO feed_state (rss_url, last_processed_time) VALUES (?, ?) "
+                             "ON CONFLICT(rss_url) DO UPDATE SET last_processed_time = "
+                             "MAX(COALESCE(last_processed_time, 0), excluded.last_processed_time)",
+                             (rss_url, int(cutoff)))
+            conn.executemany("INSERT OR REPLACE INTO feed_marks (rss_url, mark) VALUES (?, ?)",
+                             ((rss_url, json.dumps(mark)) for rss_url, mark in (feed_marks or {}).items()))
+            if first_run_completed:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('first_run_completed', '1')")
+
+    def set_last_processed_time(self, rss_url, timestamp):
+        """写入RSS源的时间分界点"""
+        with self._connect(write=True) as conn:
+            conn.execute("INSERT INTO feed_state (rss_url, last_processed_time) VALUES (?, ?) "
+                         "ON CONFLICT(rss_url) DO UPDATE SET last_processed_time = excluded.last_processed_time",
+                         (rss_url, int(timestamp)))
+
+    def set_feed_mark(self, rss_url, mark):
+        """写入RSS源的高水位标记"""
+        with self._connect(write=True) as conn:
+            conn.execute("INSERT OR REPLACE INTO feed_marks (rss_url, mark) VALUES (?, ?)",
+                         (rss_url, json.dumps(mark)))
+
+    def mark_first_run_completed(self, rss_url=None):
+        """标记RSS源（未指定时为全局）首次运行完成"""
+        self.save_state((), rss_url is None, {}, {rss_url: True} if rss_url else {})
+
+    def is_empty(self):
+        with self._connect() as conn:
+            return (conn.execute("SELECT 1 FROM sent_entries LIMIT 1").fetchone() is None and
+                    conn.execute("SELECT 1 FROM feed_state LIMIT 1").fetchone() is None)
+
+    def import_json(self, json_file):
+        """数据库为空时导入 sent_entries.json 中的已有状态，返回是否导入"""
+        if not os.path.exists(json_file) or not self.is_empty():
+            return False
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            data = {"sent_entries": data, "first_run_completed": True}
+        self.save_state(
+            data.get("sent_entries", []),
+            data.get("first_run_completed", False),
+            data.get("last_processed_time", {}),
+            data.get("first_run_status", {}),
+            data.get("feed_marks", {})
+        )
+        self.logger.info(f"已从 {json_file} 导入 {len(data.get('sent_entries', []))} 条已发送记录")
+        return True
+
+class _ClosingConnection:
+    """with 语句结束时关闭连接（sqlite3.Connection 自带的 with 只提交事务，不关闭连接）
+
+    write=True 时整个 with 块为一个 BEGIN IMMEDIATE 事务：开始时就获取写锁（其他进程写入时
+    按 timeout 等待），避免先读后写的事务在升级写锁时直接返回 "database is locked"。
+    """
+
+    def __init__(self, conn, write=False):
+        self.conn = conn
+        self.write = write
+
+    def __enter__(self):
+        if self.write:
+            self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self.conn.in_transaction:
+                self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.conn.close()
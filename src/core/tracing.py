@@ -0,0 +1,139 @@
+# src/core/tracing.py - 线报处理阶段耗时追踪，超过阈值的慢线报单独记录
+import json
+import os
+import time
+import logging
+import threading
+from logging.handlers import RotatingFileHandler
+from ..utils.log_setup import attach_async_handlers
+
+TRACE_LOG_FILE = "logs/entry_trace.log"
+SLOW_LOG_FILE = "logs/slow_entries.log"
+
+_loggers_lock = threading.Lock()
+_trace_logger = None
+_slow_logger = None
+
+class _Span:
+    """单个阶段的计时上下文，退出时把耗时累加到所属Trace"""
+    __slots__ = ('trace', 'name', 'start')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        spans = self.trace.spans
+        spans[self.name] = spans.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+class Trace:
+    """一次处理（单条线报或一次RSS轮询）的阶段耗时记录
+
+    用法：
+        trace = start_trace("entry", settings, feed=rss_url, entry_id=entry_id)
+        with trace.span("fetch_article"):
+            ...
+        finish_trace(trace)
+    """
+    __slots__ = ('kind', 'fields', 'spans', 'slow_seconds', 'start', 'wall_time')
+
+    def __init__(self, kind, slow_seconds, fields):
+        self.kind = kind
+        self.fields = fields
+        self.spans = {}
+        self.slow_seconds = slow_seconds
+        self.start = time.perf_counter()
+        self.wall_time = time.time()
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+class _NullTrace:
+    """追踪关闭时使用，所有操作都是空操作"""
+    __slots__ = ()
+    _span = _NullSpan()
+
+    def span(self, name):
+        return self._span
+
+    def set(self, **fields):
+        pass
+
+NULL_TRACE = _NullTrace()
+
+def start_trace(kind, settings, **fields):
+    """开始一次追踪，追踪关闭时返回空操作对象
+
+    Args:
+        kind: 'entry'（单条线报）或 'tick'（一次RSS轮询）
+        settings: 合并后的追踪设置（见 get_default_trace_settings）
+        fields: 写入追踪记录的附加字段，如 feed、entry_id
+    """
+    if not settings.get('enabled', True):
+        return NULL_TRACE
+    key = 'slow_entry_seconds' if kind == 'entry' else 'slow_tick_seconds'
+    return Trace(kind, float(settings.get(key, 0) or 0), fields)
+
+def finish_trace(trace):
+    """结束追踪：写入追踪日志，总耗时超过阈值时同时写入慢日志
+
+    Returns:
+        总耗时（秒），追踪关闭时返回None
+    """
+    if trace is NULL_TRACE:
+        return None
+    total = time.perf_counter() - trace.start
+    record = {
+        'time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(trace.wall_time)),
+        'kind': trace.kind,
+        'total_ms': round(total * 1000, 1),
+        'spans_ms': {name: round(seconds * 1000, 1) for name, seconds in trace.spans.items()}
+    }
+    record.update(trace.fields)
+    line = json.dumps(record, ensure_ascii=False, default=str)
+
+    trace_logger, slow_logger = _get_loggers()
+    trace_logger.info(line)
+    if trace.slow_seconds > 0 and total >= trace.slow_seconds:
+        slow_logger.warning(line)
+    return total
+
+def _get_loggers():
+    """延迟创建追踪日志和慢日志（各自独立文件，不写入主日志）"""
+    global _trace_logger, _slow_logger
+    if _trace_logger is not None:
+        return _trace_logger, _slow_logger
+    with _loggers_lock:
+        if _trace_logger is None:
+            os.makedirs(os.path.dirname(TRACE_LOG_FILE), exist_ok=True)
+            _slow_logger = _create_logger("rss_qq_app.slow", SLOW_LOG_FILE)
+            _trace_logger = _create_logger("rss_qq_app.trace", TRACE_LOG_FILE)
+    return _trace_logger, _slow_logger
+
+def _create_logger(name, path):
+    trace_logger = logging.getLogger(name)
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.propagate = False
+    if not trace_logger.handlers:
+        # 与主日志共用日志队列，文件写入在后台监听线程中完成，不阻塞处理线程
+        handler = RotatingFileHandler(path, maxBytes=5*1024*1024, backupCount=5, encoding='utf-8')
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        attach_async_handlers(trace_logger, [handler])
+    return trace_logger
@@ -1,6 +1,7 @@
 
 # src/gui/config_dialog.py - 配置对话框
 import sys
+import re
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTabWidget, 
                              QWidget, QLabel, QLineEdit, QPushButton, QTableWidget, 
                              QTableWidgetItem, QMessageBox, QGroupBox, QCheckBox,
@@ -9,7 +10,8 @@ from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont
 from ..core.config_manager import (load_config, save_config, load_rss_configs, 
                                    save_rss_configs, load_affiliate_config, 
-                                   save_affiliate_config, get_default_affiliate_config)
+                                   save_affiliate_config, get_default_affiliate_config,
+                                   get_push_targets)
 
 class ConfigDialog(QDialog):
     """配置对话框"""
@@ -69,7 +71,7 @@ class ConfigDialog(QDialog):
         add_layout.addRow("推送间隔:", self.interval_input)
         
         self.group_id_input = QLineEdit()
-        self.group_id_input.setPlaceholderText("请输入QQ群号")
+        self.group_id_input.setPlaceholderText("请输入QQ群号，多个群用逗号分隔")
         add_layout.addRow("QQ群号:", self.group_id_input)
         
         self.api_url_input = QLineEdit("http://localhost:3000")
@@ -210,7 +212,8 @@ class ConfigDialog(QDialog):
         for row, config in enumerate(configs):
             self.rss_table.setItem(row, 0, QTableWidgetItem(config.get('rss_url', '')))
             self.rss_table.setItem(row, 1, QTableWidgetItem(str(config.get('interval', ''))))
-            self.rss_table.setItem(row, 2, QTableWidgetItem(config.get('group_id', '')))
+            group_ids = ', '.join(t['group_id'] for t in get_push_targets(config))
+            self.rss_table.setItem(row, 2, QTableWidgetItem(group_ids))
             self.rss_table.setItem(row, 3, QTableWidgetItem(config.get('llonebot_api_url', '')))
             
             # 删除按钮
@@ -268,18 +271,34 @@ class ConfigDialog(QDialog):
             QMessageBox.warning(self, "警告", "推送间隔必须是正整数！")
             return
             
+        # 支持多个QQ群：同一RSS源只抓取处理一次，分发到所有群
+        group_ids = [g for g in re.split(r'[,，\s]+', group_id) if g]
+        
         # 保存配置
         configs = load_rss_configs()
         new_config = {
             'rss_url': rss_url,
             'interval': interval,
-            'group_id': group_id,
             'llonebot_api_url': api_url
         }
-        
         # 检查是否已存在
         existing_config = next((c for c in configs if c["rss_url"] == rss_url), None)
+        # targets 中单独设置了机器人地址/过滤规则的群：仍在列表中的保留原设置，已删除的一并移除
+        targets = [t for t in (existing_config or {}).get('targets', []) or []
+                   if str(t.get('group_id', '')).strip() in group_ids]
+        target_groups = {str(t.get('group_id', '')).strip() for t in targets}
+        plain_groups = [g for g in group_ids if g not in target_groups]
+        if len(plain_groups) == 1:
+            new_config['group_id'] = plain_groups[0]
+        elif plain_groups:
+            new_config['group_ids'] = plain_groups
+        if targets:
+            new_config['targets'] = targets
+        
         if existing_config:
+            existing_config.pop('group_id', None)
+            existing_config.pop('group_ids', None)
+            existing_config.pop('targets', None)
             existing_config.update(new_config)
         else:
             configs.append(new_config)
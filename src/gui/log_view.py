@@ -0,0 +1,145 @@
+# src/gui/log_view.py - 主窗口日志显示：固定行数上限、级别/RSS源过滤、定时合并刷新
+import re
+import logging
+from collections import deque
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPlainTextEdit
+from PyQt6.QtGui import QFont
+from PyQt6.QtCore import QTimer
+
+# 最多保留的日志行数（超出后丢弃最旧的行，内存和重绘开销保持不变）
+MAX_LOG_LINES = 5000
+# 新日志合并刷新的间隔（毫秒），约每秒10帧
+REFRESH_INTERVAL_MS = 100
+
+LEVEL_FILTERS = [
+    ("全部级别", logging.NOTSET),
+    ("INFO及以上", logging.INFO),
+    ("WARNING及以上", logging.WARNING),
+    ("仅ERROR", logging.ERROR),
+]
+ALL_FEEDS = "全部RSS源"
+
+# 日志行格式：%(asctime)s - %(levelname)s - %(message)s，带 feed 字段的日志末尾为 " [feed=RSS源URL]"
+LEVEL_PATTERN = re.compile(r" - (DEBUG|INFO|WARNING|ERROR|CRITICAL) - ")
+FEED_PATTERN = re.compile(r" \[feed=(\S+)\]$")
+
+class LogView(QWidget):
+    """日志显示组件
+
+    - 日志行保存在固定长度的环形缓冲区中，QPlainTextEdit 同样限制最大行数
+    - 新日志先放入待显示列表，由定时器按固定间隔合并为一次追加
+    - 按日志级别和RSS源过滤，切换过滤条件时从缓冲区重新生成显示内容；
+      日志带有 feed 字段时按该字段过滤，否则按行中是否包含RSS源URL过滤
+    - append() 与 QTextEdit.append() 用法相同，用于显示界面自身的提示信息（不受过滤影响）
+    """
+
+    def __init__(self, parent=None, max_lines=MAX_LOG_LINES):
+        super().__init__(parent)
+        self._lines = deque(maxlen=max_lines)  # [(级别, RSS源, 文本)]，级别为None表示界面提示
+        self._pending = []
+        self._last_level = logging.INFO  # 异常堆栈等续行沿用上一行的级别和RSS源
+        self._last_feed = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("级别:"))
+        self.level_combo = QComboBox()
+        for label, level in LEVEL_FILTERS:
+            self.level_combo.addItem(label, level)
+        filter_layout.addWidget(self.level_combo)
+
+        filter_layout.addWidget(QLabel("RSS源:"))
+        self.feed_combo = QComboBox()
+        self.feed_combo.setEditable(True)
+        self.feed_combo.addItem(ALL_FEEDS)
+        self.feed_combo.setMinimumWidth(300)
+        filter_layout.addWidget(self.feed_combo, 1)
+        layout.addLayout(filter_layout)
+
+        self.text_edit = QPlainTextEdit()
+        self.text_edit.setReadOnly(True)
+        self.text_edit.setFont(QFont("Consolas", 9))
+        self.text_edit.setMaximumBlockCount(max_lines)
+        layout.addWidget(self.text_edit)
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(REFRESH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self._flush)
+
+        self.level_combo.currentIndexChanged.connect(self._rebuild)
+        self.feed_combo.currentTextChanged.connect(self._rebuild)
+
+    def append(self, text):
+        """显示界面提示信息"""
+        self._queue([(None, None, line) for line in str(text).split('\n')])
+
+    def append_log(self, content):
+        """显示从日志文件读取的内容（可包含多行）"""
+        lines = []
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            match = LEVEL_PATTERN.search(line)
+            if match:
+                self._last_level = logging.getLevelName(match.group(1))
+                feed_match = FEED_PATTERN.search(line)
+                self._last_feed = feed_match.group(1) if feed_match else None
+            lines.append((self._last_level, self._last_feed, line))
+        self._queue(lines)
+
+    def set_feeds(self, feed_urls):
+        """更新RSS源过滤的候选列表，保留当前的选择"""
+        current = self.feed_combo.currentText()
+        self.feed_combo.blockSignals(True)
+        self.feed_combo.clear()
+        self.feed_combo.addItem(ALL_FEEDS)
+        for url in feed_urls:
+            if url:
+                self.feed_combo.addItem(url)
+        self.feed_combo.setCurrentText(current or ALL_FEEDS)
+        self.feed_combo.blockSignals(False)
+
+    def _queue(self, lines):
+        if not lines:
+            return
+        self._pending.extend(lines)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush(self):
+        """把待显示的日志合并为一次追加"""
+        pending, self._pending = self._pending, []
+        self._lines.extend(pending)
+        visible = [text for level, feed, text in pending if self._matches(level, feed, text)]
+        if not visible:
+            return
+
+        scrollbar = self.text_edit.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+        self.text_edit.appendPlainText("\n".join(visible))
+        # 用户向上翻看历史时不自动滚动
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def _rebuild(self):
+        """过滤条件变化时重新生成显示内容"""
+        self._flush_timer.stop()
+        self._lines.extend(self._pending)
+        self._pending = []
+        self.text_edit.setPlainText("\n".join(text for level, feed, text in self._lines
+                                              if self._matches(level, feed, text)))
+        scrollbar = self.text_edit.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def _matches(self, level, feed, text):
+        if level is None:
+            return True
+        if level < self.level_combo.currentData():
+            return False
+        selected = self.feed_combo.currentText().strip()
+        if not selected or selected == ALL_FEEDS:
+            return True
+        return feed == selected if feed else selected in text
@@ -1,15 +1,16 @@
 # src/gui/main_window.py - 智能RSS线报推送系统主窗口
 import sys
 import subprocess
-import pkg_resources
 import os
 import time
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout,
                              QWidget, QHBoxLayout, QLabel, QFrame, QStatusBar,
-                             QMessageBox, QTextEdit, QDialog, QLineEdit, QPlainTextEdit)
+                             QMessageBox, QDialog, QPlainTextEdit)
 from PyQt6.QtGui import QIcon, QFont
 from PyQt6.QtCore import QSize, Qt, QThread, pyqtSignal, QTimer
 from .config_dialog import ConfigDialog
+from .log_view import LogView
+from ..utils.log_follower import LogFollower
 import threading
 
 class CheckRequirementsThread(QThread):
@@ -26,7 +27,8 @@ class CheckRequirementsThread(QThread):
                 print("✅ 运行环境：已打包程序，跳过依赖检查")
                 missing_packages = []
             else:
-                # 开发环境，进行正常的依赖检查
+                # 开发环境，进行正常的依赖检查（pkg_resources导入较慢，放在后台线程中加载）
+                import pkg_resources
                 requirements_path = 'requirements.txt'
                 with open(requirements_path, 'r', encoding='utf-8') as f:
                     requirements = [line.strip() for line in f if line.strip()]
@@ -61,40 +63,21 @@ class InstallRequirementsThread(QThread):
 
 
 class LogMonitorThread(QThread):
-    """日志监控线程"""
+    """日志监控线程：跟踪日志文件（自动处理日志轮换），新内容按批发送"""
     log_updated = pyqtSignal(str)
     
     def __init__(self, log_file_path):
         super().__init__()
         self.log_file_path = log_file_path
-        self.running = True
-        self.last_position = 0
+        self.follower = LogFollower(log_file_path)
         
     def run(self):
         """监控日志文件变化"""
-        while self.running:
-            try:
-                if os.path.exists(self.log_file_path):
-                    with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                        # 移动到上次读取的位置
-                        f.seek(self.last_position)
-                        new_lines = f.read()
-                        
-                        if new_lines:
-                            # 发送新的日志内容
-                            self.log_updated.emit(new_lines)
-                            # 更新位置
-                            self.last_position = f.tell()
-                
-                # 每秒检查一次
-                time.sleep(1)
-            except Exception as e:
-                print(f"日志监控错误: {e}")
-                time.sleep(5)  # 出错时等待更长时间
+        self.follower.follow(self.log_updated.emit)
                 
     def stop(self):
         """停止监控"""
-        self.running = False
+        self.follower.stop()
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -178,6 +161,9 @@ class MainWindow(QMainWindow):
         self.test_convert_button = self.create_button("🔗 测试转链", "测试返利链接转换功能")
         control_layout.addWidget(self.test_convert_button)
         
+        self.metrics_button = self.create_button("📈 运行指标", "查看抓取、转链、推送的耗时和次数统计")
+        control_layout.addWidget(self.metrics_button)
+        
         # 分隔线
         line4 = QFrame()
         line4.setFrameShape(QFrame.Shape.HLine)
@@ -207,9 +193,9 @@ class MainWindow(QMainWindow):
         log_title.setFont(QFont("Microsoft YaHei", 12, QFont.Weight.Bold))
         log_layout.addWidget(log_title)
         
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
-        self.log_text.setFont(QFont("Consolas", 9))
+        # 日志显示有行数上限，新日志按固定间隔合并刷新，可按级别和RSS源过滤
+        self.log_text = LogView()
+        self.update_log_feeds()
         # 初始显示系统信息
         self.log_text.append("=== 智能RSS线报推送系统 v4.0 ===")
         self.log_text.append("支持淘宝、京东、拼多多返利转链")
@@ -232,6 +218,7 @@ class MainWindow(QMainWindow):
         self.install_button.clicked.connect(self.install_requirements)
         self.config_button.clicked.connect(self.open_config_dialog)
         self.test_convert_button.clicked.connect(self.open_test_convert_dialog)
+        self.metrics_button.clicked.connect(self.open_metrics_dialog)
         self.start_button.clicked.connect(self.start_rss_service)
         self.stop_button.clicked.connect(self.stop_rss_service)
         
@@ -249,12 +236,14 @@ class MainWindow(QMainWindow):
             # 确保logs目录存在
             os.makedirs("logs", exist_ok=True)
             
-            # 如果日志文件存在，先加载现有内容
+            # 先加载现有内容的最后100行，监控从文件末尾开始
+            self.log_monitor = LogMonitorThread(self.log_file_path)
             if os.path.exists(self.log_file_path):
                 self.load_existing_logs()
+            else:
+                self.log_monitor.follower.seek_end()
             
             # 启动日志监控线程
-            self.log_monitor = LogMonitorThread(self.log_file_path)
             self.log_monitor.log_updated.connect(self.append_log)
             self.log_monitor.start()
             
@@ -265,37 +254,27 @@ class MainWindow(QMainWindow):
     def load_existing_logs(self):
         """加载现有的日志内容（最后100行）"""
         try:
-            with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                # 只显示最后100行
-                recent_lines = lines[-100:] if len(lines) > 100 else lines
-                
-                if recent_lines:
-                    self.log_text.append("\n=== 最近的日志记录 ===")
-                    for line in recent_lines:
-                        self.log_text.insertPlainText(line.rstrip() + '\n')
-                
-                # 设置日志监控的起始位置为文件末尾
-                f.seek(0, 2)  # 移动到文件末尾
-                if self.log_monitor:
-                    self.log_monitor.last_position = f.tell()
+            # 从文件末尾反向读取，大日志文件也不会拖慢启动；同时把监控位置设置到文件末尾
+            recent_lines = self.log_monitor.follower.read_tail(100)
+            
+            if recent_lines:
+                self.log_text.append("\n=== 最近的日志记录 ===")
+                self.log_text.append_log("\n".join(recent_lines))
         except Exception as e:
             self.log_text.append(f"❌ 加载历史日志失败: {str(e)}")
             
     def append_log(self, new_content):
         """追加新的日志内容"""
         if new_content.strip():
-            # 移动光标到末尾
-            cursor = self.log_text.textCursor()
-            cursor.movePosition(cursor.MoveOperation.End)
-            self.log_text.setTextCursor(cursor)
-            
-            # 插入新内容
-            self.log_text.insertPlainText(new_content)
+            self.log_text.append_log(new_content)
             
-            # 自动滚动到底部
-            scrollbar = self.log_text.verticalScrollBar()
-            scrollbar.setValue(scrollbar.maximum())
+    def update_log_feeds(self):
+        """用配置中的RSS源更新日志过滤选项"""
+        try:
+            from ..core.config_manager import load_rss_configs
+            self.log_text.set_feeds([config.get('rss_url') for config in load_rss_configs()])
+        except Exception as e:
+            self.log_text.append(f"❌ 加载RSS源列表失败: {str(e)}")
             
     def closeEvent(self, event):
         """窗口关闭事件"""
@@ -373,7 +352,11 @@ class MainWindow(QMainWindow):
         
     def on_config_updated(self):
         """配置更新后的回调"""
-        self.log_text.append("✅ 配置已更新")
+        self.update_log_feeds()
+        if self.service_running:
+            self.log_text.append("✅ 配置已更新，运行中的服务已自动应用")
+        else:
+            self.log_text.append("✅ 配置已更新")
         self.status_bar.showMessage("配置已更新")
         
     def open_test_convert_dialog(self):
@@ -381,6 +364,11 @@ class MainWindow(QMainWindow):
         dialog = TestConvertDialog(self)
         dialog.exec()
         
+    def open_metrics_dialog(self):
+        """打开运行指标对话框"""
+        dialog = MetricsDialog(self)
+        dialog.exec()
+        
     def start_rss_service(self):
         """启动RSS监控服务"""
         try:
@@ -458,7 +446,7 @@ class MainWindow(QMainWindow):
                 background-color: #cccccc; 
                 color: #666666;
             }
-            QTextEdit {
+            QTextEdit, QPlainTextEdit {
                 background-color: #fafafa;
                 border: 1px solid #ddd;
                 border-radius: 4px;
@@ -471,6 +459,135 @@ class MainWindow(QMainWindow):
             }
         """)
 
+PLATFORM_NAMES = {'taobao': '淘宝/天猫', 'jd': '京东', 'pdd': '拼多多'}
+
+# 对话框关闭后仍在运行的测试线程，保留引用直到线程结束
+_active_test_threads = set()
+
+class ConvertTestThread(QThread):
+    """转链测试线程：单个链接输出详细诊断，多个链接并行测试并输出各链接的耗时和平台"""
+    progress = pyqtSignal(str)
+    
+    def __init__(self, config, urls, max_workers=8):
+        super().__init__()
+        self.config = config
+        self.urls = urls
+        self.max_workers = max_workers
+        self._cancelled = False
+        self.finished.connect(lambda: _active_test_threads.discard(self))
+        
+    def cancel(self):
+        """取消尚未开始的测试"""
+        self._cancelled = True
+        
+    def run(self):
+        try:
+            from src.core.affiliate_converter import AffiliateConverter
+            # 创建转换器 - 传递完整配置
+            converter = AffiliateConverter(self.config)
+            if len(self.urls) == 1:
+                self.run_single(converter, self.urls[0])
+            else:
+                self.run_batch(converter, self.urls)
+        except Exception as e:
+            self.progress.emit(f"\n❌ 测试过程中发生错误:")
+            self.progress.emit(f"错误信息: {str(e)}")
+            import traceback
+            self.progress.emit(f"详细堆栈:\n{traceback.format_exc()}")
+            
+    def run_single(self, converter, url):
+        """单个链接的详细诊断"""
+        self.progress.emit("🚀 开始转链测试...")
+        self.progress.emit(f"原始链接: {url}")
+        self.progress.emit("=" * 50)
+        
+        # 测试URL提取
+        self.progress.emit("🔍 URL识别测试:")
+        extracted_urls = converter._extract_urls(f"测试商品: {url}")
+        self.progress.emit(f"  识别到的URL数量: {len(extracted_urls)}")
+        for i, extracted_url in enumerate(extracted_urls):
+            self.progress.emit(f"  URL {i+1}: {extracted_url}")
+        
+        # 测试单链接转换
+        self.progress.emit(f"\n🔄 单链接转换测试:")
+        start = time.perf_counter()
+        converted_url = converter._convert_single_link(url)
+        self.progress.emit(f"  转换结果: {converted_url}")
+        self.progress.emit(f"  耗时: {(time.perf_counter() - start) * 1000:.0f}ms")
+        
+        if converted_url != url:
+            self.progress.emit("  ✅ 转换成功！链接已发生变化")
+        else:
+            self.progress.emit("  ⚠️ 转换未生效，链接未发生变化")
+        if self._cancelled:
+            return
+        
+        # 测试批量转换
+        self.progress.emit(f"\n📝 批量转换测试:")
+        test_text = f"推荐商品：{url} 快来抢购！"
+        batch_result = converter.convert_links(test_text)
+        self.progress.emit(f"  原始文本: {test_text}")
+        self.progress.emit(f"  转换结果: {batch_result}")
+        if self._cancelled:
+            return
+        
+        # 识别平台（使用现有的平台识别方法）
+        self.progress.emit(f"\n🏪 平台识别:")
+        platform = converter._detect_platform(url)
+        
+        if platform == "pdd":
+            # 只对拼多多使用现有的商品ID提取方法
+            goods_id = converter._extract_pdd_goods_id(url)
+            self.progress.emit(f"  平台: {PLATFORM_NAMES[platform]}")
+            self.progress.emit(f"  提取的商品ID: {goods_id if goods_id else '无法提取'}")
+        else:
+            self.progress.emit(f"  平台: {PLATFORM_NAMES.get(platform, '未知平台')}")
+        
+        self.progress.emit("\n" + "=" * 50)
+        self.progress.emit("🎉 测试完成！")
+        
+    def run_batch(self, converter, urls):
+        """多个链接并行测试，每完成一个输出一行结果"""
+        import concurrent.futures
+        
+        self.progress.emit(f"🚀 开始批量转链测试，共 {len(urls)} 个链接（并行 {min(self.max_workers, len(urls))} 个）")
+        self.progress.emit("=" * 50)
+        
+        def test_one(url):
+            if self._cancelled:
+                return url, None, url, 0.0
+            platform = converter._detect_platform(url)
+            start = time.perf_counter()
+            converted_url = converter._convert_single_link(url)
+            return url, platform, converted_url, time.perf_counter() - start
+        
+        success_count = 0
+        latencies = []
+        started = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            futures = [executor.submit(test_one, url) for url in urls]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    url, platform, converted_url, elapsed = future.result()
+                except Exception as e:
+                    self.progress.emit(f"❌ 测试出错: {e}")
+                    continue
+                if self._cancelled:
+                    continue
+                latencies.append(elapsed)
+                platform_name = PLATFORM_NAMES.get(platform, '未知平台')
+                if converted_url != url:
+                    success_count += 1
+                    self.progress.emit(f"✅ [{platform_name}] {elapsed * 1000:.0f}ms  {url}\n    → {converted_url}")
+                else:
+                    self.progress.emit(f"⚠️ [{platform_name}] {elapsed * 1000:.0f}ms  {url}  （转换未生效）")
+        
+        if latencies:
+            self.progress.emit("\n" + "=" * 50)
+            self.progress.emit(f"🎉 测试完成：成功 {success_count}/{len(latencies)} 个，"
+                               f"平均耗时 {sum(latencies) / len(latencies) * 1000:.0f}ms，"
+                               f"最慢 {max(latencies) * 1000:.0f}ms，总耗时 {(time.perf_counter() - started) * 1000:.0f}ms")
+
 class TestConvertDialog(QDialog):
     """测试转链对话框"""
     
@@ -479,6 +596,7 @@ class TestConvertDialog(QDialog):
         self.setWindowTitle("🔗 测试返利转链功能")
         self.setModal(True)
         self.resize(800, 600)
+        self.worker = None
         self.setup_ui()
         self.load_config()
         
@@ -509,9 +627,9 @@ class TestConvertDialog(QDialog):
         input_label.setFont(QFont("Microsoft YaHei", 10, QFont.Weight.Bold))
         input_layout.addWidget(input_label)
         
-        self.url_input = QLineEdit()
-        self.url_input.setPlaceholderText("请输入商品链接，如: https://s.click.taobao.com/xxx")
-        self.url_input.setMinimumHeight(35)
+        self.url_input = QPlainTextEdit()
+        self.url_input.setPlaceholderText("请输入商品链接，如: https://s.click.taobao.com/xxx\n可以粘贴多个链接（每行一个），将并行测试并显示各链接的耗时和平台")
+        self.url_input.setMaximumHeight(90)
         input_layout.addWidget(self.url_input)
         
         # 预设链接按钮
@@ -564,7 +682,7 @@ class TestConvertDialog(QDialog):
         
     def set_preset_url(self, url):
         """设置预设URL"""
-        self.url_input.setText(url)
+        self.url_input.setPlainText(url)
         
     def load_config(self):
         """加载配置"""
@@ -577,77 +695,36 @@ class TestConvertDialog(QDialog):
             self.config = {}
             
     def test_convert(self):
-        """执行转链测试"""
-        url = self.url_input.text().strip()
-        if not url:
+        """执行转链测试（在后台线程中进行，不阻塞界面）"""
+        urls = [line.strip() for line in self.url_input.toPlainText().split() if line.strip()]
+        if not urls:
             QMessageBox.warning(self, "警告", "请输入要测试的商品链接")
             return
+        if self.worker and self.worker.isRunning():
+            return
             
         self.result_text.clear()
-        self.result_text.appendPlainText("🚀 开始转链测试...")
-        self.result_text.appendPlainText(f"原始链接: {url}")
-        self.result_text.appendPlainText("=" * 50)
-        
-        try:
-            # 导入转链模块
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
-            
-            from src.core.affiliate_converter import AffiliateConverter
-            
-            # 创建转换器 - 传递完整配置
-            converter = AffiliateConverter(self.config)
-            
-            # 测试URL提取
-            self.result_text.appendPlainText("🔍 URL识别测试:")
-            extracted_urls = converter._extract_urls(f"测试商品: {url}")
-            self.result_text.appendPlainText(f"  识别到的URL数量: {len(extracted_urls)}")
-            for i, extracted_url in enumerate(extracted_urls):
-                self.result_text.appendPlainText(f"  URL {i+1}: {extracted_url}")
-            
-            # 测试单链接转换
-            self.result_text.appendPlainText(f"\n🔄 单链接转换测试:")
-            converted_url = converter._convert_single_link(url)
-            self.result_text.appendPlainText(f"  转换结果: {converted_url}")
-            
-            if converted_url != url:
-                self.result_text.appendPlainText("  ✅ 转换成功！链接已发生变化")
-            else:
-                self.result_text.appendPlainText("  ⚠️ 转换未生效，链接未发生变化")
-            
-            # 测试批量转换
-            self.result_text.appendPlainText(f"\n📝 批量转换测试:")
-            test_text = f"推荐商品：{url} 快来抢购！"
-            batch_result = converter.convert_links(test_text)
-            self.result_text.appendPlainText(f"  原始文本: {test_text}")
-            self.result_text.appendPlainText(f"  转换结果: {batch_result}")
-            
-            # 识别平台（使用现有的平台识别方法）
-            self.result_text.appendPlainText(f"\n🏪 平台识别:")
-            platform = converter._detect_platform(url)
-            
-            if platform == "taobao":
-                self.result_text.appendPlainText(f"  平台: 淘宝/天猫")
-            elif platform == "jd":
-                self.result_text.appendPlainText(f"  平台: 京东")
-            elif platform == "pdd":
-                platform_name = "拼多多"
-                # 只对拼多多使用现有的商品ID提取方法
-                goods_id = converter._extract_pdd_goods_id(url)
-                self.result_text.appendPlainText(f"  平台: {platform_name}")
-                self.result_text.appendPlainText(f"  提取的商品ID: {goods_id if goods_id else '无法提取'}")
-            else:
-                self.result_text.appendPlainText(f"  平台: 未知平台")
-            
-            self.result_text.appendPlainText("\n" + "=" * 50)
-            self.result_text.appendPlainText("🎉 测试完成！")
-            
-        except Exception as e:
-            self.result_text.appendPlainText(f"\n❌ 测试过程中发生错误:")
-            self.result_text.appendPlainText(f"错误信息: {str(e)}")
-            import traceback
-            self.result_text.appendPlainText(f"详细堆栈:\n{traceback.format_exc()}")
+        self.convert_btn.setEnabled(False)
+        self.convert_btn.setText("⏳ 测试中...")
+        
+        self.worker = ConvertTestThread(self.config, urls)
+        self.worker.progress.connect(self.result_text.appendPlainText)
+        self.worker.finished.connect(self.on_test_finished)
+        _active_test_threads.add(self.worker)
+        self.worker.start()
+        
+    def on_test_finished(self):
+        """测试线程结束"""
+        self.convert_btn.setEnabled(True)
+        self.convert_btn.setText("🚀 开始转链测试")
+        
+    def done(self, result):
+        """关闭对话框时不等待仍在进行的网络请求，后台线程结束后自行释放"""
+        if self.worker and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.progress.disconnect()
+            self.worker.finished.disconnect(self.on_test_finished)
+        super().done(result)
             
     def apply_dialog_stylesheet(self):
         """应用对话框样式"""
@@ -698,6 +775,46 @@ class TestConvertDialog(QDialog):
             }
         """)
 
+class MetricsDialog(QDialog):
+    """运行指标对话框，每2秒刷新一次"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("📈 运行指标")
+        self.resize(900, 600)
+        
+        layout = QVBoxLayout(self)
+        from ..core.config_manager import load_settings, get_default_metrics_settings
+        metrics_settings = load_settings('metrics_settings', get_default_metrics_settings)
+        if metrics_settings.get("enabled", True):
+            metrics_url = f"http://{metrics_settings.get('host', '127.0.0.1')}:{int(metrics_settings.get('port', 9108))}/metrics"
+            info_label = QLabel(f"服务运行期间的抓取、正文提取、转链、推送统计（完整数据见 {metrics_url}）")
+        else:
+            info_label = QLabel("服务运行期间的抓取、正文提取、转链、推送统计（指标服务未启用）")
+        info_label.setStyleSheet("color: #666;")
+        layout.addWidget(info_label)
+        
+        self.metrics_text = QPlainTextEdit()
+        self.metrics_text.setReadOnly(True)
+        self.metrics_text.setFont(QFont("Consolas", 9))
+        self.metrics_text.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        layout.addWidget(self.metrics_text)
+        
+        close_btn = QPushButton("❌ 关闭")
+        close_btn.clicked.connect(self.close)
+        layout.addWidget(close_btn)
+        
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(2000)
+        self.refresh()
+        
+    def refresh(self):
+        """刷新指标显示"""
+        from src.core.metrics import REGISTRY
+        summary = REGISTRY.render_summary()
+        self.metrics_text.setPlainText(summary or "暂无数据，启动服务后开始统计")
+
 def main():
     app = QApplication(sys.argv)
     main_win = MainWindow()
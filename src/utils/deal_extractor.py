@@ -0,0 +1,84 @@
+# src/utils/deal_extractor.py - 线报结构化信息提取：价格、原价、折扣、优惠券、平台、商品ID
+import re
+from typing import Dict, Optional
+
+# 所有规则合并为一个正则，finditer 扫描一遍文本；同一位置按书写顺序优先匹配（带标签的价格优先于裸价格）
+DEAL_PATTERN = re.compile('|'.join([
+    r'(?:原价|日常价|划线价|吊牌价|专柜价|市场价)\s*[:：]?\s*[¥￥$]?\s*(?P<original>\d+(?:\.\d+)?)',
+    r'(?:到手价?|券后价?|活动价|现价|售价|秒杀价|特价|折后价?|实付)\s*[:：]?\s*[¥￥$]?\s*(?P<labeled>\d+(?:\.\d+)?)',
+    r'满\s*\d+(?:\.\d+)?\s*元?\s*减\s*(?P<reduction>\d+(?:\.\d+)?)',
+    r'(?P<coupon>\d+(?:\.\d+)?)\s*元?\s*(?:优惠)?券',
+    r'券\s*减?\s*(?P<coupon_after>\d+(?:\.\d+)?)\s*元?',
+    r'(?P<discount>\d+(?:\.\d+)?)\s*折',
+    r'[¥￥$]\s*(?P<symbol>\d+(?:\.\d+)?)',
+    r'(?P<yuan>\d+(?:\.\d+)?)\s*元',
+    r'item\.(?:m\.)?jd\.com/(?:product/)?(?P<jd_item>\d+)\.html',
+    r'(?:item\.taobao\.com|detail\.(?:m\.)?tmall\.com)/item\.htm\?[^\s"\'<>]*?\bid=(?P<taobao_item>\d+)',
+    r'yangkeduo\.com/goods\d?\.html\?[^\s"\'<>]*?\bgoods_id=(?P<pdd_item>\d+)',
+    r'(?P<jd_link>u\.jd\.com|jd\.com)',
+    r'(?P<taobao_link>taobao\.com|tmall\.com|tb\.cn)',
+    r'(?P<pdd_link>pinduoduo\.com|yangkeduo\.com)',
+]))
+
+_PLATFORMS = {
+    'jd_item': 'jd', 'jd_link': 'jd',
+    'taobao_item': 'taobao', 'taobao_link': 'taobao',
+    'pdd_item': 'pdd', 'pdd_link': 'pdd',
+}
+
+DEAL_FIELDS = ('price', 'original_price', 'discount', 'coupon', 'platform', 'item_id')
+
+def extract_deal(text: str) -> Dict[str, Optional[object]]:
+    """从线报文本中提取结构化信息，没有识别出的字段为None
+
+    返回 {'price': 到手价, 'original_price': 原价, 'discount': 折扣（如 7.5 表示7.5折）,
+          'coupon': 优惠券/满减金额, 'platform': 'jd' / 'taobao' / 'pdd', 'item_id': 商品ID}
+    - 到手价优先取带标签的价格（到手价、券后价等），没有时取文本中最低的价格
+    - 平台和商品ID取第一个能识别出商品ID的链接，没有时取第一个平台链接
+    - 没有写折扣但有到手价和原价时按两者计算
+    """
+    deal = dict.fromkeys(DEAL_FIELDS)
+    if not text:
+        return deal
+
+    labeled = []
+    prices = []
+    for match in DEAL_PATTERN.finditer(text):
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'labeled':
+            labeled.append(float(value))
+        elif kind in ('symbol', 'yuan'):
+            prices.append(float(value))
+        elif kind == 'original':
+            if deal['original_price'] is None:
+                deal['original_price'] = float(value)
+        elif kind in ('coupon', 'coupon_after', 'reduction'):
+            if deal['coupon'] is None:
+                deal['coupon'] = float(value)
+        elif kind == 'discount':
+            discount = float(value)
+            if deal['discount'] is None and 0 < discount < 10:
+                deal['discount'] = discount
+        elif kind.endswith('_item'):
+            if deal['item_id'] is None:
+                deal['platform'] = _PLATFORMS[kind]
+                deal['item_id'] = value
+        elif deal['platform'] is None:
+            deal['platform'] = _PLATFORMS[kind]
+
+    if labeled:
+        deal['price'] = labeled[0]
+    elif prices:
+        deal['price'] = min(prices)
+
+    price, original_price = deal['price'], deal['original_price']
+    if deal['discount'] is None and price and original_price and price < original_price:
+        deal['discount'] = round(price / original_price * 10, 1)
+    return deal
+
+def extract_entry_deal(entry) -> Dict[str, Optional[object]]:
+    """从RSS条目的标题、摘要和链接中提取结构化信息（摘要中的HTML链接也能识别平台和商品ID）"""
+    summary = entry.get('summary', '') or ''
+    link = entry.get('link', '') or ''
+    return extract_deal(f"{entry.get('title', '')}\n{summary}\n{link}")
@@ -0,0 +1,169 @@
+# src/utils/log_follower.py - 日志文件跟踪（类似 tail -f），支持日志轮换
+import os
+import threading
+import logging
+
+try:
+    # 可选依赖：安装 watchdog 后文件变化时立即唤醒，否则定时检查文件状态
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+READ_BLOCK_SIZE = 64 * 1024
+
+class _ChangeHandler(FileSystemEventHandler):
+    """watchdog事件处理：日志文件（含轮换）有变化时唤醒跟踪线程"""
+
+    def __init__(self, file_name, wake_event):
+        super().__init__()
+        self.file_name = file_name
+        self.wake_event = wake_event
+
+    def on_any_event(self, event):
+        paths = (getattr(event, 'src_path', ''), getattr(event, 'dest_path', ''))
+        if any(os.path.basename(str(path)) == self.file_name for path in paths if path):
+            self.wake_event.set()
+
+class LogFollower:
+    """跟踪日志文件新增的内容
+
+    - read_tail 从文件末尾反向按块读取最后N行，不会读入整个文件
+    - 每次读取时打开文件、读完即关闭，不占用文件句柄（Windows下不影响日志轮换重命名）
+    - 通过inode变化或文件变小识别日志轮换：先读完轮换后的旧文件（.1）剩余内容，再从新文件开头继续
+    - 有watchdog时由文件事件唤醒，否则每 poll_interval 秒检查一次文件状态（空闲时几乎不占CPU）
+    - 唤醒后等待 batch_interval 秒再读取，把短时间内的多次写入合并为一批
+    """
+
+    def __init__(self, path, poll_interval=1.0, batch_interval=0.2, use_watchdog=True):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.batch_interval = batch_interval
+        self.use_watchdog = use_watchdog and Observer is not None
+        self.logger = logging.getLogger(__name__)
+
+        self.position = 0
+        self.inode = None
+        self._partial = b""
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+
+    def read_tail(self, max_lines):
+        """读取文件最后 max_lines 行，并把跟踪位置设置到文件末尾"""
+        try:
+            with open(self.path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                end = stat.st_size
+                data = b""
+                offset = end
+                # 从末尾按块向前读，直到包含足够的换行
+                while offset > 0 and data.count(b"\n") <= max_lines:
+                    size = min(READ_BLOCK_SIZE, offset)
+                    offset -= size
+                    f.seek(offset)
+                    data = f.read(size) + data
+        except FileNotFoundError:
+            self.position, self.inode, self._partial = 0, None, b""
+            return []
+
+        self.position, self.inode, self._partial = end, stat.st_ino, b""
+        lines = data.decode('utf-8', errors='replace').splitlines()
+        if offset > 0 and lines:
+            lines = lines[1:]  # 第一行可能不完整
+        return lines[-max_lines:] if max_lines > 0 else []
+
+    def seek_end(self):
+        """从当前文件末尾开始跟踪"""
+        try:
+            stat = os.stat(self.path)
+            self.position, self.inode = stat.st_size, stat.st_ino
+        except FileNotFoundError:
+            self.position, self.inode = 0, None
+        self._partial = b""
+
+    def read_new(self):
+        """读取上次位置之后新增的完整行，返回文本（没有新内容时返回空字符串）"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return ""
+
+        chunks = []
+        if self.inode is not None and (stat.st_ino != self.inode or stat.st_size < self.position):
+            # 日志已轮换：旧文件被重命名为 .1，先读完旧文件中未读的部分
+            chunks.append(self._read_rotated())
+            self.position = 0
+            self._partial = b""
+        self.inode = stat.st_ino
+
+        if stat.st_size > self.position:
+            with open(self.path, 'rb') as f:
+                f.seek(self.position)
+                data = f.read(stat.st_size - self.position)
+            self.position += len(data)
+            chunks.append(data)
+
+        data = self._partial + b"".join(chunks)
+        if not data:
+            return ""
+        # 只返回完整的行，未写完的行留到下次
+        cut = data.rfind(b"\n") + 1
+        self._partial = data[cut:]
+        return data[:cut].decode('utf-8', errors='replace')
+
+    def _read_rotated(self):
+        rotated_path = f"{self.path}.1"
+        try:
+            with open(rotated_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_ino != self.inode:
+                    return b""
+                f.seek(self.position)
+                return f.read()
+        except OSError:
+            return b""
+
+    def follow(self, callback):
+        """阻塞跟踪文件，直到调用 stop()；每批新内容调用一次 callback(text)"""
+        self._stop_event.clear()
+        observer = self._start_observer()
+        # 有文件事件时仍保留较长的兜底检查间隔
+        wait_interval = self.poll_interval * 5 if observer else self.poll_interval
+        try:
+            while not self._stop_event.is_set():
+                woke = self._wake_event.wait(wait_interval)
+                if self._stop_event.is_set():
+                    break
+                if woke and self._stop_event.wait(self.batch_interval):
+                    break
+                self._wake_event.clear()
+                try:
+                    text = self.read_new()
+                    if text:
+                        callback(text)
+                except Exception as e:
+                    self.logger.error(f"读取日志文件失败: {self.path} - {e}")
+                    self._stop_event.wait(5)
+        finally:
+            if observer:
+                observer.stop()
+                observer.join(2)
+
+    def stop(self):
+        """停止跟踪"""
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def _start_observer(self):
+        if not self.use_watchdog:
+            return None
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            observer = Observer()
+            observer.schedule(_ChangeHandler(os.path.basename(self.path), self._wake_event), directory)
+            observer.daemon = True
+            observer.start()
+            return observer
+        except Exception as e:
+            self.logger.warning(f"文件事件监听启动失败，改为定时检查: {e}")
+            return None
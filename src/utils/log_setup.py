@@ -0,0 +1,173 @@
+# src/utils/log_setup.py - 异步日志：业务线程只把日志放入队列，由后台线程写入控制台和文件
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# 文本日志中 extra 参数的 feed 字段追加在消息末尾（GUI按此字段过滤RSS源）
+FEED_SUFFIX = " [feed=%s]"
+
+# JSON日志中从 extra 参数取出的结构化字段
+STRUCTURED_FIELDS = ('feed', 'entry_id', 'stage', 'duration_ms')
+
+_listeners = []
+_setup_lock = threading.Lock()
+
+class JsonLineFormatter(logging.Formatter):
+    """每条日志输出为一行JSON，便于程序解析
+
+    使用 logger.info("...", extra={'feed': url, 'entry_id': id, 'stage': 'deliver', 'duration_ms': 12.3})
+    传入的结构化字段会作为独立的键输出。
+    """
+
+    def format(self, record):
+        data = {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.created)),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        # 异常堆栈由 StructuredQueueHandler 格式化为 exc_text，与 message 分开输出
+        if record.exc_text:
+            data['exc_text'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """文本日志格式（LOG_FORMAT），带有 feed 字段的日志在消息末尾追加 FEED_SUFFIX"""
+
+    def formatMessage(self, record):
+        text = super().formatMessage(record)
+        feed = getattr(record, 'feed', None)
+        if feed:
+            text += FEED_SUFFIX % feed
+        return text
+
+class StructuredQueueHandler(QueueHandler):
+    """入队前只合并消息参数，异常堆栈单独保存在 exc_text 中
+
+    标准 QueueHandler.prepare 会把异常堆栈拼进 message 并清空 exc_info，
+    JSON日志就无法把堆栈作为独立字段输出；文本日志的 Formatter 会自动在消息后追加 exc_text。
+    """
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = self._exc_formatter.formatException(record.exc_info)
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = exc_text
+        return record
+
+class RoutingQueueListener(QueueListener):
+    """所有日志记录器共用一个队列和监听线程，按记录器名称把日志分发给各自的处理器
+
+    handlers 属性始终为全部处理器（停止时逐个关闭）。
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue, respect_handler_level=True)
+        self.routes = {}  # {记录器名称: (处理器, ...)}
+
+    def add_route(self, name, handlers):
+        # 监听线程只读取 routes，整体替换字典避免遍历时被修改
+        routes = dict(self.routes)
+        routes[name] = tuple(handlers)
+        self.routes = routes
+        self.handlers = tuple({id(h): h for hs in routes.values() for h in hs}.values())
+
+    def handle(self, record):
+        record = self.prepare(record)
+        for handler in self.routes.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+def _get_listener():
+    """获取共用的监听线程（首次调用时启动，程序退出时自动停止）"""
+    with _setup_lock:
+        if not _listeners:
+            listener = RoutingQueueListener(queue.SimpleQueue())
+            listener.start()
+            atexit.register(stop_async_logging)
+            _listeners.append(listener)
+        return _listeners[0]
+
+def attach_async_handlers(logger, handlers):
+    """让logger通过共用的日志队列写入 handlers（在监听线程中执行），logger不再向上传递"""
+    listener = _get_listener()
+    with _setup_lock:
+        listener.add_route(logger.name, handlers)
+        logger.propagate = False
+        if not any(isinstance(h, StructuredQueueHandler) for h in logger.handlers):
+            logger.addHandler(StructuredQueueHandler(listener.queue))
+    return listener
+
+def attach_logger(logger, target):
+    """让logger的日志写入与 target 相同的处理器（例如把模块的日志写入主日志）"""
+    listener = _get_listener()
+    logger.setLevel(target.level)
+    return attach_async_handlers(logger, listener.routes.get(target.name, ()))
+
+def setup_async_logging(logger, log_file="logs/rss_qq_app.log", json_enabled=False,
+                        json_file="logs/rss_qq_app.jsonl"):
+    """为logger配置 QueueHandler + QueueListener
+
+    业务线程只做入队，控制台输出和文件写入（带轮换）都在监听线程中完成，
+    程序退出时自动停止监听线程并写完队列中剩余的日志。
+
+    Args:
+        logger: 要配置的日志记录器
+        log_file: 文本日志文件（maxBytes=10MB，backupCount=30，保留约300MB的日志历史）
+        json_enabled: 是否同时输出JSON行格式日志到 json_file
+    Returns:
+        QueueListener
+    """
+    log_dir = os.path.dirname(log_file)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+
+    formatter = TextFormatter(LOG_FORMAT)
+
+    # 控制台处理器
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    # 文件处理器（带轮换）
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=10*1024*1024,  # 10MB per file
+        backupCount=30,  # Keep 30 backup files
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(formatter)
+    handlers = [stream_handler, file_handler]
+
+    if json_enabled:
+        json_handler = RotatingFileHandler(json_file, maxBytes=10*1024*1024, backupCount=30, encoding='utf-8')
+        json_handler.setFormatter(JsonLineFormatter())
+        handlers.append(json_handler)
+
+    return attach_async_handlers(logger, handlers)
+
+def stop_async_logging():
+    """停止监听线程（写完队列中剩余的日志并关闭文件）"""
+    while _listeners:
+        listener = _listeners.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
@@ -312,19 +312,16 @@ def intelligent_content_compression(text: str, max_length: int = 1500) -> Tuple[
         if not line_stripped:
             continue
             
-        # 识别包含重要关键词的行
+        # 识别包含重要关键词的行（价格行都含有 ¥、$、元、折 等关键词，不需要再单独匹配价格）
         is_important = any(keyword in line_stripped for keyword in important_keywords)
         
-        # 识别包含价格信息的行
-        has_price = re.search(r'[¥￥$]\d+|(\d+\.?\d*)元|\d+折', line_stripped)
-        
         # 过滤无意义的短行（少于3个字符且不包含重要信息）
-        is_meaningless_short = len(line_stripped) < 3 and not is_important and not has_price
+        is_meaningless_short = len(line_stripped) < 3 and not is_important
         
         if is_meaningless_short:
             continue
             
-        if is_important or has_price:
+        if is_important:
             important_lines.append(line_stripped)
         else:
             other_lines.append(line_stripped)
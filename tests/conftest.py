@@ -0,0 +1,26 @@
+# tests/conftest.py - 测试公共设置：从仓库根目录导入 main 和 src
+import os
+import sys
+import time
+
+import pytest
+from feedparser import FeedParserDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RSS_URL = "https://rss.example.com/feed"
+
+@pytest.fixture
+def main_module(tmp_path, monkeypatch):
+    """在临时目录中导入 main（日志、状态文件都写到临时目录）"""
+    monkeypatch.chdir(tmp_path)
+    import main
+    return main
+
+def make_entry(name, published=None):
+    """构造RSS条目，published 为UTC时间戳"""
+    entry = FeedParserDict(id=f"https://www.example.com/a/{name}", link=f"https://www.example.com/a/{name}",
+                           title=f"线报 {name}")
+    if published is not None:
+        entry['published_parsed'] = time.gmtime(published)
+    return entry
@@ -0,0 +1,43 @@
+# tests/test_catch_up.py - 积压补发：get_backlog_start / plan_catch_up
+from src.core.catch_up import get_backlog_start, get_catch_up_settings, plan_catch_up
+
+NOW = 1_700_000_000
+SETTINGS = {'backlog_threshold': 3, 'freshness_minutes': 60, 'max_per_poll': 2}
+
+def test_backlog_start_requires_gap_of_two_intervals():
+    assert get_backlog_start(None, 300, now=NOW) is None
+    assert get_backlog_start({'checked_at': NOW - 600}, 300, now=NOW) is None
+    assert get_backlog_start({'checked_at': NOW - 601}, 300, now=NOW) == NOW - 601
+    # 没有轮询记录（旧版本的标记）不视为停机
+    assert get_backlog_start({'ids': []}, 300, now=NOW) is None
+
+def test_backlog_start_keeps_unfinished_catch_up():
+    mark = {'checked_at': NOW - 10, 'catch_up_since': NOW - 7200}
+    assert get_backlog_start(mark, 300, now=NOW) == NOW - 7200
+
+def test_plan_without_backlog_pushes_everything_in_order():
+    items = [(NOW - i, f"e{i}") for i in range(5)]
+    assert plan_catch_up(items, SETTINGS, None, now=NOW) == (["e0", "e1", "e2", "e3", "e4"], [], [])
+    # 未达到积压阈值
+    assert plan_catch_up(items[:2], SETTINGS, NOW - 7200, now=NOW) == (["e0", "e1"], [], [])
+
+def test_plan_drops_stale_entries_and_defers_the_rest_newest_first():
+    backlog_start = NOW - 7200
+    items = [
+        (NOW - 4000, "stale"),        # 停机期间发布，超过新鲜期
+        (NOW - 60, "newest"),
+        (None, "undated"),            # 没有发布时间视为最新
+        (NOW - 600, "fresh"),
+        (backlog_start - 60, "skew"),  # 早于积压起点：时间戳偏差，保留
+    ]
+
+    ready, deferred, dropped = plan_catch_up(items, SETTINGS, backlog_start, now=NOW)
+
+    assert ready == ["undated", "newest"]
+    assert deferred == ["fresh", "skew"]
+    assert dropped == ["stale"]
+
+def test_settings_merge_feed_override_and_disable():
+    assert get_catch_up_settings({'catch_up': {'max_per_poll': 0}}, {'backlog_threshold': 4}) == {
+        'backlog_threshold': 4, 'freshness_minutes': 180, 'max_per_poll': 1}
+    assert get_catch_up_settings({'catch_up': {'enabled': False}}, {}) is None
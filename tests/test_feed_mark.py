@@ -0,0 +1,82 @@
+# tests/test_feed_mark.py - 高水位标记：scan_new_entries / update_feed_mark
+import threading
+from types import SimpleNamespace
+
+from conftest import RSS_URL, make_entry
+from src.core.rss_fetcher import generate_entry_id
+
+NOW = 1_700_000_000
+
+def entry_id(entry):
+    return generate_entry_id(RSS_URL, entry)
+
+def names(pairs):
+    return [entry['title'] for entry, _ in pairs]
+
+def test_scan_stops_at_first_seen_entry(main_module):
+    entries = [make_entry(n, NOW - i) for i, n in enumerate("dcba")]
+    mark = {'ids': [entry_id(entries[2]), entry_id(entries[3])], 'pending': [], 'max_published': NOW - 2}
+
+    new_entries, skipped = main_module.scan_new_entries(entries, RSS_URL, mark)
+
+    assert names(new_entries) == ["线报 d", "线报 c"]
+    assert [eid for _, eid in new_entries] == [entry_id(entries[0]), entry_id(entries[1])]
+    assert skipped == []
+
+def test_scan_recovers_pending_entries_after_seen(main_module):
+    entries = [make_entry(n, NOW - i) for i, n in enumerate("dcba")]
+    # b 已处理，a 上次未处理完；a 之后的未知条目不是新条目
+    mark = {'ids': [entry_id(entries[2])], 'pending': [entry_id(entries[3])], 'max_published': NOW - 2}
+    entries.append(make_entry("old", NOW - 100))
+
+    new_entries, _ = main_module.scan_new_entries(entries, RSS_URL, mark)
+
+    assert names(new_entries) == ["线报 d", "线报 c", "线报 a"]
+
+def test_scan_falls_back_to_max_published_when_no_seen_entry_in_feed(main_module):
+    entries = [make_entry("new", NOW), make_entry("stale", NOW - 60), make_entry("undated")]
+    mark = {'ids': [12345], 'pending': [], 'max_published': NOW - 30}
+
+    new_entries, skipped = main_module.scan_new_entries(entries, RSS_URL, mark)
+
+    # 没有发布时间的条目交给去重记录判断
+    assert names(new_entries) == ["线报 new", "线报 undated"]
+    assert skipped == [entry_id(entries[1])]
+
+def make_job(main_module, scanned, sent_entries, mark=None, skipped_ids=(), feed_size=None):
+    run = SimpleNamespace(sent_lock=threading.Lock(), sent_entries=sent_entries)
+    return SimpleNamespace(run=run, rss_url=RSS_URL, scanned=scanned, mark=mark,
+                           skipped_ids=list(skipped_ids), feed_size=feed_size or len(scanned),
+                           targets=[{'group_id': '111'}, {'group_id': '222'}],
+                           max_published=None, catch_up_since=None)
+
+def test_update_feed_mark_splits_settled_and_pending(main_module, monkeypatch):
+    saved = {}
+    monkeypatch.setattr(main_module, 'save_feed_mark', lambda rss_url, mark: saved.update({rss_url: mark}))
+    done, partial, untouched = (make_entry(n, NOW - i) for i, n in enumerate("xyz"))
+    scanned = [(entry, entry_id(entry)) for entry in (done, partial, untouched)]
+    # done 已投递到所有群，partial 只投递到 111，untouched 未投递
+    sent_entries = {entry_id(done), f"{entry_id(partial)}@111"}
+    job = make_job(main_module, scanned, sent_entries,
+                   mark={'ids': [1, 2], 'max_published': NOW - 3600}, skipped_ids=[99])
+
+    main_module.update_feed_mark(job)
+
+    mark = saved[RSS_URL]
+    assert mark['ids'] == [entry_id(done), 99, 1, 2]
+    assert mark['pending'] == [entry_id(partial), entry_id(untouched)]
+    assert mark['max_published'] == NOW
+    assert mark['catch_up_since'] is None
+    assert isinstance(mark['checked_at'], int)
+
+def test_update_feed_mark_keeps_at_least_feed_size_ids(main_module, monkeypatch):
+    saved = {}
+    monkeypatch.setattr(main_module, 'save_feed_mark', lambda rss_url, mark: saved.update({rss_url: mark}))
+    old_ids = list(range(1, main_module.FEED_MARK_SIZE + 100))
+
+    main_module.update_feed_mark(make_job(main_module, [], set(), mark={'ids': old_ids}))
+    assert len(saved[RSS_URL]['ids']) == main_module.FEED_MARK_SIZE
+
+    feed_size = main_module.FEED_MARK_SIZE + 50
+    main_module.update_feed_mark(make_job(main_module, [], set(), mark={'ids': old_ids}, feed_size=feed_size))
+    assert saved[RSS_URL]['ids'] == old_ids[:feed_size]
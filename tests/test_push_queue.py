@@ -0,0 +1,119 @@
+# tests/test_push_queue.py - 推送队列：重试、死信、机器人离线重试、重启恢复
+import json
+import time
+
+import pytest
+
+from src.core import push_queue as push_queue_module
+from src.core.push_queue import PushQueue
+from src.core.qq_pusher import PushConnectionError
+
+API_URL = "http://127.0.0.1:3000"
+SETTINGS = {'messages_per_second': 100, 'max_retries': 2, 'retry_backoff_seconds': 0.01,
+            'max_backoff_seconds': 0.05}
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(**callbacks):
+        queue = PushQueue(SETTINGS, queue_file=str(tmp_path / "push_queue.json"),
+                          dead_letter_file=str(tmp_path / "dead_letters.jsonl"), **callbacks)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.stop()
+
+def fake_sender(results):
+    """按顺序返回 results 中的结果（异常则抛出），用完后一直成功"""
+    calls = []
+
+    def send(api_url, group_id, message, raise_connection_error=False):
+        calls.append((group_id, message))
+        result = results.pop(0) if results else True
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return send, calls
+
+def test_retries_until_delivered(make_queue, monkeypatch):
+    send, calls = fake_sender([False, False])
+    monkeypatch.setattr(push_queue_module, 'send_group_message', send)
+    delivered = []
+    queue = make_queue(on_delivered=delivered.append)
+    queue.start()
+
+    queue.enqueue(API_URL, 111, "hello", entry_ids=[1])
+
+    assert wait_for(lambda: delivered)
+    assert len(calls) == 3
+    assert delivered[0]['entry_ids'] == [1]
+    assert wait_for(lambda: queue.pending_count() == 0)
+    # 发送成功后仍算作已处理，轮询不会在写入已发送记录之前重新入队
+    assert (1, '111') in queue.queued_targets()
+
+def test_dead_letter_after_max_retries(make_queue, monkeypatch, tmp_path):
+    send, calls = fake_sender([False] * 10)
+    monkeypatch.setattr(push_queue_module, 'send_group_message', send)
+    delivered, dead = [], []
+    queue = make_queue(on_delivered=delivered.append, on_dead_letter=dead.append)
+    queue.start()
+
+    queue.enqueue(API_URL, 111, "hello", entry_ids=[1, 2], title="线报")
+
+    assert wait_for(lambda: dead)
+    assert len(calls) == SETTINGS['max_retries'] + 1
+    assert delivered == []
+    assert queue.pending_count() == 0
+    assert {(1, '111'), (2, '111')} <= queue.queued_targets()
+    lines = (tmp_path / "dead_letters.jsonl").read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record['entry_ids'] == [1, 2] and record['title'] == "线报" and 'failed_at' in record
+
+def test_connection_errors_do_not_count_as_attempts(make_queue, monkeypatch):
+    send, calls = fake_sender([PushConnectionError("offline")] * 5)
+    monkeypatch.setattr(push_queue_module, 'send_group_message', send)
+    delivered, dead = [], []
+    queue = make_queue(on_delivered=delivered.append, on_dead_letter=dead.append)
+    queue.start()
+
+    queue.enqueue(API_URL, 111, "hello", entry_ids=[1])
+
+    assert wait_for(lambda: delivered)
+    assert len(calls) == 6
+    assert dead == []
+    assert delivered[0]['attempts'] == 0
+    assert delivered[0]['connection_failures'] == 5
+
+def test_unsent_messages_survive_restart(make_queue, monkeypatch):
+    send, calls = fake_sender([PushConnectionError("offline")] * 1000)
+    monkeypatch.setattr(push_queue_module, 'send_group_message', send)
+    queue = make_queue()
+    queue.start()
+    queue.enqueue(API_URL, 222, "later", entry_ids=[7])
+    assert wait_for(lambda: calls)
+    queue.stop()
+
+    # 机器人恢复后重启：从队列文件恢复未发送的消息
+    send, calls = fake_sender([])
+    monkeypatch.setattr(push_queue_module, 'send_group_message', send)
+    delivered = []
+    restarted = make_queue(on_delivered=delivered.append)
+    assert restarted.depth() == {'222': 1}
+    restarted.start()
+
+    assert wait_for(lambda: delivered)
+    assert calls == [('222', "later")]
+    assert delivered[0]['entry_ids'] == [7]